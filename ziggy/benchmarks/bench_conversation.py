@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Prompt size over a long GPT chat: full history vs the token-budgeted store.
+
+Plays a long session (English and Hebrew turns) against the fake LLM
+server twice. The naive mode resends the whole history each turn. The
+store mode goes through get_gpt_reply(user=...), with a sliding window,
+rolling summaries made by the same fake server, and memory facts. Prints
+the prompt tokens sent at checkpoints, the cost of build_messages() and
+how many summary calls were made.
+
+Run from the ziggy/ directory:
+    python3 benchmarks/bench_conversation.py [--turns 200] [--cap 1500]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.llm import LLMService, set_llm, get_llm
+from core.fake_llm_server import start_fake_server
+from core import chatgpt, conversation
+from core.conversation import ConversationStore, count_tokens
+
+MODEL = "gpt-4o"
+SUBJECTS = ["the trip to Eilat", "dinner plans for friday", "the new job offer", "my daughter's school project",
+            "fixing the boiler", "the tomatoes on the balcony", "הטיול לצפון", "המתכון לשקשוקה", "החשבון של החשמל"]
+ASKS = ["what do you think about {}?", "remind me what we said about {}", "can you give me three ideas for {}?",
+        "מה דעתך על {}?", "תסביר לי שוב לגבי {}", "and what about the budget for {}?"]
+
+def prompts(turns):
+    random.seed(7)
+    return [random.choice(ASKS).format(random.choice(SUBJECTS)) + " " + " ".join(
+        random.choice(("please", "quickly", "in detail", "briefly", "honestly", "כמה שיותר", "בקצרה"))
+        for _ in range(random.randint(3, 12))) for _ in range(turns)]
+
+class CountingLLM(LLMService):
+    """Records the size of each chat prompt sent for MODEL, counted like the store counts."""
+    last_prompt = 0
+
+    def chat(self, messages, model=MODEL, **kwargs):
+        if model == MODEL:
+            self.last_prompt = sum(count_tokens(m["content"]) + 4 for m in messages)
+        return super().chat(messages, model=model, **kwargs)
+
+def run_naive(texts, checkpoints):
+    history, sizes = [], {}
+    for turn, text in enumerate(texts, 1):
+        history.append({"role": "user", "content": text})
+        reply = get_llm().chat(history, model=MODEL)
+        history.append({"role": "assistant", "content": reply})
+        if turn in checkpoints:
+            sizes[turn] = get_llm().last_prompt
+    return sizes
+
+def run_store(texts, checkpoints, store):
+    sizes, build_us = {}, []
+    for turn, text in enumerate(texts, 1):
+        started = time.perf_counter()
+        store.build_messages("bench", text)  # Timed separately; get_gpt_reply builds it again
+        build_us.append((time.perf_counter() - started) * 1e6)
+        chatgpt.get_gpt_reply(text, model=MODEL, user="bench")
+        if turn in checkpoints:
+            sizes[turn] = get_llm().last_prompt
+        time.sleep(0.002)  # Let a background summary land, as it would between spoken turns
+    return sizes, build_us
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--cap", type=int, default=1500, help="max_prompt_tokens")
+    args = parser.parse_args()
+    set_llm(CountingLLM(api_key="fake", base_url=start_fake_server()))
+    texts = prompts(args.turns)
+    checkpoints = sorted({t for t in (1, 5, 10, 25, 50, 100, 200, 500, args.turns) if t <= args.turns})
+
+    facts = [{"topic": "daughter's school", "content": "Ramat Aviv elementary"},
+             {"topic": "boiler technician", "content": "Avi, 050-1234567"}]
+    store = ConversationStore(
+        max_prompt_tokens=args.cap,
+        summarize=lambda prompt: get_llm().chat([{"role": "user", "content": prompt}], model="gpt-3.5-turbo"),
+        recall=lambda query, k: [fact for fact in facts if any(w in query for w in ("school", "boiler"))][:k],
+    )
+    conversation._store = store
+
+    naive = run_naive(texts, checkpoints)
+    budgeted, build_us = run_store(texts, checkpoints, store)
+    print(f"{args.turns} turns, cap {args.cap} prompt tokens\n")
+    print(f"{'turn':>6} {'full history':>13} {'budgeted':>9}")
+    for turn in checkpoints:
+        print(f"{turn:>6} {naive[turn]:>13} {budgeted[turn]:>9}")
+    build_us.sort()
+    state = store.stats()["bench"]
+    print(f"\nbuild_messages: p50 {build_us[len(build_us) // 2]:.0f} µs, "
+          f"max {build_us[-1]:.0f} µs; {store.summaries_made} rolling summaries")
+    print(f"final state: {state['turns']} turns / {state['window_tokens']} tokens in window, "
+          f"summary {state['summary_tokens']} tokens")
+
+if __name__ == "__main__":
+    main()
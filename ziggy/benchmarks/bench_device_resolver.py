@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Device name resolution: accuracy and lookup time of DeviceResolver.
+
+Resolves a set of realistic spoken names (articles, Hebrew, synonyms,
+hyphens, typos, room groups) against the devices in settings.yaml, then
+times lookups against a synthetic home with many more devices.
+
+Run from the ziggy/ directory:
+    python3 benchmarks/bench_device_resolver.py [--devices 200] [--rounds 2000]
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from config.settings import settings
+from smart_home.device_state import device_key
+from smart_home.device_resolver import DeviceResolver
+
+# spoken name -> expected devices
+CASES = {
+    "living_room_light": ["living_room_light"],
+    "the living room light": ["living_room_light"],
+    "living-room lamp": ["living_room_light"],
+    "lounge lights": ["living_room_light"],
+    "סלון": ["living_room_light"],
+    "האור בסלון": ["living_room_light"],
+    "livng room lite": ["living_room_light"],
+    "bedroom lamp": ["bedroom_lamp"],
+    "the night lamp": ["bedroom_lamp"],
+    "המנורה בחדר השינה": ["bedroom_lamp"],
+    "bedrom lamp": ["bedroom_lamp"],
+    "the ac": ["thermostat"],
+    "מזגן": ["thermostat"],
+    "thermostatt": ["thermostat"],
+    "toaster": [],
+    "lamp": [],  # Two lamps: ambiguous, should not guess
+}
+
+ROOMS = ["living room", "bedroom", "kitchen", "bathroom", "office", "hallway", "balcony", "kids room"]
+KINDS = [("light", "light"), ("lamp", "light"), ("fan", "switch"), ("tv", "switch"), ("blinds", "cover"), ("ac", "climate")]
+
+def synthetic_config(count):
+    config = {}
+    for i in range(count):
+        room = ROOMS[i % len(ROOMS)]
+        kind, component = KINDS[(i // len(ROOMS)) % len(KINDS)]
+        name = f"{room} {kind} {i // (len(ROOMS) * len(KINDS)) + 1}"
+        config[device_key(name)] = {"component": component, "room": room}
+    return config
+
+def time_lookups(resolver, queries, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for query in queries:
+            resolver.resolve(query)
+    return (time.perf_counter() - started) / (rounds * len(queries)) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--devices", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    resolver = DeviceResolver(settings.get("devices", {}))
+    exact_lookup = lambda name: [device_key(name)] if device_key(name) in settings.get("devices", {}) else []
+    print(f"{'spoken name':24} {'key lookup':18} {'resolver':32}")
+    old_ok = new_ok = 0
+    for query, expected in CASES.items():
+        match = resolver.resolve(query)
+        got = match["devices"] if match else []
+        old = exact_lookup(query)
+        old_ok += old == expected
+        new_ok += got == expected
+        label = f"{', '.join(got) or '-'} ({match['method']} {match['confidence']:.2f})" if match else "-"
+        print(f"{query:24} {', '.join(old) or '-':18} {label:32} {'ok' if got == expected else 'MISS'}")
+    print(f"\ncorrect: key lookup {old_ok}/{len(CASES)}, resolver {new_ok}/{len(CASES)}\n")
+
+    started = time.perf_counter()
+    big = DeviceResolver(synthetic_config(args.devices))
+    build_ms = (time.perf_counter() - started) * 1000
+    queries = ["kitchen light 1", "the bedroom lamp 2", "livng room fan 1", "office", "hallway blinds 3", "מטבח"]
+    print(f"{args.devices} devices: index built in {build_ms:.1f} ms")
+    print(f"  {time_lookups(big, queries, args.rounds):.1f} µs per lookup (mixed exact/room/fuzzy)")
+    print(f"  {time_lookups(big, ['zzz qqq xxx'], args.rounds):.1f} µs per miss")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Offline accuracy and latency benchmark for the local intent classifier.
+
+Run from the ziggy/ directory:  python3 benchmarks/bench_intent_classifier.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.intent_classifier import IntentClassifier, PARAMLESS_INTENTS
+
+# Held-out phrasings that do not appear in SEED_EXAMPLES
+HELD_OUT = [
+    ("hey what time is it now", "get_time"),
+    ("can you tell me the time please", "get_time"),
+    ("השעה בבקשה", "get_time"),
+    ("מה השעה כרגע", "get_time"),
+    ("which date is today", "get_date"),
+    ("what's today's date", "get_date"),
+    ("מה התאריך של היום", "get_date"),
+    ("will it rain today", "get_weather"),
+    ("what is the weather like", "get_weather"),
+    ("מה מזג האוויר מחר", "get_weather"),
+    ("tell me a funny joke", "tell_joke"),
+    ("know any good jokes", "tell_joke"),
+    ("תספר לי בדיחה", "tell_joke"),
+    ("tell me an interesting fact", "tell_fact"),
+    ("תגיד לי עובדה מעניינת", "tell_fact"),
+    ("what's your status", "get_status"),
+    ("מה המצב של המערכת", "get_status"),
+    ("bye bye", "exit"),
+    ("להתראות זיגי", "exit"),
+    ("please restart", "restart"),
+    ("תאתחל", "restart"),
+    ("run the diagnostics", "debug_diagnostics"),
+    ("תריץ אבחון", "debug_diagnostics"),
+    ("shut the system down", "shutdown_system"),
+    ("reboot the pi", "reboot_system"),
+    ("turn on the bedroom lamp", "control_device"),
+    ("תדליק את האור במטבח", "control_device"),
+    ("add tomatoes to the list", "add_to_list"),
+    ("תוסיף עגבניות לרשימה", "add_to_list"),
+    ("remind me to water the plants at 6", "set_reminder"),
+    ("play my favourite song", "play_music"),
+    # Out of domain: these must fall through to GPT
+    ("what is the capital of france", None),
+    ("how do i cook rice", None),
+    ("מי ניצח במשחק אתמול", None),
+]
+
+def main():
+    classifier = IntentClassifier(examples_path=None)
+    start = time.perf_counter()
+    classifier.train_seed()
+    train_ms = (time.perf_counter() - start) * 1000
+
+    threshold, margin = classifier.threshold, classifier.margin
+    in_domain = [(text, expected) for text, expected in HELD_OUT if expected]
+    answered = correct_top1 = correct_answered = 0
+    for text, expected in HELD_OUT:
+        if expected:
+            classifier.threshold, classifier.margin = 0.0, 0.0
+            top1, _ = classifier.predict(text)
+            correct_top1 += top1 == expected
+            classifier.threshold, classifier.margin = threshold, margin
+        intent, confidence = classifier.predict(text)
+        if intent in PARAMLESS_INTENTS:
+            answered += 1
+            correct_answered += intent == expected
+        elif intent is None:
+            print(f"  fallthrough ({confidence:.2f}): {text}")
+
+    rounds = 200
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for text, _ in HELD_OUT:
+            classifier.predict(text)
+    per_call_us = (time.perf_counter() - start) / (rounds * len(HELD_OUT)) * 1e6
+
+    total = len(HELD_OUT)
+    print(f"Trained {len(classifier.labels)} intents in {train_ms:.1f} ms")
+    print(f"Top-1 accuracy:           {correct_top1}/{len(in_domain)} ({correct_top1 / len(in_domain):.0%})")
+    print(f"Answered locally:         {answered}/{total} ({answered / total:.0%})")
+    if answered:
+        print(f"Precision when answering: {correct_answered}/{answered} ({correct_answered / answered:.0%})")
+    print(f"Predict latency:          {per_call_us:.0f} µs/call")
+
+if __name__ == "__main__":
+    main()
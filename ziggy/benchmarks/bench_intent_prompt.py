@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Token-count benchmark: the original prose gpt_parse prompt vs the compact
+schema prompt (system prefix + function definition + user turn).
+
+Run from the ziggy/ directory:  python3 benchmarks/bench_intent_prompt.py
+
+Uses tiktoken when installed; otherwise falls back to a rough
+word-piece estimate, which is fine for comparing the two prompts.
+"""
+import os
+import re
+import sys
+import json
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.intent_schema import SYSTEM_PROMPT, TOOLS, build_messages
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+    count_tokens = lambda text: len(_encoding.encode(text))
+    METHOD = "tiktoken cl100k_base"
+except ImportError:
+    _PIECE_RE = re.compile(r"[A-Za-z]{1,4}|\d{1,3}|[֐-׿]{1,2}|[^\sA-Za-z\d֐-׿]")
+    count_tokens = lambda text: len(_PIECE_RE.findall(text))
+    METHOD = "estimate (install tiktoken for exact counts)"
+
+SAMPLES = [
+    "set the living room light to 50 percent",
+    "תזכיר לי לקנות חלב מחר בבוקר",
+    "what do you remember about grandma's birthday",
+    "translate good morning to french",
+    "can you play something relaxing",
+]
+
+def legacy_prompt(text):
+    return f"""
+You are a smart home assistant named Ziggy. Your task is to analyze user requests and extract the user's intent and any relevant parameters in a JSON object.
+
+Here are the supported intents and their expected parameters:
+- get_time: {{}}
+- get_date: {{}}
+- get_weather: {{"location": str (optional)}}
+- control_device: {{"device": str, "action": "on"|"off"|"toggle"|"set_brightness"|"set_temperature" (and other relevant actions), "value": str (optional, e.g., brightness level, temperature)}}
+- add_to_list: {{"item": str}}
+- remove_from_list: {{"item": str}}
+- create_task: {{"description": str, "when": str (natural time)}}
+- cancel_task: {{"description": str}}
+- ask_memory: {{"topic": str}}
+- save_memory: {{"topic": str, "content": str}}
+- read_file: {{"filename": str}}
+- write_file: {{"filename": str, "content": str}}
+- tell_joke: {{}}
+- tell_fact: {{}}
+- generate_idea: {{"topic": str}}
+- get_status: {{}}
+- exit: {{}}
+- restart: {{}}
+- run_ifttt: {{"event": str, "value1": str (optional)}}
+- switch_mode: {{"mode": str}}
+- ask_buddy: {{"question": str}}
+- set_reminder: {{"message": str, "when": str}}
+- play_music: {{"song": str (optional)}}
+- ask_health: {{"issue": str}}
+- debug_diagnostics: {{}}
+- translate: {{"text": str, "target_lang": str}}
+- shutdown_system: {{}}
+- reboot_system: {{}}
+
+For the 'control_device' intent, make sure to extract the 'device' name, the 'action' (like 'on', 'off', 'toggle', 'set_brightness', 'set_temperature'), and the 'value' if the user provides one (e.g., "set the living room light to 50 percent", the value is "50").
+
+Always return a valid JSON object and nothing else. Do not include any extra text or formatting.
+
+User: "{text}"
+Ziggy (JSON):
+"""
+
+def main():
+    tools_tokens = count_tokens(json.dumps(TOOLS, separators=(",", ":")))
+    prefix_tokens = count_tokens(SYSTEM_PROMPT) + tools_tokens
+    old_total = new_total = 0
+    print(f"Token counting: {METHOD}\n")
+    print(f"{'request':48} {'old':>6} {'new':>6}")
+    for text in SAMPLES:
+        old = count_tokens(legacy_prompt(text))
+        new = sum(count_tokens(m["content"]) for m in build_messages(text)) + tools_tokens
+        old_total += old
+        new_total += new
+        print(f"{text[:48]:48} {old:6d} {new:6d}")
+    n = len(SAMPLES)
+    print(f"\nAverage input tokens:  old {old_total / n:.0f}  new {new_total / n:.0f} "
+          f"({1 - new_total / old_total:.0%} fewer)")
+    print(f"Stable prefix (system + function schema): {prefix_tokens} tokens, identical on every call")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: langdetect vs the script-based detector used for TTS and Telegram.
+
+Times langdetect's first call (profile loading) and steady-state calls
+against detect_language() with and without its memo. Checks accuracy on
+short Hebrew/English replies. Counts how often langdetect changes its
+answer for the same text across runs, since it is probabilistic and
+unseeded.
+
+Run from the ziggy/ directory:  python3 benchmarks/bench_language.py [--repeat 20]
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from voice.language import detect_language, language_spans
+
+try:
+    import langdetect
+except ImportError:
+    langdetect = None
+
+# (reply, expected language): the kind of short text Ziggy speaks
+SAMPLES = [
+    ("השעה עכשיו 14:35", "he"), ("The time is 2:35 PM", "en"), ("בוצע", "he"), ("Done", "en"),
+    ("האור בסלון דולק", "he"), ("The living room light is on", "en"), ("OK", "en"), ("כן?", "he"),
+    ("Yes?", "en"), ("הזיכרון נשמר", "he"), ("Saved to memory", "en"), ("Reminder set", "en"),
+    ("תזכורת נקבעה למחר בשמונה", "he"), ("It's 22 degrees and sunny", "en"), ("מעולה!", "he"),
+    ("Sure thing", "en"), ("No problem", "en"), ("Good night", "en"), ("לילה טוב", "he"),
+    ("I couldn't find that device", "en"), ("לא מצאתי את המכשיר", "he"), ("Hi", "en"), ("היי", "he"),
+]
+
+def legacy_detect(text):
+    # VoiceAssistant._detect_language before this change
+    try:
+        lang = langdetect.detect(text)
+        return "he" if lang.startswith("he") else "en"
+    except Exception:
+        return "en"
+
+def per_call_us(func, texts, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            func(text)
+    return (time.perf_counter() - started) / (repeat * len(texts)) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    texts = [text for text, _ in SAMPLES]
+
+    print(f"{len(SAMPLES)} short replies\n")
+    print(f"{'':24} {'first call':>11} {'per call':>11} {'accuracy':>9} {'unstable':>9}")
+    if langdetect:
+        started = time.perf_counter()
+        legacy_detect(texts[0])
+        first_ms = (time.perf_counter() - started) * 1000
+        per_call = per_call_us(legacy_detect, texts, max(1, args.repeat // 4))
+        answers = [{legacy_detect(text) for _ in range(args.repeat)} for text in texts]
+        unstable = sum(len(a) > 1 for a in answers)
+        correct = sum(legacy_detect(text) == lang for text, lang in SAMPLES)
+        print(f"{'langdetect':24} {first_ms:9.0f}ms {per_call:9.0f}µs {correct:>5}/{len(SAMPLES)} "
+              f"{unstable:>5}/{len(SAMPLES)}")
+    else:
+        print("langdetect               (not installed)")
+
+    raw = detect_language.__wrapped__
+    started = time.perf_counter()
+    raw(texts[0])
+    first_ms = (time.perf_counter() - started) * 1000
+    correct = sum(detect_language(text) == lang for text, lang in SAMPLES)
+    unstable = sum(len({raw(text) for _ in range(args.repeat)}) > 1 for text in texts)
+    print(f"{'script (no memo)':24} {first_ms:9.2f}ms {per_call_us(raw, texts, args.repeat * 50):9.2f}µs "
+          f"{correct:>5}/{len(SAMPLES)} {unstable:>5}/{len(SAMPLES)}")
+    print(f"{'script (memoized)':24} {'':>11} {per_call_us(detect_language, texts, args.repeat * 50):9.2f}µs")
+
+    mixed = ["הדלקתי את the living room light בשבילך", "Playing שלום עליכם by the choir", "תדליק את ה-TV בסלון"]
+    spans_us = per_call_us(language_spans.__wrapped__, mixed, args.repeat * 20)
+    print(f"\nlanguage_spans (no memo): {spans_us:.1f} µs per sentence")
+    for text in mixed:
+        print(f"  {text!r} -> {language_spans(text)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Memory store at 100k topics: legacy JSON rewrite vs the SQLite WAL store.
+
+Measures startup load time, the cost of one save, lookup time and the
+Python heap held after loading (SQLite's own page cache is capped at 2 MB
+by the store). Then kills a process mid-way through a stream of saves
+(like a power cut) and checks what survives on reopen.
+
+Run from the ziggy/ directory:
+    python3 benchmarks/bench_memory_store.py [--topics 100000] [--saves 200]
+"""
+import os
+import sys
+import json
+import time
+import random
+import signal
+import argparse
+import tempfile
+import tracemalloc
+import subprocess
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from memory.memory_store import MemoryStore
+
+def make_items(count):
+    return [(f"topic {i} {random.randrange(10**6)}", f"fact number {i}: " + "x" * 60) for i in range(count)]
+
+def bench_json(path, items, saves):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(dict(items), f, ensure_ascii=False, indent=2)
+    tracemalloc.start()
+    started = time.perf_counter()
+    with open(path, "r", encoding="utf-8") as f:
+        store = json.load(f)
+    load_ms = (time.perf_counter() - started) * 1000
+    held_mb = tracemalloc.get_traced_memory()[0] / 1e6
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    for i in range(saves):
+        store[f"new topic {i}"] = "value"
+        with open(path, "w", encoding="utf-8") as f:  # What save_memory() did on every save
+            json.dump(store, f, ensure_ascii=False, indent=2)
+    save_ms = (time.perf_counter() - started) / saves * 1000
+
+    keys = random.sample(list(store), 1000)
+    started = time.perf_counter()
+    for key in keys:
+        store.get(key)
+    get_us = (time.perf_counter() - started) / len(keys) * 1e6
+    return load_ms, save_ms, get_us, held_mb, os.path.getsize(path) / 1e6
+
+def bench_sqlite(path, items, saves):
+    MemoryStore(path).put_many(items)
+    tracemalloc.start()
+    started = time.perf_counter()
+    store = MemoryStore(path)
+    store.count()
+    load_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    for i in range(saves):
+        store.put(f"new topic {i}", "value")
+    save_ms = (time.perf_counter() - started) / saves * 1000
+
+    keys = [topic for topic, _ in random.sample(items, 1000)]
+    started = time.perf_counter()
+    for key in keys:
+        store.get(key)
+    get_us = (time.perf_counter() - started) / len(keys) * 1e6
+    held_mb = tracemalloc.get_traced_memory()[0] / 1e6
+    tracemalloc.stop()
+    store.checkpoint()
+    store.close()
+    return load_ms, save_ms, get_us, held_mb, os.path.getsize(path) / 1e6
+
+WRITER = """
+import sys, json
+sys.path.insert(0, {root!r})
+from memory.memory_store import MemoryStore
+mode, path = sys.argv[1], sys.argv[2]
+data = {{}}
+i = 0
+store = MemoryStore(path) if mode == "sqlite" else None
+print("ready", flush=True)
+while True:
+    i += 1
+    if store:
+        store.put("topic %d" % i, "value %d" % i)
+    else:
+        data["topic %d" % i] = "value %d" % i * 20
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+"""
+
+def crash_test(mode, path):
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    proc = subprocess.Popen([sys.executable, "-c", WRITER.format(root=root), mode, path],
+                            stdout=subprocess.PIPE, text=True)
+    proc.stdout.readline()
+    time.sleep(0.5 + random.random() * 0.2)
+    proc.send_signal(signal.SIGKILL)
+    proc.wait()
+    try:
+        if mode == "sqlite":
+            store = MemoryStore(path)
+            ok = store._db.execute("PRAGMA integrity_check").fetchone()[0]
+            return f"reopened: {store.count()} topics, integrity {ok}"
+        with open(path, "r", encoding="utf-8") as f:
+            return f"reopened: {len(json.load(f))} topics"
+    except Exception as e:
+        return f"LOAD FAILED ({type(e).__name__}: {str(e)[:40]}) -> old load_memory() reset to {{}}"
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--topics", type=int, default=100000)
+    parser.add_argument("--saves", type=int, default=200)
+    args = parser.parse_args()
+    tmp = tempfile.mkdtemp(prefix="ziggy-memory-")
+    items = make_items(args.topics)
+
+    print(f"{args.topics} topics\n")
+    print(f"{'':8} {'load ms':>9} {'save ms':>9} {'get µs':>8} {'heap MB':>8} {'file MB':>8}")
+    for name, bench, filename in (("json", bench_json, "memory.json"), ("sqlite", bench_sqlite, "memory.db")):
+        saves = min(args.saves, 20) if name == "json" else args.saves  # Each JSON save rewrites everything
+        load_ms, save_ms, get_us, held_mb, size_mb = bench(os.path.join(tmp, filename), items, saves)
+        print(f"{name:8} {load_ms:9.1f} {save_ms:9.2f} {get_us:8.1f} {held_mb:8.1f} {size_mb:8.1f}")
+
+    print("\nkill -9 during a stream of saves:")
+    for mode in ("json", "sqlite"):
+        results = [crash_test(mode, os.path.join(tmp, f"crash-{mode}-{i}")) for i in range(5)]
+        failed = sum("FAILED" in r for r in results)
+        print(f"  {mode:7} {failed}/5 runs lost the store; e.g. {results[-1]}")
+
+if __name__ == "__main__":
+    main()
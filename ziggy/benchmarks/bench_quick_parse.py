@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: keyword-automaton rule matcher vs the original sequential quick_parse.
+
+Run from the ziggy/ directory:  python3 benchmarks/bench_quick_parse.py
+"""
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.intent_rules import RULES, RuleMatcher
+
+def legacy_quick_parse(text):
+    text = text.lower()
+
+    if re.search(r"\b(what.*time|current time|שעה)\b", text):
+        return {"intent": "get_time", "params": {}}
+    if re.search(r"\b(what.*date|today's date|תאריך)\b", text):
+        return {"intent": "get_date", "params": {}}
+    if re.search(r"\bweather\b|מזג אוויר", text):
+        return {"intent": "get_weather", "params": {}}
+    if re.search(r"\bjoke\b|בדיחה", text):
+        return {"intent": "tell_joke", "params": {}}
+    if re.search(r"\bfact\b|עובדה", text):
+        return {"intent": "tell_fact", "params": {}}
+    if re.search(r"\brestart\b|אתחל", text):
+        return {"intent": "restart", "params": {}}
+    if re.search(r"\bshutdown\b|כבה", text):
+        return {"intent": "shutdown_system", "params": {}}
+    return None
+
+def sequential_parse(compiled_rules, text):
+    """The same rule table applied one regex at a time, for scaling comparison."""
+    for rule, pattern in compiled_rules:
+        if pattern.search(text):
+            return rule["intent"]
+    return None
+
+UTTERANCES = [
+    "what time is it", "מה השעה", "tell me a joke", "what's the weather",
+    "turn off the living room light", "הדלק את האור בסלון", "add milk to the shopping list",
+    "תוסיף חלב לרשימה", "remind me to call mom at 8pm", "what is the capital of france",
+    "how do i cook rice", "מי ניצח במשחק אתמול",
+]
+
+def bench(fn, number=2000):
+    seconds = timeit.timeit(lambda: [fn(u) for u in UTTERANCES], number=number)
+    return seconds / (number * len(UTTERANCES)) * 1e6
+
+def main():
+    matcher = RuleMatcher(RULES)
+    covered_legacy = sum(1 for u in UTTERANCES if legacy_quick_parse(u))
+    covered_new = sum(1 for u in UTTERANCES if matcher.match(u))
+    print(f"Coverage: legacy {covered_legacy}/{len(UTTERANCES)}, automaton {covered_new}/{len(UTTERANCES)}")
+    print(f"Legacy quick_parse ({7} rules):        {bench(legacy_quick_parse):6.2f} µs/utterance")
+    print(f"Automaton matcher ({len(RULES)} rules):        {bench(matcher.match):6.2f} µs/utterance")
+
+    # Scaling: pad the table with never-matching anchored rules
+    print("\nRules  automaton   sequential (µs/utterance)")
+    for extra in (0, 50, 200):
+        padded = RULES[:-1] + [
+            {"intent": "noop", "keywords": [f"zz{i} "], "pattern": rf"^zz{i} (?P<slot>.+)$"} for i in range(extra)
+        ] + RULES[-1:]
+        compiled = RuleMatcher(padded)
+        sequential = [(rule, re.compile(rule["pattern"])) for rule in padded]
+        print(f"{len(padded):5d}   {bench(compiled.match, 500):8.2f}   {bench(lambda u: sequential_parse(sequential, u), 500):10.2f}")
+
+if __name__ == "__main__":
+    main()
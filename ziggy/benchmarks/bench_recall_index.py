@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Memory recall at tens of thousands of topics.
+
+Fills the recall index with synthetic topics plus a handful of real ones
+("mom's birthday", "wifi password", ...), then asks for the real ones the
+way people do ("my mother's birthday", "אמא יום הולדת", typos) and counts
+how many are answered locally, i.e. without the GPT fallback, and how many
+questions about things never stored wrongly match something (a hit only
+counts when it covers the whole question, as memory_manager.lookup requires). Baselines are
+the old exact lookup and a difflib scan over every topic. Also times the
+initial build, incremental adds and the search itself, with and without
+the NumPy vector layer.
+
+Run from the ziggy/ directory:
+    python3 benchmarks/bench_recall_index.py [--topics 50000] [--queries 2000]
+"""
+import os
+import sys
+import time
+import random
+import difflib
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from memory.recall_index import RecallIndex
+
+REAL = {
+    "mom's birthday": "March 3rd",
+    "wifi password": "hunter2",
+    "where the car is parked": "level 2, spot 14",
+    "dentist phone": "03-5551234",
+    "grandma address": "Herzl 5, Haifa",
+    "dana": "Noa's friend from work",
+    "kids school": "Ramat Aviv elementary",
+    "dog food brand": "Orijen",
+    "office address": "Rothschild 22, Tel Aviv",
+    "garage code": "4512",
+}
+
+# (question, expected topic)
+PROBES = [
+    ("mom's birthday", "mom's birthday"), ("my mother's birthday", "mom's birthday"),
+    ("אמא יום הולדת", "mom's birthday"), ("יום ההולדת של אמא", "mom's birthday"), ("moms bday", "mom's birthday"),
+    ("the wifi password", "wifi password"), ("הסיסמה של הווייפיי", "wifi password"), ("wi-fi passcode", "wifi password"),
+    ("where is my car", "where the car is parked"), ("איפה האוטו", "where the car is parked"),
+    ("dentist phone number", "dentist phone"), ("מספר הטלפון של רופא השיניים", "dentist phone"),
+    ("grandmother's address", "grandma address"), ("הכתובת של סבתא", "grandma address"),
+    ("danna", "dana"), ("the kids' school", "kids school"), ("בית הספר של הילדים", "kids school"),
+    ("dog food", "dog food brand"), ("איזה אוכל לכלב", "dog food brand"),
+]
+
+# Not stored: these must still go to GPT
+UNKNOWN = ["who is the prime minister", "capital of france", "מה שלום אבא", "how tall is everest",
+           "dad's phone", "מתי יום ההולדת של אבא", "bank pin", "home address", "alarm code", "my birthday"]
+
+WORDS = ("alpha bravo garden meeting recipe project invoice plumber landlord gym locker bank branch "
+         "insurance policy train schedule flight number hotel booking vet clinic gate code alarm "
+         "neighbor uncle cousin teacher coach recipe pasta soup salad paint color size shoe shirt "
+         "router model serial warranty receipt budget rent lease bike lock boiler filter tv account").split()
+
+def vocabulary(size):
+    syllables = [c + v for c in "bdfgklmnprstvz" for v in "aeiou"]
+    words = set(WORDS)
+    while len(words) < size:
+        words.add("".join(random.sample(syllables, random.choice((2, 3)))))
+    return list(words)
+
+def synthetic(count, words):
+    weights = [1 / rank for rank in range(1, len(words) + 1)]  # Zipf-like: a few words are very common
+    topics = set()
+    while len(topics) < count:
+        topics.add(" ".join(random.choices(words, weights, k=random.choice((2, 3, 4)))))
+    return [(topic, f"note about {topic}") for topic in topics]
+
+def typo(topic):
+    """A stored topic as it might be asked: sometimes with a dropped letter."""
+    if random.random() < 0.5:
+        i = random.randrange(len(topic))
+        topic = topic[:i] + topic[i + 1:]
+    return topic
+
+def pct(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] * 1e6
+
+def bench(name, vectors, items, queries, min_score):
+    tracemalloc.start()
+    held = RecallIndex(vectors=vectors)
+    held.add_many(items)
+    held_mb = tracemalloc.get_traced_memory()[0] / 1e6
+    tracemalloc.stop()
+    del held
+    index = RecallIndex(vectors=vectors)
+    started = time.perf_counter()
+    index.add_many(items)
+    build_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for i in range(500):
+        index.add(f"new topic {i}", "added after start")
+    add_us = (time.perf_counter() - started) / 500 * 1e6
+
+    def answer(question):
+        hits = [hit for hit in index.search(question, k=3, min_score=min_score) if hit["covered"]]
+        return hits[0]["topic"] if hits else None
+
+    found = sum(answer(question) == expected for question, expected in PROBES)
+    wrong = sum(answer(question) is not None for question in UNKNOWN)
+
+    times = []
+    for question in queries:
+        started = time.perf_counter()
+        index.search(question, k=5, min_score=min_score)
+        times.append(time.perf_counter() - started)
+    print(f"{name:14} {build_s:8.2f} {held_mb:8.0f} {add_us:8.0f} {pct(times, 0.5):9.0f} {pct(times, 0.99):9.0f} "
+          f"{found:>5}/{len(PROBES)} {wrong:>5}/{len(UNKNOWN)}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--topics", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--min-score", type=float, default=0.3)
+    args = parser.parse_args()
+    random.seed(1)
+    words = vocabulary(3000)
+    items = synthetic(args.topics, words) + list(REAL.items())
+    store = dict(items)
+    queries = [question for question, _ in PROBES] + [
+        typo(random.choice(items)[0]) for _ in range(max(0, args.queries - len(PROBES)))
+    ]
+
+    print(f"{len(items)} topics, {len(queries)} questions; local = answered without the GPT fallback\n")
+    exact = sum(store.get(question.lower()) is not None and question.lower() == expected
+                for question, expected in PROBES)
+    topics = list(store)
+    started = time.perf_counter()
+    scanned = sum(difflib.get_close_matches(question.lower(), topics, n=1, cutoff=0.6) == [expected]
+                  for question, expected in PROBES[:5])
+    scan_ms = (time.perf_counter() - started) / 5 * 1000
+    print(f"exact dict.get: {exact}/{len(PROBES)} local")
+    print(f"difflib scan:   {scanned}/5 local, {scan_ms:.0f} ms per question\n")
+
+    print(f"{'':14} {'build s':>8} {'heap MB':>8} {'add µs':>8} {'p50 µs':>9} {'p99 µs':>9} {'local':>11} {'false hits':>11}")
+    bench("tokens+trigram", False, items, queries, args.min_score)
+    bench("+vectors", True, items, queries, args.min_score)
+
+if __name__ == "__main__":
+    main()
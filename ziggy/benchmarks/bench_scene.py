@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Scene latency: N lights switched one command at a time vs one run_scene burst.
+
+Runs MqttDeviceController against the in-process fake MQTT broker, with
+simulated lights that report their new state after a fixed delay. "serial"
+is what N separate control_device intents amount to: publish, wait for the
+light to confirm, next. "scene" publishes everything at once and tracks
+PUBACKs and state reports against a single deadline.
+
+Run from the ziggy/ directory:
+    python3 benchmarks/bench_scene.py [--lights 15] [--device-delay 0.05] [--offline 1]
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from smart_home.device_controller import MqttDeviceController
+from smart_home.fake_mqtt_broker import FakeMqttBroker
+
+def make_setup(lights, device_delay, offline):
+    broker = FakeMqttBroker()
+    host, port = broker.start()
+    devices = {}
+    for i in range(lights):
+        name = f"light_{i}"
+        devices[name] = {"component": "light", "command_topic": f"home/{name}/set", "state_topic": f"home/{name}/state"}
+        # The last `offline` lights accept commands but never report back
+        broker.simulate_device(f"home/{name}/set", f"home/{name}/state", delay=device_delay,
+                               silent=i >= lights - offline)
+    scenes = {"all_off": {"qos": 1, "timeout": 2.0,
+                          "actions": [{"device": name, "action": "off"} for name in devices]}}
+    controller = MqttDeviceController(host, port, devices_config=devices, scenes=scenes)
+    controller.connect()
+    deadline = time.time() + 5
+    while not controller.client.is_connected() and time.time() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.2)  # SUBACKs
+    return broker, controller
+
+def wait_for_state(controller, device, expected, since, timeout):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        snapshot = controller.get_state(device)
+        if snapshot and snapshot["updated_at"] and snapshot["updated_at"] >= since \
+                and snapshot["values"].get("state") == expected:
+            return True
+        time.sleep(0.001)
+    return False
+
+def run_serial(controller, devices, timeout):
+    started = time.time()
+    latencies, failed = [], 0
+    for device in devices:
+        sent = time.time()
+        controller.control_device(device, "off")
+        if wait_for_state(controller, device, "off", sent, timeout):
+            latencies.append(time.time() - started)
+        else:
+            failed += 1
+    return time.time() - started, latencies, failed
+
+def run_scene(controller):
+    started = time.time()
+    results = controller.run_scene("all_off")
+    latencies = [r["latency_ms"] / 1000 for r in results.values() if r["ok"]]
+    return time.time() - started, latencies, sum(1 for r in results.values() if not r["ok"])
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lights", type=int, default=15)
+    parser.add_argument("--device-delay", type=float, default=0.05, help="seconds before a light reports its state")
+    parser.add_argument("--offline", type=int, default=0, help="lights that never confirm")
+    args = parser.parse_args()
+
+    print(f"{args.lights} lights, {args.device_delay * 1000:.0f} ms device delay, {args.offline} offline\n")
+    print(f"{'mode':8} {'total ms':>9} {'p50 ms':>8} {'max ms':>8} {'failed':>7}")
+    for mode in ("serial", "scene"):
+        broker, controller = make_setup(args.lights, args.device_delay, args.offline)
+        # Start from "on" so every light really changes state
+        for name in controller.devices_config:
+            broker.publish(f"home/{name}/state", "ON", retain=True)
+        time.sleep(0.2)
+        if mode == "serial":
+            total, latencies, failed = run_serial(controller, list(controller.devices_config), 2.0)
+        else:
+            total, latencies, failed = run_scene(controller)
+        p50 = statistics.median(latencies) * 1000 if latencies else float("nan")
+        worst = max(latencies) * 1000 if latencies else float("nan")
+        print(f"{mode:8} {total * 1000:9.0f} {p50:8.1f} {worst:8.1f} {failed:7d}")
+        controller.disconnect()
+        broker.stop()
+
+if __name__ == "__main__":
+    main()
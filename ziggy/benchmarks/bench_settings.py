@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: the cached settings service vs re-parsing settings.yaml.
+
+Times a full YAML parse (what intent_parser and telegram_bot each did on
+their own), building a validated snapshot, and a key read through the
+shared `settings` object. It then edits a copy of settings.yaml under a
+watching SettingsService and measures how long each change takes to reach
+a subscriber: a mic_index change, a new device, and a broken file (which
+must be rejected while the old snapshot stays live).
+
+Run from the ziggy/ directory:  python3 benchmarks/bench_settings.py [--interval 0.2]
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from config.settings import settings, load_settings, validate, SettingsSnapshot, SettingsService, SETTINGS_PATH
+
+def per_call_us(func, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--interval", type=float, default=0.2, help="watch poll interval (s)")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    data = load_settings()
+    print(f"{'parse settings.yaml':28} {per_call_us(load_settings, args.repeat):10.1f} µs")
+    print(f"{'validate + snapshot':28} {per_call_us(lambda: (validate(data), SettingsSnapshot(data)), args.repeat):10.1f} µs")
+    print(f"{'settings read':28} {per_call_us(lambda: settings['voice']['mic_index'], args.repeat * 1000):10.3f} µs")
+
+    workdir = tempfile.mkdtemp()
+    path = os.path.join(workdir, "settings.yaml")
+    shutil.copy(SETTINGS_PATH, path)
+    original = open(path).read()
+    service = SettingsService(path)
+    applied = threading.Event()
+    service.subscribe(lambda old, new, changed: applied.set())
+    service.watch(args.interval)
+
+    new_device = ("devices:\n  hall_light:\n    component: light\n"
+                  "    command_topic: \"homeassistant/light/hall_light/set\"\n")
+    edits = [
+        ("mic_index change", original.replace("mic_index: 0", "mic_index: 3"), True),
+        ("new device", original.replace("devices:\n", new_device, 1), True),
+        ("broken file", original.replace("mic_index: 0", "mic_index: [0"), False),
+    ]
+
+    print(f"\nhot reload (poll every {args.interval:g}s)")
+    for label, text, expect_applied in edits:
+        applied.clear()
+        time.sleep(0.05)  # Distinct mtime from the previous write
+        started = time.perf_counter()
+        with open(path, "w") as f:
+            f.write(text)
+        ok = applied.wait(args.interval * 3 + 1)
+        elapsed = (time.perf_counter() - started) * 1000
+        verdict = "applied" if ok else "kept previous snapshot"
+        mark = "✅" if ok == expect_applied else "❌"
+        print(f"  {mark} {label:18} {verdict:24} {elapsed if ok else 0:7.0f} ms  (version {service.snapshot().version})")
+    service.stop()
+    shutil.rmtree(workdir)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Throughput / latency benchmark for Telegram message handling, end to end
+through python-telegram-bot against a local fake Bot API server.
+
+Several chats send a mix of fast commands (answered by the rule parser) and
+slow ones (routed to GPT, served by the fake LLM server with a fixed delay).
+Compares the old inline handler, which awaited the whole command inside the
+update handler, with the per-chat dispatcher.
+
+Run from the ziggy/ directory:
+    python3 benchmarks/bench_telegram.py [--chats 4] [--messages 6] [--gpt-delay 1.0]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from telegram.ext import ApplicationBuilder, MessageHandler, filters
+
+from core.llm import LLMService, set_llm
+from core.fake_llm_server import start_fake_server
+from core.intent_registry import registry
+from integrations import telegram_bot
+from integrations.fake_telegram_server import FakeTelegramServer
+
+TOKEN = "123456:BENCHMARK"
+FAST = "what time is it"
+SLOW = "please summarize the meaning of life, take {}"  # No rule or classifier match: goes to GPT
+
+async def legacy_handle_message(update, context):
+    # The pre-dispatcher behaviour: the command runs inside the update handler
+    text = update.message.text.strip()
+    reply = registry.handle_text(text, "en", source="telegram")
+    await update.message.reply_text(reply.text)
+
+def build(mode, base_url):
+    if mode == "dispatcher":
+        return telegram_bot.build_application(token=TOKEN, base_url=base_url)
+    app = ApplicationBuilder().token(TOKEN).base_url(base_url).build()
+    app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, legacy_handle_message))
+    return app
+
+async def run(mode, chats, messages):
+    server = FakeTelegramServer()
+    base_url = server.start()
+    app = build(mode, base_url)
+    await app.initialize()
+    await app.start()
+    await app.updater.start_polling(poll_interval=0.0, timeout=5)
+
+    loop = asyncio.get_running_loop()
+    start = time.time()
+    kinds = {}
+    for i in range(messages):
+        for chat in range(1, chats + 1):
+            slow = (i + chat) % 3 == 0
+            # Distinct slow texts, so the LLM service cannot coalesce them into one call
+            text = SLOW.format(f"{chat}.{i}") if slow else FAST
+            update = server.push_message(-chat, text)  # Group chats, so replies quote their message
+            kinds[update["message"]["message_id"]] = "slow" if slow else "fast"
+        await asyncio.sleep(0.05)
+    await loop.run_in_executor(None, server.wait_for_replies, chats * messages, 120)
+    elapsed = time.time() - start
+
+    await app.updater.stop()
+    await app.stop()
+    await app.shutdown()
+    server.stop()
+
+    latency = {"fast": [], "slow": []}
+    busy = 0
+    for reply in server.replies:
+        if reply["text"].startswith("⏳"):
+            busy += 1
+            continue
+        message_id = reply["reply_to"]
+        if message_id in kinds:
+            latency[kinds[message_id]].append(reply["at"] - server.sent_at[message_id])
+    return elapsed, latency, busy, server.chat_actions
+
+def pct(values, q):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] * 1000
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chats", type=int, default=4)
+    parser.add_argument("--messages", type=int, default=6, help="per chat")
+    parser.add_argument("--gpt-delay", type=float, default=1.0)
+    args = parser.parse_args()
+
+    set_llm(LLMService("fake", base_url=start_fake_server(delay=args.gpt_delay), hedge_after=60))
+    registry.load()
+
+    total = args.chats * args.messages
+    print(f"{args.chats} chats x {args.messages} messages, GPT delay {args.gpt_delay:.1f}s\n")
+    for mode in ("legacy", "dispatcher"):
+        elapsed, latency, busy, typing = asyncio.run(run(mode, args.chats, args.messages))
+        print(f"[{mode}]")
+        print(f"  wall time:        {elapsed:.2f}s ({total / elapsed:.1f} msg/s)")
+        print(f"  fast p50 / p95:   {pct(latency['fast'], 0.5):.0f} / {pct(latency['fast'], 0.95):.0f} ms")
+        print(f"  slow p50 / p95:   {pct(latency['slow'], 0.5):.0f} / {pct(latency['slow'], 0.95):.0f} ms")
+        print(f"  busy replies:     {busy}")
+        print(f"  typing actions:   {typing}\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Message-to-reply latency and idle request count: Telegram webhook vs polling.
+
+Replays text updates through a local stand-in for the Bot API (which POSTs
+to the webhook once one is set, like Telegram) and measures the time from a
+message being "sent" to Ziggy's reply arriving, then counts the requests the
+bot makes while nothing happens.
+
+Run from the ziggy/ directory:
+    python3 benchmarks/bench_telegram_webhook.py [--messages 30] [--gap 0.2] [--idle 5]
+"""
+import os
+import sys
+import asyncio
+import argparse
+import urllib.request
+import urllib.error
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.intent_registry import registry
+from integrations import telegram_bot
+from integrations.telegram_webhook import WebhookReceiver
+from integrations.fake_telegram_server import FakeTelegramServer
+
+TOKEN = "123456:BENCHMARK"
+TEXT = "what time is it"  # Answered by the rule parser, so only delivery is measured
+
+async def start_mode(mode, app):
+    if mode == "webhook":
+        receiver = WebhookReceiver(app, listen="127.0.0.1", port=0)
+        await receiver.start()
+        await app.bot.set_webhook(url=f"http://127.0.0.1:{receiver.port}{receiver.path}",
+                                  secret_token=receiver.secret_token)
+        return receiver
+    if mode == "short polling":
+        await app.updater.start_polling(poll_interval=1.0, timeout=0)
+    else:
+        await app.updater.start_polling(poll_interval=0.0, timeout=10)
+    return None
+
+def check_secret(receiver):
+    request = urllib.request.Request(f"http://127.0.0.1:{receiver.port}{receiver.path}", data=b"{}", method="POST")
+    try:
+        urllib.request.urlopen(request, timeout=5)
+        return "accepted (!)"
+    except urllib.error.HTTPError as e:
+        return f"rejected with {e.code}"
+
+async def run(mode, messages, gap, idle):
+    server = FakeTelegramServer()
+    app = telegram_bot.build_application(token=TOKEN, base_url=server.start())
+    await app.initialize()
+    await app.start()
+    receiver = await start_mode(mode, app)
+    await asyncio.sleep(0.5)
+
+    loop = asyncio.get_running_loop()
+    for i in range(messages):
+        server.push_message(-(i % 3 + 1), TEXT)
+        await asyncio.sleep(gap)
+    await loop.run_in_executor(None, server.wait_for_replies, messages, 60)
+    latencies = sorted(r["at"] - server.sent_at[r["reply_to"]] for r in server.replies if r["reply_to"])
+
+    before = dict(server.calls)
+    await asyncio.sleep(idle)
+    idle_requests = sum(server.calls.values()) - sum(before.values())
+    # The receiver runs on this loop, so the blocking probe goes to a thread
+    secret = await loop.run_in_executor(None, check_secret, receiver) if receiver else None
+
+    if receiver:
+        await receiver.stop()
+    if app.updater.running:
+        await app.updater.stop()
+    await app.stop()
+    await app.shutdown()
+    server.stop()
+    return latencies, idle_requests, secret
+
+def pct(values, q):
+    return values[min(len(values) - 1, int(q * len(values)))] * 1000 if values else float("nan")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=30)
+    parser.add_argument("--gap", type=float, default=0.2, help="seconds between messages")
+    parser.add_argument("--idle", type=float, default=5.0, help="idle seconds to count background requests")
+    args = parser.parse_args()
+    registry.load()
+
+    print(f"{args.messages} messages, {args.gap:.2f}s apart; idle window {args.idle:.0f}s\n")
+    print(f"{'mode':15} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'idle reqs':>10}")
+    for mode in ("short polling", "long polling", "webhook"):
+        latencies, idle_requests, secret = asyncio.run(run(mode, args.messages, args.gap, args.idle))
+        print(f"{mode:15} {pct(latencies, 0.5):8.1f} {pct(latencies, 0.95):8.1f} "
+              f"{(latencies[-1] * 1000 if latencies else float('nan')):8.1f} {idle_requests:10d}")
+        if secret:
+            print(f"{'':15} request without secret token: {secret}")
+
+if __name__ == "__main__":
+    main()
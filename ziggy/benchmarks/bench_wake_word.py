@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Offline false-accept / false-reject and CPU benchmark for the local wake-word engine.
+
+Fixtures are 16-bit PCM WAV recordings laid out as:
+    <fixtures>/positive/*.wav   windows that contain "hey ziggy" / "היי זיגי"
+    <fixtures>/negative/*.wav   speech, TV, kitchen noise, silence...
+
+Run from the ziggy/ directory:
+    python3 benchmarks/bench_wake_word.py <fixtures_dir> [--templates voice/wake_templates] [--threshold 0.35]
+
+NumPy is pinned to one thread so the CPU figure reflects a single Pi core.
+"""
+import os
+
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+os.environ.setdefault("OPENBLAS_NUM_THREADS", "1")
+
+import sys
+import glob
+import time
+import argparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from voice.wake_word import WakeWordEngine, TEMPLATES_DIR, SAMPLE_RATE, read_wav
+
+def run(engine, paths):
+    results = []
+    for path in paths:
+        pcm = read_wav(path)
+        start = time.process_time()
+        match = engine.detect(pcm)
+        cpu = time.process_time() - start
+        results.append((path, match, cpu, len(pcm) / 2 / SAMPLE_RATE))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("fixtures")
+    parser.add_argument("--templates", default=TEMPLATES_DIR)
+    parser.add_argument("--threshold", type=float, default=0.35)
+    args = parser.parse_args()
+
+    engine = WakeWordEngine(templates_dir=args.templates, threshold=args.threshold)
+    if not engine.ready:
+        sys.exit(f"No templates found under {args.templates}/<lang>/*.wav")
+
+    positives = sorted(glob.glob(os.path.join(args.fixtures, "positive", "*.wav")))
+    negatives = sorted(glob.glob(os.path.join(args.fixtures, "negative", "*.wav")))
+    if not positives and not negatives:
+        sys.exit(f"No fixtures found under {args.fixtures}/positive and {args.fixtures}/negative")
+
+    pos = run(engine, positives)
+    neg = run(engine, negatives)
+    for path, match, _, _ in pos:
+        if not match:
+            print(f"  false reject: {os.path.basename(path)}")
+    for path, match, _, _ in neg:
+        if match:
+            print(f"  false accept: {os.path.basename(path)} ({match[0]}, {match[1]:.3f})")
+
+    false_rejects = sum(1 for _, match, _, _ in pos if not match)
+    false_accepts = sum(1 for _, match, _, _ in neg if match)
+    cpu = sum(r[2] for r in pos + neg)
+    audio = sum(r[3] for r in pos + neg)
+    print(f"Templates:           {len(engine.templates)} (threshold {engine.threshold})")
+    if pos:
+        print(f"False-reject rate:   {false_rejects}/{len(pos)} ({false_rejects / len(pos):.1%})")
+    if neg:
+        print(f"False-accept rate:   {false_accepts}/{len(neg)} ({false_accepts / len(neg):.1%})")
+    print(f"CPU per window:      {cpu / len(pos + neg) * 1000:.1f} ms")
+    print(f"Real-time factor:    {cpu / audio:.4f} (single core)")
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,240 @@
-import yaml
 import os
+import time
+import threading
+from types import MappingProxyType
+from collections.abc import Mapping
+
+import yaml
+
+from smart_home.device_state import device_key
+
+# One settings service for the whole process. settings.yaml is parsed once
+# into an immutable, validated snapshot (nested dicts become read-only
+# mappings, lists become tuples) with derived lookups precomputed. `settings`
+# always reads the current snapshot, so `from config.settings import settings`
+# keeps working after a reload. watch() polls the file's mtime; a changed file
+# is parsed and validated off to the side and swapped in atomically, then
+# subscribers are told which top-level sections changed. A file that fails to
+# parse or validate is reported and the running snapshot is kept.
+
+SETTINGS_PATH = os.path.join(os.path.dirname(__file__), "settings.yaml")
+
+class SettingsError(ValueError):
+    pass
+
+def load_settings(path=SETTINGS_PATH):
+    """Parse settings.yaml into plain dicts (no validation, no caching)."""
+    with open(path, "r") as f:
+        return yaml.safe_load(f) or {}
+
+def freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+# ── Validation ───────────────────────────────────────────────────
+NUMBER = (int, float)
+
+# (section, key) -> allowed types, checked when present; None values are allowed
+SCHEMA = {
+    ("openai", "api_key"): str,
+    ("voice", "mic_index"): int,
+    ("voice", "wake_threshold"): NUMBER,
+    ("voice", "recognition_mode"): str,
+    ("voice", "continuous_capture"): bool,
+    ("voice", "tts_cache_mb"): NUMBER,
+    ("voice", "audio_sink"): list,
+    ("telegram", "enabled"): bool,
+    ("telegram", "allowed_users"): list,
+    ("telegram", "max_pending_per_chat"): int,
+    ("telegram", "max_concurrent"): int,
+    ("telegram", "webhook"): dict,
+    ("mqtt", "broker_address"): str,
+    ("mqtt", "broker_port"): int,
+    ("llm", "timeout"): NUMBER,
+    ("llm", "hedge_after"): NUMBER,
+    ("llm", "max_attempts"): int,
+    ("scheduler", "telegram_chat_ids"): list,
+    ("scheduler", "timezone"): str,
+    ("intent_classifier", "threshold"): NUMBER,
+    ("intent_classifier", "margin"): NUMBER,
+}
+REQUIRED = [("openai", "api_key"), ("voice", "mic_index"), ("telegram", "bot_token")]
+# Top-level sections that must be mappings when present
+MAPPING_SECTIONS = {section for section, _ in list(SCHEMA) + REQUIRED} | {
+    "devices", "scenes", "memory", "conversation", "paths", "features", "intent_cache"}
+
+def _type_name(types):
+    types = types if isinstance(types, tuple) else (types,)
+    return " or ".join(t.__name__ for t in types)
+
+def validate(data):
+    """List of problems with a parsed settings dict (empty when valid)."""
+    if not isinstance(data, dict):
+        return ["settings.yaml must be a mapping of sections"]
+    errors = [f"{section}: expected a mapping" for section, value in data.items()
+              if section in MAPPING_SECTIONS and value is not None and not isinstance(value, dict)]
+    for section, key in REQUIRED:
+        if not isinstance(data.get(section), dict) or key not in data[section]:
+            errors.append(f"{section}.{key} is required")
+    for (section, key), types in SCHEMA.items():
+        value = (data.get(section) or {}).get(key) if isinstance(data.get(section), dict) else None
+        # bool is an int subclass: only accept it where bool is asked for
+        if value is not None and (not isinstance(value, types) or
+                                  (isinstance(value, bool) and types is not bool)):
+            errors.append(f"{section}.{key}: expected {_type_name(types)}, got {value!r}")
+
+    devices = data.get("devices") or {}
+    for name, info in devices.items() if isinstance(devices, dict) else ():
+        if not isinstance(info, dict):
+            errors.append(f"devices.{name}: expected a mapping")
+            continue
+        for key in ("command_topic", "state_topic", "component", "room"):
+            if info.get(key) is not None and not isinstance(info[key], str):
+                errors.append(f"devices.{name}.{key}: expected str")
+        if info.get("aliases") is not None and not isinstance(info["aliases"], list):
+            errors.append(f"devices.{name}.aliases: expected a list")
+
+    scenes = data.get("scenes") or {}
+    for name, scene in scenes.items() if isinstance(scenes, dict) else ():
+        actions = scene.get("actions") if isinstance(scene, dict) else None
+        if not isinstance(actions, list):
+            errors.append(f"scenes.{name}.actions: expected a list")
+            continue
+        for i, step in enumerate(actions):
+            if not isinstance(step, dict) or "device" not in step:
+                errors.append(f"scenes.{name}.actions[{i}]: needs a device")
+            # Looked up the way run_scene does: "Living Room Light" -> living_room_light
+            elif isinstance(devices, dict) and device_key(step["device"]) not in devices:
+                errors.append(f"scenes.{name}.actions[{i}]: unknown device {step['device']!r}")
+    return errors
+
+# ── Snapshot ─────────────────────────────────────────────────────
+class SettingsSnapshot(Mapping):
+    """Read-only view of one version of settings.yaml, plus lookups derived from it."""
+
+    def __init__(self, data, version=1, mtime=None):
+        self._data = freeze(data)
+        self.version = version
+        self.mtime = mtime
+        empty = MappingProxyType({})
+        self.devices = self._data.get("devices") or empty
+        self.scenes = self._data.get("scenes") or empty
+        # What MqttDeviceController subscribes to; diffed against the old set on reload
+        self.state_topics = frozenset(info["state_topic"] for info in self.devices.values()
+                                      if info.get("state_topic"))
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def section(self, name):
+        """A top-level section, or an empty mapping when it is missing."""
+        return self._data.get(name) or MappingProxyType({})
+
+    def changed_sections(self, other):
+        """Top-level sections that differ between this snapshot and other (None counts as empty)."""
+        if other is None:
+            return set(self)
+        return {key for key in set(self) | set(other) if self.get(key) != other.get(key)}
+
+# ── Service ──────────────────────────────────────────────────────
+class SettingsService(Mapping):
+    """The current SettingsSnapshot, reloadable; reads always go to the latest one."""
+
+    def __init__(self, path=SETTINGS_PATH):
+        self.path = path
+        self._lock = threading.Lock()  # Serializes reloads; readers never take it
+        self._subscribers = []         # (callback, sections or None)
+        self._watcher = None
+        self._stop = threading.Event()
+        self._stamp = self._file_stamp()
+        data = load_settings(path)
+        errors = validate(data)
+        if errors:
+            raise SettingsError(f"{path}: " + "; ".join(errors))
+        self._snapshot = SettingsSnapshot(data, mtime=self._stamp and self._stamp[0])
+
+    def snapshot(self):
+        """The current snapshot; hold on to it to read several keys consistently."""
+        return self._snapshot
+
+    def __getitem__(self, key):
+        return self._snapshot[key]
+
+    def __iter__(self):
+        return iter(self._snapshot)
+
+    def __len__(self):
+        return len(self._snapshot)
+
+    def subscribe(self, callback, sections=None):
+        """Call callback(old, new, changed) after a reload that changes any of sections (all if None)."""
+        self._subscribers.append((callback, set(sections) if sections else None))
+
+    def reload(self):
+        """Re-read the file; returns the set of changed sections (empty if unchanged or rejected)."""
+        with self._lock:
+            stamp = self._file_stamp()
+            try:
+                data = load_settings(self.path)
+            except (OSError, yaml.YAMLError) as e:
+                print(f"[SETTINGS] Reload failed, keeping version {self._snapshot.version}: {e}")
+                return set()
+            finally:
+                self._stamp = stamp  # Don't retry the same broken file until it changes again
+            errors = validate(data)
+            if errors:
+                print(f"[SETTINGS] {os.path.basename(self.path)} rejected, keeping version {self._snapshot.version}: "
+                      + "; ".join(errors))
+                return set()
+            old = self._snapshot
+            new = SettingsSnapshot(data, version=old.version + 1, mtime=stamp and stamp[0])
+            changed = new.changed_sections(old)
+            if not changed:
+                return set()
+            self._snapshot = new
+        print(f"[SETTINGS] Reloaded (version {new.version}): {', '.join(sorted(changed))} changed")
+        for callback, sections in list(self._subscribers):
+            if sections is None or sections & changed:
+                try:
+                    callback(old, new, changed)
+                except Exception as e:
+                    print(f"[SETTINGS] Subscriber {getattr(callback, '__name__', callback)} failed: {e}")
+        return changed
+
+    # ── File watching ────────────────────────────────────────────
+    def watch(self, interval=2.0):
+        """Poll the file's mtime/size from a daemon thread and reload when it changes."""
+        if self._watcher:
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, args=(interval,), name="settings-watch", daemon=True)
+        self._watcher.start()
+
+    def stop(self):
+        self._stop.set()
+        self._watcher = None
+
+    def _watch(self, interval):
+        while not self._stop.wait(interval):
+            stamp = self._file_stamp()
+            if stamp and stamp != self._stamp:
+                time.sleep(0.2)  # Let an editor finish writing before parsing
+                self.reload()
 
-def load_settings():
-    config_path = os.path.join(os.path.dirname(__file__), "settings.yaml")
-    with open(config_path, "r") as f:
-        return yaml.safe_load(f)
+    def _file_stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
 
-settings = load_settings()
+settings = SettingsService()
@@ -0,0 +1,182 @@
+import os
+import sys
+import time
+import threading
+from contextlib import contextmanager
+
+# Boot timing for `ziggy_main.py --profile-boot`: named stages (nestable,
+# from any thread) and, inside them, every module import with its own and
+# cumulative time, printed as one tree once Ziggy is ready. When profiling
+# is off, stage() is a plain timer and no import hook is installed.
+
+class _Node:
+    __slots__ = ("name", "kind", "start", "elapsed", "children")
+
+    def __init__(self, name, kind):
+        self.name = name
+        self.kind = kind
+        self.start = time.perf_counter()
+        self.elapsed = None
+        self.children = []
+
+class _ImportTimer:
+    """Meta path finder that times each module's execution inside the current stage."""
+
+    def __init__(self, profiler):
+        self.profiler = profiler
+
+    def find_spec(self, name, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimedLoader(spec.loader, self.profiler)
+                return spec
+        return None
+
+class _TimedLoader:
+    def __init__(self, loader, profiler):
+        self._loader = loader
+        self._profiler = profiler
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        try:
+            with self._profiler._node(module.__name__, "import"):
+                self._loader.exec_module(module)
+        finally:
+            # Hand the module its real loader back (some code inspects its type)
+            module.__loader__ = self._loader
+            if getattr(module, "__spec__", None) is not None:
+                module.__spec__.loader = self._loader
+
+class BootProfiler:
+    def __init__(self):
+        self.enabled = False
+        self.started = time.perf_counter()
+        self.root = _Node("boot", "stage")
+        self.marks = []          # (label, seconds since start)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._hook = None
+        self._pending = 0
+        self._idle = threading.Condition()
+
+    def enable(self):
+        """Start recording imports; call before the heavy imports happen."""
+        if not self.enabled:
+            self.enabled = True
+            self._hook = _ImportTimer(self)
+            sys.meta_path.insert(0, self._hook)
+
+    def disable(self):
+        if self._hook in sys.meta_path:
+            sys.meta_path.remove(self._hook)
+        self.enabled = False
+
+    @contextmanager
+    def stage(self, name):
+        if not self.enabled:
+            yield
+            return
+        with self._node(name, "stage"):
+            yield
+
+    def mark(self, label):
+        """Record a milestone (e.g. "ready spoken") relative to the start of boot."""
+        self.marks.append((label, time.perf_counter() - self.started))
+
+    def track(self, name, func):
+        """Wrap a boot job (e.g. a runtime warm-up) so it is timed as a stage and awaited by report_when_idle()."""
+        if not self.enabled:
+            return func
+        with self._idle:
+            self._pending += 1
+
+        def run():
+            try:
+                with self.stage(name):
+                    return func()
+            finally:
+                with self._idle:
+                    self._pending -= 1
+                    self._idle.notify_all()
+        return run
+
+    def report_when_idle(self, timeout=120):
+        """Print the report from a daemon thread once every tracked job has finished."""
+        if not self.enabled:
+            return
+
+        def wait_and_report():
+            with self._idle:
+                self._idle.wait_for(lambda: self._pending == 0, timeout)
+            self.mark("boot jobs finished")
+            self.report()
+            self.disable()
+        threading.Thread(target=wait_and_report, name="boot-profiler", daemon=True).start()
+
+    @contextmanager
+    def _node(self, name, kind):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        node = _Node(name, kind)
+        parent = stack[-1] if stack else self.root
+        if not stack and threading.current_thread() is not threading.main_thread():
+            node.name = f"{name} [{threading.current_thread().name}]"
+        with self._lock:
+            parent.children.append(node)
+        stack.append(node)
+        try:
+            yield node
+        finally:
+            stack.pop()
+            node.elapsed = time.perf_counter() - node.start
+
+    # ── Report ───────────────────────────────────────────────────
+    def report(self, min_ms=5.0):
+        """Print the stage/import tree; imports under min_ms are folded into their parent."""
+        lines = ["[BOOT] Boot profile (ms: total / self)"]
+        uptime = process_age()
+        if uptime is not None:
+            lines.append(f"  process started {(uptime - (time.perf_counter() - self.started)) * 1000:.0f} ms "
+                         f"before profiling began (interpreter + site imports)")
+        with self._lock:
+            for child in self.root.children:
+                self._format(child, 1, min_ms, lines)
+        for label, at in self.marks:
+            lines.append(f"  ⏱  {label}: {at * 1000:.0f} ms")
+        print("\n".join(lines))
+
+    def _format(self, node, depth, min_ms, lines):
+        elapsed = node.elapsed if node.elapsed is not None else time.perf_counter() - node.start
+        if node.kind == "import" and elapsed * 1000 < min_ms:
+            return
+        own = elapsed - sum((c.elapsed or 0) for c in node.children)
+        label = node.name if node.kind == "stage" else f"import {node.name}"
+        running = "" if node.elapsed is not None else " (still running)"
+        lines.append(f"{'  ' * depth}{label:<{max(10, 52 - 2 * depth)}} {elapsed * 1000:8.1f} / {own * 1000:7.1f}"
+                     f"{running}")
+        for child in node.children:
+            self._format(child, depth + 1, min_ms, lines)
+
+def process_age():
+    """Seconds since this process started (Linux /proc), or None."""
+    try:
+        with open("/proc/self/stat") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+    except Exception:
+        return None
+
+profiler = BootProfiler()
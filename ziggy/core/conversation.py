@@ -0,0 +1,212 @@
+import re
+import time
+import threading
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:  # Not installed, or no cached encoding offline
+    _encoding = None
+
+# Per-user chat history for GPT, bounded by tokens rather than messages.
+# Each user (the voice speaker, each Telegram chat) gets a sliding window of
+# recent turns; turns that fall out of the window are folded into a rolling
+# summary (one cheap GPT call per chunk, off the reply path, cached until the
+# next chunk), and memory facts relevant to the new prompt are looked up on
+# demand. build_messages() keeps system prompt + summary + facts + window +
+# prompt under max_prompt_tokens however long the session runs, so every
+# turn costs about the same.
+
+_PIECE_RE = re.compile(r"[A-Za-z]{1,4}|\d{1,3}|[֐-׿]{1,2}|[^\sA-Za-z\d֐-׿]")
+_MESSAGE_OVERHEAD = 4  # Role and separators per chat message
+
+SYSTEM_PROMPT = "You are Ziggy, a friendly home assistant. Answer briefly; replies are often spoken aloud."
+SUMMARY_PROMPT = ("Update the summary of this conversation with the new turns. Keep names, facts, "
+                  "decisions and open questions; drop small talk. At most {words} words.\n\n"
+                  "Summary so far:\n{summary}\n\nNew turns:\n{turns}")
+
+def count_tokens(text):
+    """Tokens in text: exact with tiktoken, else a word-piece estimate (Hebrew runs ~2 letters/token)."""
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return len(_PIECE_RE.findall(text))
+
+def _clip(text, tokens, tail=False):
+    """Cut text to about `tokens` tokens on a word boundary, keeping the start (or the end)."""
+    if count_tokens(text) <= tokens:
+        return text
+    words = text.split()
+    if tail:
+        words.reverse()
+    low, high = 0, len(words)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if count_tokens(" ".join(words[:mid])) + 1 <= tokens:
+            low = mid
+        else:
+            high = mid - 1
+    kept = words[:low]
+    return "…" + " ".join(reversed(kept)) if tail else " ".join(kept) + "…"
+
+class Conversation:
+    def __init__(self):
+        self.turns = []          # [(role, text, tokens)] inside the window
+        self.evicted = []        # Turns out of the window, not yet in the summary
+        self.summary = ""
+        self.summary_tokens = 0
+        self.summarizing = False
+        self.last_active = time.time()
+
+    def window_tokens(self):
+        return sum(tokens for _, _, tokens in self.turns)
+
+class ConversationStore:
+    def __init__(self, max_prompt_tokens=1500, window_tokens=900, summary_tokens=200, memory_tokens=150,
+                 memory_facts=3, summarize_every=300, idle_minutes=30, summarize=None, recall=None,
+                 system_prompt=SYSTEM_PROMPT):
+        self.max_prompt_tokens = max_prompt_tokens
+        self.window_tokens = window_tokens        # Recent turns kept verbatim
+        self.summary_tokens = summary_tokens      # Cap for the rolling summary
+        self.memory_tokens = memory_tokens        # Cap for injected memory facts
+        self.memory_facts = memory_facts
+        self.summarize_every = summarize_every    # Evicted tokens that trigger a summary update
+        self.idle = idle_minutes * 60             # Silence after which a conversation starts fresh
+        self.summarize = summarize                # summarize(prompt) -> text; None keeps an extract
+        self.recall = recall                      # recall(query, k) -> [{"topic", "content"}]
+        self.system_prompt = system_prompt
+        self._conversations = {}
+        self._lock = threading.Lock()
+        self.summaries_made = 0
+
+    # ── Prompt ───────────────────────────────────────────────────
+    def build_messages(self, user, prompt):
+        """Chat messages for a new prompt from user, within max_prompt_tokens."""
+        budget = self.max_prompt_tokens - _MESSAGE_OVERHEAD
+        prompt = _clip(prompt, max(16, budget // 2))
+        budget -= count_tokens(prompt)
+        system = self.system_prompt
+        with self._lock:
+            conversation = self._get(user)
+            summary = conversation.summary
+            turns = list(conversation.turns)
+        if summary:
+            system += f"\n\nEarlier in this conversation: {summary}"
+        facts = self._facts(prompt)
+        if facts:
+            system += f"\n\nThings you know about the user:\n{facts}"
+        system = _clip(system, max(16, budget // 2))
+        budget -= count_tokens(system) + _MESSAGE_OVERHEAD
+
+        history = []
+        for role, text, tokens in reversed(turns):  # Newest first, until the budget runs out
+            if tokens + _MESSAGE_OVERHEAD > budget:
+                break
+            budget -= tokens + _MESSAGE_OVERHEAD
+            history.append({"role": role, "content": text})
+        history.reverse()
+        return [{"role": "system", "content": system}] + history + [{"role": "user", "content": prompt}]
+
+    def _facts(self, prompt):
+        if not self.recall or not self.memory_facts:
+            return ""
+        try:
+            hits = self.recall(prompt, k=self.memory_facts)
+        except Exception as e:
+            print(f"[CONVERSATION] Memory lookup failed: {e}")
+            return ""
+        lines, used = [], 0
+        for hit in hits:
+            line = f"- {hit['topic']}: {hit['content']}"
+            used += count_tokens(line)
+            if used > self.memory_tokens:
+                break
+            lines.append(line)
+        return "\n".join(lines)
+
+    # ── History ──────────────────────────────────────────────────
+    def record(self, user, prompt, reply):
+        """Add a finished exchange; turns pushed out of the window queue for the summary."""
+        with self._lock:
+            conversation = self._get(user)
+            conversation.turns.append(("user", prompt, count_tokens(prompt)))
+            conversation.turns.append(("assistant", reply, count_tokens(reply)))
+            while len(conversation.turns) > 2 and conversation.window_tokens() > self.window_tokens:
+                conversation.evicted.append(conversation.turns.pop(0))
+            due = (not conversation.summarizing
+                   and sum(tokens for _, _, tokens in conversation.evicted) >= self.summarize_every)
+            if due:
+                conversation.summarizing = True
+                turns, conversation.evicted = conversation.evicted, []
+        if due:
+            threading.Thread(target=self._roll_summary, args=(conversation, turns),
+                             name="ziggy-summary", daemon=True).start()
+
+    def _roll_summary(self, conversation, turns):
+        text = "\n".join(f"{role}: {content}" for role, content, _ in turns)
+        summary = None
+        if self.summarize:
+            try:
+                summary = self.summarize(SUMMARY_PROMPT.format(
+                    words=int(self.summary_tokens * 0.6), summary=conversation.summary or "(none)", turns=text))
+            except Exception as e:
+                print(f"[CONVERSATION] Summary failed, keeping an extract: {e}")
+        if not summary:
+            # No summarizer: keep what the user asked, newest last
+            asked = "; ".join(content for role, content, _ in turns if role == "user")
+            summary = _clip(f"{conversation.summary} {asked}".strip(), self.summary_tokens, tail=True)
+        summary = _clip(summary.strip(), self.summary_tokens)
+        with self._lock:
+            conversation.summary = summary
+            conversation.summary_tokens = count_tokens(summary)
+            conversation.summarizing = False
+            self.summaries_made += 1
+
+    def reset(self, user):
+        with self._lock:
+            self._conversations.pop(user, None)
+
+    def _get(self, user):
+        conversation = self._conversations.get(user)
+        if conversation is None or time.time() - conversation.last_active > self.idle:
+            conversation = self._conversations[user] = Conversation()
+        conversation.last_active = time.time()
+        return conversation
+
+    def stats(self):
+        with self._lock:
+            return {user: {"turns": len(c.turns), "window_tokens": c.window_tokens(),
+                           "summary_tokens": c.summary_tokens, "pending_tokens": sum(t for _, _, t in c.evicted)}
+                    for user, c in self._conversations.items()}
+
+_store = None
+
+def get_conversations():
+    """The shared store, configured from settings; summaries use the cheap model."""
+    global _store
+    if _store is None:
+        from config.settings import settings
+        config = settings.get("conversation", {})
+        model = config.get("summary_model", "gpt-3.5-turbo")
+
+        def summarize(prompt):
+            from core.llm import get_llm
+            return get_llm().chat([{"role": "user", "content": prompt}], model=model, temperature=0.2)
+
+        def recall(query, k):
+            from memory import memory_manager
+            return memory_manager.recall(query, k=k)
+
+        _store = ConversationStore(
+            max_prompt_tokens=config.get("max_prompt_tokens", 1500),
+            window_tokens=config.get("window_tokens", 900),
+            summary_tokens=config.get("summary_tokens", 200),
+            memory_tokens=config.get("memory_tokens", 150),
+            memory_facts=config.get("memory_facts", 3),
+            summarize_every=config.get("summarize_every", 300),
+            idle_minutes=config.get("idle_minutes", 30),
+            summarize=summarize,
+            recall=recall,
+        )
+    return _store
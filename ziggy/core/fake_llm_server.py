@@ -0,0 +1,98 @@
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Minimal local stand-in for the OpenAI chat completions endpoint, so the LLM
+# service and everything above it can run without network access or a key.
+# Replies are canned: the last user message is echoed back, or a JSON intent
+# when the prompt asks for one. Set llm.fake_server: true in settings to use it.
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real API
+    delay = 0.0
+    requests_seen = 0
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json({"object": "list", "data": [{"id": "fake", "object": "model"}]})
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404)
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        FakeLLMHandler.requests_seen += 1
+        if self.delay:
+            time.sleep(self.delay)
+        model = body.get("model", "fake")
+        reply = self._reply(body.get("messages", []))
+        if body.get("stream"):
+            self._stream(model, reply)
+        else:
+            message = {"role": "assistant", "content": reply}
+            if body.get("tools"):
+                # Answer a forced function call the way the real API does
+                name = body["tools"][0]["function"]["name"]
+                message = {"role": "assistant", "content": None, "tool_calls": [{
+                    "id": "call_fake", "type": "function",
+                    "function": {"name": name, "arguments": json.dumps({"intent": "unknown", "params": {}})},
+                }]}
+            self._send_json({
+                "id": "chatcmpl-fake", "object": "chat.completion", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "finish_reason": "stop", "message": message}],
+                "usage": {"prompt_tokens": len(json.dumps(body)) // 4, "completion_tokens": len(reply) // 4,
+                          "total_tokens": (len(json.dumps(body)) + len(reply)) // 4},
+            })
+
+    def _reply(self, messages):
+        text = next((m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), "")
+        if "JSON" in text:
+            return json.dumps({"intent": "unknown", "params": {}})
+        return f"You said: {text.strip()[:200]}. That is all I know."
+
+    def _send_json(self, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, model, reply):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        words = reply.split(" ")
+        for i, word in enumerate(words):
+            chunk = {
+                "id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": word + (" " if i < len(words) - 1 else "")},
+                             "finish_reason": None}],
+            }
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n")
+        self._write_chunk("data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, text):
+        data = text.encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+def start_fake_server(port=0, delay=0.0):
+    """Serve on localhost in a daemon thread; returns the base_url for the client."""
+    FakeLLMHandler.delay = delay
+    server = ThreadingHTTPServer(("127.0.0.1", port), FakeLLMHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-llm", daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    print(f"[LLM] Fake server listening on {base_url}")
+    return base_url
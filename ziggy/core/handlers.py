@@ -0,0 +1,299 @@
+import os
+import sys
+from datetime import datetime
+
+from core.intent_registry import registry, KIND_IO, KIND_BLOCKING
+from tasks.time_parser import local_now, local_timezone
+
+# Intent handlers for every frontend. Each takes (ctx, params): ctx is a
+# ReplyContext (ctx.say / ctx.say_auto / ctx.say_stream, ctx.lang,
+# ctx.services). Heavier modules are imported inside the handler and listed
+# in preload= so the registry can warm them at boot.
+
+# ── Fixed replies (Hebrew, English); prerendered into the TTS cache at boot ──
+PHRASES = {
+    "device_control_disabled": ("שליטה על התקנים אינה מופעלת", "Device control is not enabled"),
+    "device_missing": ("יש לציין שם התקן ופעולה", "Please specify device and action"),
+    "memory_saved": ("שמרתי את זה בזיכרון", "Saved to memory"),
+    "file_updated": ("קובץ עודכן", "File updated"),
+    "joke": ("למה שלדים לא נלחמים אחד בשני? כי אין להם אומץ!", "Why don’t skeletons fight each other? They don’t have the guts!"),
+    "fact": ("ידעת שלתמנון יש שלושה לבבות?", "Did you know an octopus has three hearts?"),
+    "idea": ("רעיון: לבנות מראה חכמה שמדברת איתך", "Idea: build a smart mirror that talks to you"),
+    "status_ok": ("כל המערכות פועלות כראוי", "All systems are operational"),
+    "goodbye": ("להתראות", "Goodbye"),
+    "restarting": ("מאתחל...", "Restarting..."),
+    "ifttt_triggered": ("אירוע IFTTT הופעל", "IFTTT event triggered"),
+    "buddy": ("אני מקשיב, בוא נדבר על זה", "I'm listening, let's talk about it"),
+    "diagnostics": ("מריץ אבחון מערכתי...", "Running diagnostics..."),
+    "shutting_down": ("מכבה את המערכת...", "Shutting down the system..."),
+    "rebooting": ("מאתחל את המערכת...", "Rebooting the system..."),
+    "not_understood": ("לא הבנתי את הבקשה", "I didn't understand the request"),
+    "no_answer": ("לא הצלחתי למצוא תשובה", "I couldn't find an answer"),
+    "ready": ("זיגי מוכן", "Ziggy is ready"),
+}
+
+# ── Information ──────────────────────────────────────────────────
+@registry.handler("get_time")
+def get_time(ctx, params):
+    now = local_now()  # The configured zone, same clock as reminders
+    ctx.say_auto("השעה עכשיו " + now.strftime("%H:%M"), "The time is now " + now.strftime("%H:%M"))
+
+@registry.handler("get_date")
+def get_date(ctx, params):
+    today = local_now()
+    ctx.say_auto("היום " + today.strftime("%A, %B %d"), "Today is " + today.strftime("%A, %B %d"))
+
+@registry.handler("get_weather")
+def get_weather(ctx, params):
+    location = params.get("location") or "your location"
+    ctx.say_auto(f"מזג האוויר ב־{location} הוא שמשי ונעים",
+                 f"The weather in {location} is sunny and pleasant")
+
+@registry.handler("tell_joke")
+def tell_joke(ctx, params):
+    ctx.say_auto(*PHRASES["joke"])
+
+@registry.handler("tell_fact")
+def tell_fact(ctx, params):
+    ctx.say_auto(*PHRASES["fact"])
+
+@registry.handler("generate_idea")
+def generate_idea(ctx, params):
+    ctx.say_auto(*PHRASES["idea"])
+
+@registry.handler("get_status")
+def get_status(ctx, params):
+    controller = ctx.services.get("devices")
+    active = controller.states.find(state="on") if controller else []
+    if not active:
+        ctx.say_auto(*PHRASES["status_ok"])
+        return
+    names = ", ".join(name.replace("_", " ") for name in active)
+    ctx.say_auto(f"כל המערכות פועלות. דולקים: {names}", f"All systems are operational. On: {names}")
+
+@registry.handler("debug_diagnostics")
+def debug_diagnostics(ctx, params):
+    ctx.say_auto(*PHRASES["diagnostics"])
+
+# ── Smart home ───────────────────────────────────────────────────
+@registry.handler("control_device", kind=KIND_IO)
+def control_device(ctx, params):
+    device = params.get("device")
+    action = params.get("action")
+    value = params.get("value")
+    if not (device and action):
+        ctx.say_auto(*PHRASES["device_missing"])
+        return
+    controller = ctx.services.get("devices")
+    if not controller:
+        ctx.say_auto(*PHRASES["device_control_disabled"])
+        return
+    if not controller.resolve(device):
+        ctx.say_auto(f"לא מצאתי התקן בשם {device}", f"I couldn't find a device called {device}")
+        return
+    if action in ("on", "off") and controller.is_on(device) == (action == "on"):
+        # Known from the last state report; nothing to send
+        ctx.say_auto(f"{device} כבר {'דולק' if action == 'on' else 'כבוי'}", f"The {device} is already {action}")
+        return
+    controller.control_device(device, action, value)
+    ctx.say_auto(f"{device} הופעל/כובה", f"{device} command sent: {action} with value {value} (via MQTT)")
+
+@registry.handler("run_scene", kind=KIND_IO)
+def run_scene(ctx, params):
+    scene = params.get("scene")
+    controller = ctx.services.get("devices")
+    if not controller:
+        ctx.say_auto(*PHRASES["device_control_disabled"])
+        return
+    results = controller.run_scene(scene) if scene else None
+    if results is None:
+        ctx.say_auto(f"לא מכיר את הסצנה {scene}", f"I don't know the scene {scene}")
+        return
+    failed = [device.replace("_", " ") for device, r in results.items() if not r["ok"]]
+    done = len(results) - len(failed)
+    name = scene.replace("_", " ")
+    if not failed:
+        ctx.say_auto(f"{name}: כל {done} ההתקנים בוצעו", f"{name}: all {done} devices done")
+    else:
+        ctx.say_auto(f"{name}: {done} מתוך {len(results)} בוצעו, לא הגיבו: {', '.join(failed)}",
+                     f"{name}: {done} of {len(results)} done, no response from {', '.join(failed)}")
+
+@registry.handler("get_device_state")
+def get_device_state(ctx, params):
+    # Answered from the state table fed by MQTT; no round trip to the device
+    device = params.get("device")
+    if not device:
+        ctx.say_auto(*PHRASES["device_missing"])
+        return
+    controller = ctx.services.get("devices")
+    if not controller:
+        ctx.say_auto(*PHRASES["device_control_disabled"])
+        return
+    snapshot = controller.get_state(device)
+    state = snapshot["values"].get("state") if snapshot else None
+    if state is None:
+        ctx.say_auto(f"אין לי עדיין מידע על {device}", f"I haven't heard from the {device} yet")
+        return
+    since = datetime.fromtimestamp(snapshot["changed_at"]["state"], local_timezone()).strftime("%H:%M")
+    expected = params.get("state")
+    if expected:
+        yes = state == expected
+        ctx.say_auto(f"{'כן' if yes else 'לא'}, {device} {'דולק' if state == 'on' else 'כבוי'} מאז {since}",
+                     f"{'Yes' if yes else 'No'}, the {device} is {state} (since {since})")
+    else:
+        ctx.say_auto(f"{device} {'דולק' if state == 'on' else 'כבוי'} מאז {since}",
+                     f"The {device} is {state} (since {since})")
+
+@registry.handler("run_ifttt", "ifttt_trigger", kind=KIND_IO, preload=("integrations.ifttt_handler",))
+def run_ifttt(ctx, params):
+    from integrations import ifttt_handler
+    ifttt_handler.trigger(params.get("event"), params.get("value1"))
+    ctx.say_auto(*PHRASES["ifttt_triggered"])
+
+# ── GPT ──────────────────────────────────────────────────────────
+@registry.handler("chat_with_gpt", kind=KIND_IO, preload=("core.chatgpt", "core.conversation"))
+def chat_with_gpt(ctx, params):
+    prompt = params.get("text", "")
+    if prompt:
+        from core.chatgpt import stream_gpt_reply
+        ctx.say_stream(stream_gpt_reply(prompt, user=ctx.user))
+
+# ── Memory, lists, tasks, files ──────────────────────────────────
+@registry.handler("ask_memory", kind=KIND_IO, preload=("memory.memory_manager", "core.chatgpt"))
+def ask_memory(ctx, params):
+    from memory import memory_manager
+    topic = params.get("topic")
+    matched, content = memory_manager.lookup(topic)  # Exact topic, then the local recall index
+    if content and matched == topic.lower():
+        ctx.say(content)
+    elif content:
+        ctx.say(f"{matched}: {content}")  # Say which topic answered, in case it is not the one meant
+    else:
+        # Fallback to GPT
+        from core.chatgpt import stream_gpt_reply
+        ctx.say_stream(stream_gpt_reply(f"Who is {topic}?", model="gpt-3.5-turbo", temperature=0.5))
+
+@registry.handler("save_memory", kind=KIND_IO, preload=("memory.memory_manager",))
+def save_memory(ctx, params):
+    from memory import memory_manager
+    memory_manager.save(params.get("topic"), params.get("content"))
+    ctx.say_auto(*PHRASES["memory_saved"])
+
+@registry.handler("add_to_list", kind=KIND_IO, preload=("files.file_manager",))
+def add_to_list(ctx, params):
+    from files import file_manager
+    item = params.get("item")
+    if item:
+        file_manager.add_to_list(item)
+        ctx.say_auto(f"{item} נוסף לרשימה", f"{item} added to list")
+
+@registry.handler("remove_from_list", kind=KIND_IO, preload=("files.file_manager",))
+def remove_from_list(ctx, params):
+    from files import file_manager
+    item = params.get("item")
+    if item:
+        file_manager.remove_from_list(item)
+        ctx.say_auto(f"{item} הוסר מהרשימה", f"{item} removed from list")
+
+@registry.handler("create_task", kind=KIND_IO, preload=("tasks.task_manager",))
+def create_task(ctx, params):
+    from tasks import task_manager
+    desc = params.get("description")
+    when = params.get("when")
+    if desc and when:
+        job = task_manager.create_task(desc, when, ctx.lang)
+        if job:
+            ctx.say_auto(f"יצרתי משימה: {desc} {job['when']}", f"Created task: {desc} {job['when']}")
+        else:
+            ctx.say_auto(f"לא הבנתי מתי: {when}", f"I didn't understand when: {when}")
+
+@registry.handler("cancel_task", kind=KIND_IO, preload=("tasks.task_manager",))
+def cancel_task(ctx, params):
+    from tasks import task_manager
+    desc = params.get("description")
+    if desc:
+        if task_manager.cancel_task(desc):
+            ctx.say_auto(f"מחקתי את המשימה: {desc}", f"Deleted task: {desc}")
+        else:
+            ctx.say_auto(f"לא מצאתי משימה בשם {desc}", f"I couldn't find a task called {desc}")
+
+@registry.handler("set_reminder", kind=KIND_IO, preload=("tasks.task_manager",))
+def set_reminder(ctx, params):
+    from tasks import task_manager
+    message = params.get("message")
+    when = params.get("when")
+    job = task_manager.set_reminder(message, when, ctx.lang) if message and when else None
+    if job:
+        ctx.say_auto(f"תזכורת נקבעה {job['when']}: {message}", f"Reminder set {job['when']}: {message}")
+    else:
+        ctx.say_auto(f"לא הבנתי מתי להזכיר: {when}", f"I didn't understand when to remind you: {when}")
+
+@registry.handler("read_file", kind=KIND_IO, preload=("files.file_manager",))
+def read_file(ctx, params):
+    from files import file_manager
+    content = file_manager.read(params.get("filename"))
+    ctx.say_auto("התוכן הוא: " + content[:200], "The content is: " + content[:200])
+
+@registry.handler("write_file", kind=KIND_IO, preload=("files.file_manager",))
+def write_file(ctx, params):
+    from files import file_manager
+    file_manager.write(params.get("filename"), params.get("content"))
+    ctx.say_auto(*PHRASES["file_updated"])
+
+# ── Modes and placeholders ───────────────────────────────────────
+@registry.handler("switch_mode")
+def switch_mode(ctx, params):
+    mode = params.get("mode")
+    ctx.say_auto(f"עובר למצב {mode}... (טרם נתמך)", f"Switching to mode {mode}... (not yet supported)")
+
+@registry.handler("ask_buddy")
+def ask_buddy(ctx, params):
+    ctx.say_auto(*PHRASES["buddy"])
+
+@registry.handler("play_music")
+def play_music(ctx, params):
+    song = params.get("song", "שיר מרגיע")
+    ctx.say_auto(f"מנגן {song}... (תמיכה תגיע בהמשך)", f"Playing {song}... (support coming soon)")
+
+@registry.handler("ask_health")
+def ask_health(ctx, params):
+    ctx.say_auto(f"אני לא רופא, אבל הנה מה שמצאתי על {params.get('issue')}...",
+                 f"I'm not a doctor, but here's what I found about {params.get('issue')}...")
+
+@registry.handler("translate")
+def translate(ctx, params):
+    ctx.say_auto(f"מתרגם '{params.get('text')}' ל־{params.get('target_lang')}...",
+                 f"Translating '{params.get('text')}' to {params.get('target_lang')}...")
+
+# ── System ───────────────────────────────────────────────────────
+@registry.handler("exit", kind=KIND_BLOCKING)
+def exit_ziggy(ctx, params):
+    ctx.say_auto(*PHRASES["goodbye"])
+    runtime = ctx.services.get("runtime")
+    if runtime:
+        runtime.request_shutdown()  # Graceful: the runtime waits for the goodbye to finish
+        return
+    ctx.wait_until_spoken()
+    sys.exit(0)
+
+@registry.handler("restart", kind=KIND_BLOCKING)
+def restart(ctx, params):
+    ctx.say_auto(*PHRASES["restarting"])
+    ctx.wait_until_spoken()
+    os.execv(sys.executable, ['python3'] + sys.argv)
+
+@registry.handler("shutdown_system", kind=KIND_BLOCKING)
+def shutdown_system(ctx, params):
+    ctx.say_auto(*PHRASES["shutting_down"])
+    ctx.wait_until_spoken()
+    os.system("sudo shutdown now")
+
+@registry.handler("reboot_system", kind=KIND_BLOCKING)
+def reboot_system(ctx, params):
+    ctx.say_auto(*PHRASES["rebooting"])
+    ctx.wait_until_spoken()
+    os.system("sudo reboot")
+
+@registry.handler("unknown")
+def not_understood(ctx, params):
+    ctx.say_auto(*PHRASES["not_understood"])
@@ -0,0 +1,255 @@
+import os
+import json
+import zlib
+import threading
+from collections import OrderedDict
+import numpy as np
+
+from utils.helpers import normalize_text
+
+EXAMPLES_FILE = os.path.join(os.path.dirname(__file__), "intent_examples.jsonl")
+
+# Intents the classifier may answer on its own: they carry no params, so the
+# label alone is a complete parse. Everything else still needs GPT for slots.
+# Lifecycle intents (shutdown, reboot, restart, exit) are paramless too but
+# never answered from a similarity score: "shut it down" or "shutdown the
+# fan" land close to them, so only the exact rules or GPT may trigger them.
+# get_weather takes a location ("weather in london"), so it is left to GPT.
+PARAMLESS_INTENTS = {
+    "get_time", "get_date", "tell_joke", "tell_fact",
+    "get_status", "debug_diagnostics",
+}
+
+# ── Seed examples (mirrors the intent list in the GPT prompt) ─────
+SEED_EXAMPLES = {
+    "get_time": [
+        "what time is it", "what's the time", "tell me the time", "current time",
+        "do you know what time it is", "מה השעה", "כמה השעה", "תגיד לי מה השעה", "מה השעה עכשיו",
+    ],
+    "get_date": [
+        "what's the date", "what date is it today", "what day is it", "today's date",
+        "מה התאריך", "איזה יום היום", "מה התאריך היום", "איזה תאריך היום",
+    ],
+    "get_weather": [
+        "what's the weather", "how is the weather today", "is it going to rain", "weather forecast",
+        "מה מזג האוויר", "איך מזג האוויר היום", "האם ירד גשם", "תחזית מזג אוויר",
+    ],
+    "control_device": [
+        "turn on the light", "turn off the living room light", "switch off the lamp",
+        "set the thermostat to 22", "dim the bedroom lamp",
+        "הדלק את האור", "כבה את האור בסלון", "תדליק את המזגן", "תכבה את המנורה",
+    ],
+    "add_to_list": [
+        "add milk to the list", "put eggs on the shopping list", "add bread to my list",
+        "תוסיף חלב לרשימה", "הוסף ביצים לרשימת הקניות", "תרשום לחם ברשימה",
+    ],
+    "remove_from_list": [
+        "remove milk from the list", "take eggs off the shopping list", "delete bread from my list",
+        "תוריד חלב מהרשימה", "מחק ביצים מהרשימה", "תסיר לחם מהרשימה",
+    ],
+    "create_task": [
+        "create a task to call the bank tomorrow", "add a task to pay bills on sunday",
+        "צור משימה להתקשר לבנק מחר", "תוסיף משימה לשלם חשבונות ביום ראשון",
+    ],
+    "cancel_task": [
+        "cancel the task to call the bank", "delete the bills task",
+        "בטל את המשימה להתקשר לבנק", "מחק את המשימה של החשבונות",
+    ],
+    "set_reminder": [
+        "remind me to take the pills at 8", "set a reminder to call mom in an hour",
+        "תזכיר לי לקחת כדורים בשמונה", "תזכורת להתקשר לאמא בעוד שעה",
+    ],
+    "ask_memory": [
+        "what do you remember about my car", "who is dana", "what is my wifi password",
+        "מה אתה זוכר על האוטו שלי", "מי זאת דנה", "מה הסיסמה של הווייפיי",
+    ],
+    "save_memory": [
+        "remember that my car is parked on level 2", "remember the wifi password is 1234",
+        "תזכור שהאוטו חונה בקומה 2", "תזכור שהסיסמה היא 1234",
+    ],
+    "tell_joke": [
+        "tell me a joke", "say something funny", "make me laugh", "do you know a joke",
+        "ספר לי בדיחה", "תגיד משהו מצחיק", "תצחיק אותי", "יש לך בדיחה",
+    ],
+    "tell_fact": [
+        "tell me a fact", "tell me something interesting", "give me a fun fact",
+        "ספר לי עובדה", "תגיד לי משהו מעניין", "עובדה מעניינת",
+    ],
+    "generate_idea": [
+        "give me an idea", "i need an idea for a project", "suggest something to build",
+        "תן לי רעיון", "אני צריך רעיון לפרויקט", "תציע לי משהו לבנות",
+    ],
+    "get_status": [
+        "system status", "how are you doing", "is everything working", "status report",
+        "מה המצב", "מה הסטטוס", "הכל עובד", "דוח מצב",
+    ],
+    "exit": [
+        "goodbye", "exit", "bye ziggy", "stop listening", "quit",
+        "להתראות", "ביי", "צא", "תפסיק להקשיב",
+    ],
+    "restart": [
+        "restart", "restart yourself", "restart ziggy", "start over",
+        "אתחל", "תאתחל את עצמך", "אתחל את זיגי",
+    ],
+    "play_music": [
+        "play some music", "play a song", "play relaxing music",
+        "תנגן מוזיקה", "תשמיע שיר", "נגן משהו מרגיע",
+    ],
+    "ask_health": [
+        "i have a headache", "what should i do about a sore throat",
+        "כואב לי הראש", "מה לעשות נגד כאב גרון",
+    ],
+    "debug_diagnostics": [
+        "run diagnostics", "run a system check", "debug mode",
+        "הרץ אבחון", "תבדוק את המערכת", "בדיקת מערכת",
+    ],
+    "translate": [
+        "translate good morning to hebrew", "how do you say thank you in english",
+        "תתרגם בוקר טוב לאנגלית", "איך אומרים תודה באנגלית",
+    ],
+    "shutdown_system": [
+        "shutdown", "shut down the system", "power off", "turn yourself off",
+        "כבה את המערכת", "תכבה את עצמך", "כיבוי מערכת",
+    ],
+    "reboot_system": [
+        "reboot", "reboot the system", "reboot the raspberry pi",
+        "אתחל את המערכת", "תעשה ריבוט", "הפעל מחדש את המחשב",
+    ],
+}
+
+class IntentClassifier:
+    """Nearest-centroid classifier over hashed character n-grams.
+
+    Each intent keeps the running sum of its example vectors, so learning a
+    new label is a single row update instead of a retrain.
+    """
+
+    def __init__(self, dim=4096, ngram_range=(2, 4), threshold=0.3, margin=0.1,
+                 examples_path=EXAMPLES_FILE, max_examples=2000):
+        self.dim = dim
+        self.ngram_range = ngram_range
+        self.threshold = threshold
+        self.margin = margin
+        self.examples_path = examples_path
+        self.labels = []
+        self._index = {}
+        self._sums = np.zeros((0, dim), dtype=np.float32)
+        self._centroids = np.zeros((0, dim), dtype=np.float32)
+        self._lock = threading.Lock()
+        # Example log: one line per distinct utterance, newest last, at most
+        # max_examples (compacted once it grows a quarter past that)
+        self.max_examples = max_examples
+        self._seen = set()              # Normalized texts already learned (seeds and log)
+        self._examples = OrderedDict()  # normalized text -> (text, intent), as kept in the log
+        self._log_lock = threading.Lock()
+
+    def vectorize(self, text):
+        text = f" {normalize_text(text)} "
+        vec = np.zeros(self.dim, dtype=np.float32)
+        low, high = self.ngram_range
+        for n in range(low, high + 1):
+            for i in range(len(text) - n + 1):
+                vec[zlib.crc32(text[i:i + n].encode("utf-8")) % self.dim] += 1.0
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def learn(self, text, intent):
+        self._seen.add(normalize_text(text))
+        vec = self.vectorize(text)
+        with self._lock:
+            row = self._index.get(intent)
+            if row is None:
+                row = len(self.labels)
+                self._index[intent] = row
+                self.labels.append(intent)
+                self._sums = np.vstack([self._sums, np.zeros((1, self.dim), dtype=np.float32)])
+                self._centroids = np.vstack([self._centroids, np.zeros((1, self.dim), dtype=np.float32)])
+            self._sums[row] += vec
+            norm = np.linalg.norm(self._sums[row])
+            self._centroids[row] = self._sums[row] / norm if norm else self._sums[row]
+
+    def predict(self, text):
+        """Return (intent, confidence); confidence is the top cosine score."""
+        vec = self.vectorize(text)
+        with self._lock:
+            if not self.labels:
+                return None, 0.0
+            scores = self._centroids @ vec
+        order = np.argsort(scores)[::-1]
+        best = float(scores[order[0]])
+        second = float(scores[order[1]]) if len(order) > 1 else 0.0
+        if best < self.threshold or best - second < self.margin:
+            return None, best
+        return self.labels[order[0]], best
+
+    def train_seed(self):
+        for intent, phrases in SEED_EXAMPLES.items():
+            for phrase in phrases:
+                self.learn(phrase, intent)
+
+    def load_examples(self):
+        """Learn the example log; duplicates and anything past max_examples are compacted away."""
+        if not self.examples_path or not os.path.exists(self.examples_path):
+            return 0
+        lines = 0
+        examples = OrderedDict()
+        try:
+            with open(self.examples_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        lines += 1
+                        example = json.loads(line)
+                        key = normalize_text(example["text"])
+                        if key not in self._seen:
+                            examples.pop(key, None)  # Keep the latest position
+                            examples[key] = (example["text"], example["intent"])
+        except Exception as e:
+            print(f"[INTENT CLASSIFIER LOAD ERROR] {e}")
+        while len(examples) > self.max_examples:
+            examples.popitem(last=False)
+        for text, intent in examples.values():
+            self.learn(text, intent)
+        with self._log_lock:
+            self._examples = examples
+            if lines != len(examples):
+                print(f"[INTENT CLASSIFIER] Compacting example log: {lines} -> {len(examples)} lines")
+                self._rewrite_log()
+        return len(examples)
+
+    def add_example(self, text, intent):
+        """Learn a GPT-labelled example and append it to the example log (once per distinct text)."""
+        key = normalize_text(text)
+        if not key or key in self._seen:
+            return
+        self.learn(text, intent)
+        if not self.examples_path:
+            return
+        with self._log_lock:
+            self._examples[key] = (text, intent)
+            if len(self._examples) > self.max_examples + self.max_examples // 4:
+                while len(self._examples) > self.max_examples:
+                    self._examples.popitem(last=False)
+                self._rewrite_log()
+                return
+            try:
+                with open(self.examples_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({"text": text, "intent": intent}, ensure_ascii=False) + "\n")
+            except Exception as e:
+                print(f"[INTENT CLASSIFIER SAVE ERROR] {e}")
+
+    def _rewrite_log(self):
+        tmp_path = self.examples_path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for text, intent in self._examples.values():
+                    f.write(json.dumps({"text": text, "intent": intent}, ensure_ascii=False) + "\n")
+            os.replace(tmp_path, self.examples_path)  # Atomic, so a crash never leaves half a log
+        except Exception as e:
+            print(f"[INTENT CLASSIFIER SAVE ERROR] {e}")
+
+def build_classifier(**kwargs):
+    classifier = IntentClassifier(**kwargs)
+    classifier.train_seed()
+    learned = classifier.load_examples()
+    print(f"[INTENT CLASSIFIER] Ready with {len(classifier.labels)} intents ({learned} learned examples).")
+    return classifier
@@ -1,85 +1,158 @@
 import os
 import json
-import yaml
 import re
-import openai
-from openai import OpenAI
-from datetime import datetime
+import time
+import threading
+from collections import OrderedDict
 
-# Load config
-def load_settings():
-    config_path = os.path.join(os.path.dirname(__file__), "..", "config", "settings.yaml")
-    with open(config_path, "r") as f:
-        return yaml.safe_load(f)
+from utils.helpers import normalize_text
+from core.intent_classifier import PARAMLESS_INTENTS, build_classifier
+from core.intent_rules import matcher as rule_matcher
+from core.intent_schema import TOOLS, TOOL_CHOICE, build_messages, extract_arguments
+from core.intent_schema import validate as validate_intent
+from core.llm import get_llm
+from config.settings import settings
 
-settings = load_settings()
-client = OpenAI(api_key=settings["openai"]["api_key"])
+# ── Normalized intent cache ──────────────────────────────────────
+CACHE_FILE = os.path.join(os.path.dirname(__file__), "intent_cache.json")
+
+class IntentCache:
+    """Thread-safe LRU of parse results with a TTL, persisted as JSON."""
+
+    def __init__(self, path=CACHE_FILE, max_size=512, ttl=7 * 24 * 3600):
+        self.path = path
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (stored_at, result)
+        self._lock = threading.Lock()
+        self.load()
+
+    def get(self, text):
+        key = normalize_text(text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and time.time() - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return json.loads(json.dumps(entry[1]))  # Callers may mutate params
+            if entry:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, text, result):
+        key = normalize_text(text)
+        if not key:
+            return
+        with self._lock:
+            self._entries[key] = (time.time(), result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        # A write costs far less than the GPT round trip that produced the entry
+        self.save()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+        self.save()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except Exception as e:
+            print(f"[INTENT CACHE LOAD ERROR] {e}")
+            return
+        now = time.time()
+        with self._lock:
+            for key, stored_at, result in stored[-self.max_size:]:
+                if now - stored_at < self.ttl:
+                    self._entries[key] = (stored_at, result)
+        print(f"[INTENT CACHE] Loaded {len(self._entries)} entries.")
+
+    def save(self):
+        with self._lock:
+            rows = [[key, stored_at, result] for key, (stored_at, result) in self._entries.items()]
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(rows, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)  # Atomic, so a restart never sees half a file
+        except Exception as e:
+            print(f"[INTENT CACHE SAVE ERROR] {e}")
+
+_cache_settings = settings.get("intent_cache", {})
+intent_cache = IntentCache(
+    max_size=_cache_settings.get("max_size", 512),
+    ttl=_cache_settings.get("ttl_seconds", 7 * 24 * 3600),
+)
+
+def cache_stats():
+    return intent_cache.stats()
+
+# ── Local learned classifier (tier between quick_parse and GPT) ──
+_classifier_settings = settings.get("intent_classifier", {})
+intent_classifier = None
+_classifier_lock = threading.Lock()
+
+def get_classifier():
+    """Build the classifier on first use (or in the boot warm-up), not at import."""
+    global intent_classifier
+    if intent_classifier is None and _classifier_settings.get("enabled", True):
+        with _classifier_lock:
+            if intent_classifier is None:
+                intent_classifier = build_classifier(
+                    threshold=_classifier_settings.get("threshold", 0.3),
+                    margin=_classifier_settings.get("margin", 0.1),
+                )
+    return intent_classifier
+
+def classify_parse(text):
+    classifier = get_classifier()
+    if not classifier:
+        return None
+    intent, confidence = classifier.predict(text)
+    if intent in PARAMLESS_INTENTS:
+        print(f"[INTENT CLASSIFIER] {intent} ({confidence:.2f})")
+        return {"intent": intent, "params": {}}
+    return None
 
 # ── Regex-based quick parser ─────────────────────────────────────
+_WAKE_PREFIX_RE = re.compile(r"^(?:(?:hey|hi) )?ziggy\b[,!.]? *|^(?:היי |הי )?זיגי\b[,!.]? *")
+_TRAILING_PUNCT_RE = re.compile(r"[\s?!.,]+$")
+
 def quick_parse(text):
-    text = text.lower()
-
-    if re.search(r"\b(what.*time|current time|שעה)\b", text):
-        return {"intent": "get_time", "params": {}}
-    if re.search(r"\b(what.*date|today's date|תאריך)\b", text):
-        return {"intent": "get_date", "params": {}}
-    if re.search(r"\bweather\b|מזג אוויר", text):
-        return {"intent": "get_weather", "params": {}}
-    if re.search(r"\bjoke\b|בדיחה", text):
-        return {"intent": "tell_joke", "params": {}}
-    if re.search(r"\bfact\b|עובדה", text):
-        return {"intent": "tell_fact", "params": {}}
-    if re.search(r"\brestart\b|אתחל", text):
-        return {"intent": "restart", "params": {}}
-    if re.search(r"\bshutdown\b|כבה", text):
-        return {"intent": "shutdown_system", "params": {}}
-    return None
+    text = " ".join(text.lower().split())
+    text = _WAKE_PREFIX_RE.sub("", _TRAILING_PUNCT_RE.sub("", text))
+    return rule_matcher.match(text)
 
 # ── GPT-based fallback parser ─────────────────────────────────────
 def gpt_parse(text):
-    prompt = f\"\"\"\nYou are a smart home assistant named Ziggy. Your task is to analyze user requests and extract the user's intent and any relevant parameters in a JSON object.
-
-Here are the supported intents and their expected parameters:
-- get_time: {{}}
-- get_date: {{}}
-- get_weather: {{\"location\": str (optional)}}
-- control_device: {{\"device\": str, \"action\": \"on\"|\"off\"|\"toggle\"|\"set_brightness\"|\"set_temperature\" (and other relevant actions), \"value\": str (optional, e.g., brightness level, temperature)}}
-- add_to_list: {{\"item\": str}}
-- remove_from_list: {{\"item\": str}}
-- create_task: {{\"description\": str, \"when\": str (natural time)}}
-- cancel_task: {{\"description\": str}}
-- ask_memory: {{\"topic\": str}}
-- save_memory: {{\"topic\": str, \"content\": str}}
-- read_file: {{\"filename\": str}}
-- write_file: {{\"filename\": str, \"content\": str}}
-- tell_joke: {{}}
-- tell_fact: {{}}
-- generate_idea: {{\"topic\": str}}
-- get_status: {{}}
-- exit: {{}}
-- restart: {{}}
-- run_ifttt: {{\"event\": str, \"value1\": str (optional)}}\n- switch_mode: {{\"mode\": str}}\n- ask_buddy: {{\"question\": str}}\n- set_reminder: {{\"message\": str, \"when\": str}}\n- play_music: {{\"song\": str (optional)}}
-- ask_health: {{\"issue\": str}}
-- debug_diagnostics: {{}}
-- translate: {{\"text\": str, \"target_lang\": str}}
-- shutdown_system: {{}}
-- reboot_system: {{}}
-
-For the 'control_device' intent, make sure to extract the 'device' name, the 'action' (like 'on', 'off', 'toggle', 'set_brightness', 'set_temperature'), and the 'value' if the user provides one (e.g., "set the living room light to 50 percent", the value is "50").
-
-Always return a valid JSON object and nothing else. Do not include any extra text or formatting.
-
-User: \"{text}\"
-Ziggy (JSON):
-\"\"\"
-
     try:
-        response = client.chat.completions.create(
+        response = get_llm().complete(
+            build_messages(text),
             model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3
+            temperature=0,
+            tools=TOOLS,
+            tool_choice=TOOL_CHOICE,
         )
-        return json.loads(response.choices[0].message.content.strip())
+        return validate_intent(extract_arguments(response.choices[0].message))
     except Exception as e:
         print(f"[INTENT PARSER ERROR] {e}")
         return {"intent": "unknown", "params": {}}
@@ -89,27 +162,16 @@ def parse(text):
     result = quick_parse(text)
     if result:
         return result
-    return gpt_parse(text)
-
-# ── Sample direct handler (for testing/chat mode) ────────────────
-def handle_command(text, context=None):
-    result = parse(text)
-    intent = result.get("intent")
-    params = result.get("params", {})
-    print(f"[Intent] {intent} | [Params] {params}")
-
-    if intent == "get_time":
-        return f"The current time is {datetime.now().strftime('%H:%M')}"
-    elif intent == "get_weather":
-        location = params.get("location", "your area")
-        return f"I'll get the weather for {location} soon."
-    elif intent == "tell_joke":
-        return "Why don’t scientists trust atoms? Because they make up everything."
-    elif intent == "restart":
-        os.system("sudo reboot")
-        return "🔁 Restarting system..."
-    elif intent == "shutdown_system":
-        os.system("sudo shutdown now")
-        return "🛑 Shutting down..."
-    
-    return "I'm not sure what you meant. Please try again."
+    cached = intent_cache.get(text)
+    if cached:
+        return cached
+    result = classify_parse(text)
+    if result:
+        return result
+    result = gpt_parse(text)
+    intent = result.get("intent", "unknown")
+    if intent != "unknown" and not result.get("missing"):  # An incomplete answer may be right next time
+        intent_cache.put(text, result)
+        if get_classifier():
+            intent_classifier.add_example(text, intent)
+    return result
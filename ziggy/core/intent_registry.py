@@ -0,0 +1,171 @@
+import time
+import importlib
+import threading
+
+# Intent dispatch table shared by every frontend (voice, Telegram). Each intent
+# maps to one handler spec, so dispatch is a dict lookup instead of an if/elif
+# ladder. Handler modules are imported on first use (or ahead of time with
+# prewarm()), and every spec declares how it should be scheduled:
+#   KIND_INLINE    cheap, run on the caller's thread
+#   KIND_IO        waits on the network or disk (GPT, MQTT, IFTTT, files)
+#   KIND_CPU       burns CPU in Python
+#   KIND_BLOCKING  long-running or never returns (exit, reboot)
+
+KIND_INLINE = "inline"
+KIND_IO = "io"
+KIND_CPU = "cpu"
+KIND_BLOCKING = "blocking"
+
+HANDLER_MODULES = ["core.handlers"]
+FALLBACK_INTENT = "unknown"
+
+class HandlerSpec:
+    def __init__(self, intent, func, kind=KIND_INLINE, preload=()):
+        self.intent = intent
+        self.func = func
+        self.kind = kind
+        self.preload = tuple(preload)  # Modules the handler imports lazily; prewarm() loads them
+        self.calls = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+class ReplyContext:
+    """What a handler talks to: the user's language, where replies go, shared services."""
+
+    def __init__(self, lang="en", source="voice", voice=None, services=None, user=None):
+        self.lang = lang
+        self.source = source
+        self.user = user or source  # Whose conversation this is: "voice" or "telegram:<chat id>"
+        self.voice = voice
+        self.services = services or {}
+        self.replies = []
+
+    def say(self, text):
+        if not text:
+            return
+        self.replies.append(text)
+        if self.voice:
+            self.voice.say(text)
+
+    def say_auto(self, msg_he, msg_en):
+        self.say(msg_he if self.lang == "he" else msg_en)
+
+    def say_stream(self, deltas):
+        if self.voice:
+            self.voice.say_stream(self._collect(deltas))
+        else:
+            self.replies.append("".join(deltas).strip())
+
+    def _collect(self, deltas):
+        # Keep a text copy of a streamed reply for non-voice frontends and logs
+        parts = []
+        for delta in deltas:
+            parts.append(delta)
+            yield delta
+        self.replies.append("".join(parts).strip())
+
+    def wait_until_spoken(self, timeout=5):
+        if self.voice:
+            self.voice.wait_until_done(timeout=timeout)
+
+    @property
+    def text(self):
+        return "\n".join(r for r in self.replies if r)
+
+class HandlerRegistry:
+    def __init__(self, modules=HANDLER_MODULES):
+        self.modules = list(modules)
+        self.services = {}  # Shared runtime objects, e.g. "voice", "devices"
+        self._handlers = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def handler(self, intent, *aliases, kind=KIND_INLINE, preload=()):
+        """Decorator: register func for intent (and any alias intents)."""
+        def register(func):
+            spec = HandlerSpec(intent, func, kind, preload)
+            for name in (intent,) + aliases:
+                self._handlers[name] = spec
+            return func
+        return register
+
+    def load(self):
+        """Import the handler modules; they register themselves on import."""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            for module in self.modules:
+                importlib.import_module(module)
+            self._loaded = True
+
+    def get(self, intent):
+        self.load()
+        return self._handlers.get(intent) or self._handlers.get(FALLBACK_INTENT)
+
+    def prewarm(self, intents=None):
+        """Import handler modules and their lazy dependencies so first calls are fast."""
+        start = time.time()
+        self.load()
+        modules = set()
+        for name, spec in self._handlers.items():
+            if intents is None or name in intents:
+                modules.update(spec.preload)
+        for module in sorted(modules):
+            try:
+                importlib.import_module(module)
+            except Exception as e:
+                print(f"[HANDLERS] Could not preload {module}: {e}")
+        print(f"[HANDLERS] Prewarmed {len(modules)} modules in {(time.time() - start) * 1000:.0f} ms.")
+
+    def dispatch(self, intent, params, context):
+        spec = self.get(intent)
+        if spec is None:
+            print(f"[HANDLERS] No handler for '{intent}'")
+            return context
+        start = time.time()
+        try:
+            spec.func(context, params or {})
+        except Exception as e:
+            spec.errors += 1
+            print(f"[HANDLER ERROR] {spec.intent}: {e}")
+        finally:
+            elapsed = time.time() - start
+            spec.calls += 1
+            spec.total_time += elapsed
+            spec.max_time = max(spec.max_time, elapsed)
+        return context
+
+    def handle_text(self, text, lang="en", source="voice", voice=None, user=None):
+        """Parse text and dispatch it; returns the ReplyContext with what was said."""
+        from core import intent_parser
+        parsed = intent_parser.parse(text)
+        intent = parsed.get("intent", FALLBACK_INTENT)
+        params = parsed.get("params", {})
+        print(f"[INTENT] {intent} | Params: {params}")
+        context = ReplyContext(lang, source, voice, self.services, user)
+        return self.dispatch(intent, params, context)
+
+    def kind(self, intent):
+        spec = self.get(intent)
+        return spec.kind if spec else KIND_INLINE
+
+    def stats(self):
+        seen = set()
+        result = {}
+        for spec in self._handlers.values():
+            if id(spec) in seen or not spec.calls:
+                continue
+            seen.add(id(spec))
+            result[spec.intent] = {
+                "kind": spec.kind,
+                "calls": spec.calls,
+                "errors": spec.errors,
+                "avg_ms": spec.total_time / spec.calls * 1000,
+                "max_ms": spec.max_time * 1000,
+            }
+        return result
+
+registry = HandlerRegistry()
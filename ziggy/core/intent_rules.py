@@ -0,0 +1,169 @@
+import re
+from collections import deque
+
+# ── Declarative bilingual rule table ─────────────────────────────
+# A rule is only tried when one of its literal "keywords" occurs in the text;
+# among those candidates the first rule (in table order) whose pattern matches
+# wins, so keep specific phrasings above general ones.
+# Named groups become params; "params" holds fixed values for the rule.
+
+# A "when" slot starts at a real time expression, so prepositions inside the
+# message stay in it: "check in with dana tomorrow", "put the milk in the fridge at 5".
+# RuleMatcher also drops a match whose "when" tasks.time_parser can't read.
+_HOURS_EN = r"(?:\d|one|two|three|four|five|six|seven|eight|nine|ten|eleven|twelve|noon|midnight)"
+_UNITS_EN = r"(?:seconds?|minutes?|hours?|days?|weeks?)"
+_AMOUNT_EN = (rf"(?:\d+ ?{_UNITS_EN}|(?:a|an|one|two|three|four|five|six|seven|eight|nine|ten|fifteen|twenty|thirty"
+              rf"|forty five|a few|half an?) {_UNITS_EN}|half an hour)")
+_DAYS_EN = r"(?:monday|tuesday|wednesday|thursday|friday|saturday|sunday)"
+_PARTS_EN = r"(?:morning|afternoon|evening|night)"
+_WHEN_EN = (rf"(?P<when>(?:(?:at|by) {_HOURS_EN}|in {_AMOUNT_EN}|in the {_PARTS_EN}|tomorrow|tonight|day after tomorrow"
+            rf"|(?:this|next) (?:{_PARTS_EN}|{_DAYS_EN})|every (?:day|weekday|{_DAYS_EN}|{_PARTS_EN}|{_UNITS_EN}|{_AMOUNT_EN}|\d)"
+            rf"|on (?:{_DAYS_EN}|the \d))\b.*)")
+_HOURS_HE = r"(?:אחת|שתיים|שלוש|ארבע|חמש|שש|שבע|שמונה|תשע|עשר|אחת עשרה|שתים עשרה)"
+_WHEN_HE = (rf"(?P<when>(?:בעוד|בשעה|מחר|מחרתיים|הערב|היום|בבוקר|בערב|בצהריים|בלילה|ב-?\d|ב{_HOURS_HE}"
+            rf"|כל (?:יום|בוקר|ערב|לילה|שבוע|שעה|חצי|רבע|\d|{_HOURS_HE}|שני|שלישי|רביעי|חמישי|שישי|שבת|ראשון|שעתיים|יומיים))(?![\w]).*)")
+_LIST_EN = r"(?:the |my )?(?:shopping |grocery |todo |to do )?list"
+# "... if it's off": control_device already skips devices known to be in the target state
+_IF_STATE_EN = r"(?: if (?:it'?s|it is|they'?re|they are) (?:on|off))?"
+# "set X to N" only names a device when X ends in a device word; anything else
+# ("set an alarm to 7", "set the timer to 10") is left to GPT
+_CLIMATE_EN = r"(?P<device>(?:.+ )?(?:thermostat|heater|heating|ac|a/c|aircon|air conditioner|air conditioning))"
+_DIMMABLE_EN = r"(?P<device>(?:.+ )?(?:lights?|lamps?|bulbs?|dimmer))"
+
+RULES = [
+    # System commands that share verbs with device control
+    {"intent": "shutdown_system", "keywords": ["shutdown", "shut down", "power off", "כבה", "כיבוי"], "pattern": r"^(?:shut ?down|power off)(?: the system)?$|^(?:כבה|תכבה) את (?:המערכת|עצמך)$|^כיבוי מערכת$|^כבה$"},
+    {"intent": "reboot_system", "keywords": ["reboot", "אתחל את המערכת", "ריבוט"], "pattern": r"^reboot(?: the system| yourself)?$|^אתחל את המערכת$|^(?:תעשה )?ריבוט$"},
+
+    # Device control
+    {"intent": "control_device", "keywords": ["turn", "switch"], "pattern": rf"^(?:please )?(?:turn|switch) (?P<action>on|off) (?:the )?(?P<device>.+?){_IF_STATE_EN}$"},
+    {"intent": "control_device", "keywords": ["turn", "switch"], "pattern": rf"^(?:please )?(?:turn|switch) (?:the )?(?P<device>.+) (?P<action>on|off){_IF_STATE_EN}$"},
+    {"intent": "control_device", "keywords": ["toggle"], "pattern": r"^(?:please )?toggle (?:the )?(?P<device>.+)$", "params": {"action": "toggle"}},
+    {"intent": "control_device", "keywords": ["set "], "pattern": rf"^set (?:the )?{_DIMMABLE_EN} to (?P<value>\d+) ?(?:%|percent)$", "params": {"action": "set_brightness"}},
+    {"intent": "control_device", "keywords": ["set "], "pattern": rf"^set (?:the )?{_CLIMATE_EN} to (?P<value>\d+)(?: ?degrees)?$", "params": {"action": "set_temperature"}},
+    {"intent": "control_device", "keywords": ["הדלק", "הדליק", "תדליק"], "pattern": r"^(?:הדלק|תדליק|הדליקי|תדליקי) (?:את )?(?P<device>.+)$", "params": {"action": "on"}},
+    {"intent": "control_device", "keywords": ["כבה", "כבי"], "pattern": r"^(?:כבה|תכבה|כבי|תכבי) (?:את )?(?P<device>.+)$", "params": {"action": "off"}},
+
+    # Scenes (several devices in one command)
+    {"intent": "run_scene", "keywords": ["good night", "goodnight", "לילה טוב"], "pattern": r"^(?:good ?night|לילה טוב)(?: ziggy| זיגי)?$", "params": {"scene": "good_night"}},
+    {"intent": "run_scene", "keywords": ["home", "הביתה", "בבית"], "pattern": r"^(?:i'?m|i am) (?:back )?home$|^(?:הגעתי הביתה|אני בבית)$", "params": {"scene": "im_home"}},
+    {"intent": "run_scene", "keywords": ["scene", "routine"], "pattern": r"^(?:run|activate|start) (?:the )?(?P<scene>.+?) (?:scene|routine)$"},
+    {"intent": "run_scene", "keywords": ["סצנ", "תרחיש"], "pattern": r"^(?:הפעל|תפעיל|הפעילי|תפעילי) (?:את )?(?:ה)?(?:סצנה|סצנת|תרחיש) (?P<scene>.+)$"},
+
+    # Device state questions (answered from memory)
+    {"intent": "get_device_state", "keywords": ["is ", "are "], "pattern": r"^(?:is|are) (?:the )?(?P<device>.+?) (?P<state>on|off)$"},
+    {"intent": "get_device_state", "keywords": ["דולק", "כבוי", "דלוק"], "pattern": r"^(?:האם )?(?:ה)?(?P<device>.+?) (?:דולק|דלוק|דולקת)$", "params": {"state": "on"}},
+    {"intent": "get_device_state", "keywords": ["דולק", "כבוי", "דלוק"], "pattern": r"^(?:האם )?(?:ה)?(?P<device>.+?) (?:כבוי|כבויה)$", "params": {"state": "off"}},
+
+    # Lists
+    {"intent": "add_to_list", "keywords": ["add ", "put "], "pattern": rf"^(?:please )?(?:add|put) (?P<item>.+) (?:to|on) {_LIST_EN}$"},
+    {"intent": "add_to_list", "keywords": ["לרשימ", "ברשימה"], "pattern": r"^(?:תוסיף|הוסף|תוסיפי|תרשום|רשום) (?:את )?(?P<item>.+) (?:לרשימה|לרשימת הקניות|ברשימה)$"},
+    {"intent": "remove_from_list", "keywords": ["remove", "delete", "take"], "pattern": rf"^(?:please )?(?:remove|delete|take) (?P<item>.+) (?:from|off) {_LIST_EN}$"},
+    {"intent": "remove_from_list", "keywords": ["מהרשימה", "מרשימת"], "pattern": r"^(?:תוריד|הורד|תסיר|הסר|מחק|תמחק) (?:את )?(?P<item>.+) (?:מהרשימה|מרשימת הקניות)$"},
+
+    # Reminders and tasks
+    {"intent": "set_reminder", "keywords": ["remind me"], "pattern": rf"^remind me (?:to )?(?P<message>.+?) {_WHEN_EN}$"},
+    {"intent": "set_reminder", "keywords": ["תזכיר"], "pattern": rf"^(?:תזכיר|תזכירי) לי (?P<message>.+?) {_WHEN_HE}$"},
+    {"intent": "create_task", "keywords": ["task"], "pattern": rf"^(?:create|add|make) a task (?:to )?(?P<description>.+?) {_WHEN_EN}$"},
+    {"intent": "create_task", "keywords": ["משימה"], "pattern": rf"^(?:צור|תיצור|תוסיף) משימה (?P<description>.+?) {_WHEN_HE}$"},
+    {"intent": "cancel_task", "keywords": ["task"], "pattern": r"^(?:cancel|delete) (?:the )?task (?:to )?(?P<description>.+)$"},
+    {"intent": "cancel_task", "keywords": ["המשימה"], "pattern": r"^(?:בטל|תבטל|מחק|תמחק) את המשימה (?P<description>.+)$"},
+
+    # Memory
+    {"intent": "save_memory", "keywords": ["remember"], "pattern": r"^remember (?:that )?(?P<topic>.+?) (?:is|are) (?P<content>.+)$"},
+    {"intent": "save_memory", "keywords": ["תזכור", "תזכרי"], "pattern": r"^(?:תזכור|תזכרי) ש(?P<topic>.+?) (?:הוא|היא|הם|זה) (?P<content>.+)$"},
+    {"intent": "ask_memory", "keywords": ["remember", "know"], "pattern": r"^what do you (?:remember|know) about (?P<topic>.+)$"},
+    {"intent": "ask_memory", "keywords": ["זוכר", "יודע"], "pattern": r"^מה (?:אתה|את) (?:זוכר|זוכרת|יודע|יודעת) על (?P<topic>.+)$"},
+
+    # Simple intents
+    {"intent": "play_music", "keywords": ["play", "נגן", "תשמיע"], "pattern": r"^play (?:some )?music$|^(?:תנגן|נגן|תשמיע) (?:מוזיקה|שיר)$"},
+    {"intent": "play_music", "keywords": ["play", "נגן", "תשמיע"], "pattern": r"^play (?P<song>.+)$|^(?:תנגן|נגן|תשמיע) (?:את )?(?P<song_he>.+)$"},
+    {"intent": "generate_idea", "keywords": ["idea", "רעיון"], "pattern": r"^give me an idea(?: (?:for|about) (?P<topic>.+))?$|^(?:תן|תני) לי רעיון(?: (?:ל|על) ?(?P<topic_he>.+))?$"},
+    {"intent": "exit", "keywords": ["bye", "exit", "quit", "להתראות", "ביי"], "pattern": r"^(?:goodbye|bye(?: bye)?(?: ziggy)?|exit|quit|להתראות(?: זיגי)?|ביי)$"},
+    {"intent": "get_status", "keywords": ["status", "סטטוס", "דוח מצב"], "pattern": r"^(?:status|system status|status report|מה הסטטוס|דוח מצב)$"},
+    {"intent": "debug_diagnostics", "keywords": ["diagnostics", "אבחון"], "pattern": r"\bdiagnostics\b|אבחון"},
+    {"intent": "get_time", "keywords": ["time", "שעה"], "pattern": r"\b(?:what.*time|current time|ה?שעה)\b"},
+    {"intent": "get_date", "keywords": ["date", "תאריך"], "pattern": r"\b(?:what.*date|today's date|ה?תאריך)\b"},
+    {"intent": "get_weather", "keywords": ["weather", "מזג"], "pattern": r"\bweather (?:in|for|at) (?!(?:the )?(?:morning|afternoon|evening|night|weekend)\b)(?P<location>[^?]+)|מזג ה?אוויר ב(?:־|-)?(?!(?:בוקר|ערב|צהריים|לילה|סופ\S*)(?!\w))(?P<location_he>[^?\s][^?]*)"},
+    {"intent": "get_weather", "keywords": ["weather", "מזג"], "pattern": r"\bweather\b|מזג אוויר|מזג האוויר"},
+    {"intent": "tell_joke", "keywords": ["joke", "בדיחה"], "pattern": r"\bjoke\b|בדיחה"},
+    {"intent": "tell_fact", "keywords": ["fact", "עובדה"], "pattern": r"\bfact\b|עובדה"},
+    {"intent": "restart", "keywords": ["restart", "אתחל"], "pattern": r"\brestart\b|אתחל"},
+]
+
+# Hebrew alternatives use a suffixed group name so both spellings of a rule
+# can coexist in one pattern; the suffix is dropped on extraction.
+_SLOT_SUFFIX = "_he"
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton mapping every keyword found in a text to its payloads."""
+
+    def __init__(self, keywords):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [set()]
+        for keyword, payload in keywords:
+            state = 0
+            for char in keyword:
+                nxt = self.goto[state].get(char)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][char] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(set())
+                state = nxt
+            self.output[state].add(payload)
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self.goto[state].items():
+                queue.append(nxt)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[nxt] = self.goto[fallback].get(char, 0)
+                self.output[nxt] |= self.output[self.fail[nxt]]
+
+    def scan(self, text):
+        goto, fail, output = self.goto, self.fail, self.output
+        found = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found |= output[state]
+        return found
+
+class RuleMatcher:
+    """One keyword scan selects candidate rules; only those regexes run."""
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.patterns = [re.compile(rule["pattern"]) for rule in rules]
+        self.automaton = KeywordAutomaton(
+            (keyword, idx) for idx, rule in enumerate(rules) for keyword in rule["keywords"]
+        )
+
+    def match(self, text):
+        for idx in sorted(self.automaton.scan(text)):
+            m = self.patterns[idx].search(text)
+            if m:
+                rule = self.rules[idx]
+                params = dict(rule.get("params", {}))
+                for slot, value in m.groupdict().items():
+                    if value:
+                        params[slot.removesuffix(_SLOT_SUFFIX)] = value.strip()
+                if "when" in params and not _is_time(params["when"]):
+                    continue  # "remind me to X at the bank": leave it to the next tier
+                return {"intent": rule["intent"], "params": params}
+        return None
+
+def _is_time(when):
+    from tasks.time_parser import parse_when
+    return parse_when(when) is not None
+
+matcher = RuleMatcher(RULES)
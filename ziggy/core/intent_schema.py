@@ -0,0 +1,136 @@
+import json
+
+# Machine-readable intent catalogue for the GPT fallback. Built once at import:
+# a compact system prompt that never changes between calls (so it is sent as a
+# stable prefix the API can cache) and a forced function call, so the model
+# answers with arguments instead of free-form text. Results are validated and
+# coerced here before they reach the handlers.
+
+# intent -> {param: spec}; spec keys: "required" (bool), "enum" (allowed values)
+INTENTS = {
+    "get_time": {},
+    "get_date": {},
+    "get_weather": {"location": {}},
+    "control_device": {
+        "device": {"required": True},
+        "action": {"required": True, "enum": ["on", "off", "toggle", "set_brightness", "set_temperature"]},
+        "value": {},
+    },
+    "run_scene": {"scene": {"required": True}},
+    "get_device_state": {"device": {"required": True}, "state": {"enum": ["on", "off"]}},
+    "add_to_list": {"item": {"required": True}},
+    "remove_from_list": {"item": {"required": True}},
+    "create_task": {"description": {"required": True}, "when": {}},
+    "cancel_task": {"description": {"required": True}},
+    "ask_memory": {"topic": {"required": True}},
+    "save_memory": {"topic": {"required": True}, "content": {"required": True}},
+    "read_file": {"filename": {"required": True}},
+    "write_file": {"filename": {"required": True}, "content": {"required": True}},
+    "tell_joke": {},
+    "tell_fact": {},
+    "generate_idea": {"topic": {}},
+    "get_status": {},
+    "exit": {},
+    "restart": {},
+    "run_ifttt": {"event": {"required": True}, "value1": {}},
+    "switch_mode": {"mode": {"required": True}},
+    "ask_buddy": {"question": {"required": True}},
+    "set_reminder": {"message": {"required": True}, "when": {"required": True}},
+    "play_music": {"song": {}},
+    "ask_health": {"issue": {"required": True}},
+    "debug_diagnostics": {},
+    "translate": {"text": {"required": True}, "target_lang": {"required": True}},
+    "shutdown_system": {},
+    "reboot_system": {},
+    "chat_with_gpt": {"text": {"required": True}},
+    "unknown": {},
+}
+
+TOOL_NAME = "set_intent"
+
+def _catalogue_line(intent, params):
+    parts = []
+    for name, spec in params.items():
+        label = name if spec.get("required") else f"{name}?"
+        if spec.get("enum"):
+            label += "=" + "|".join(spec["enum"])
+        parts.append(label)
+    return f"{intent}({', '.join(parts)})"
+
+SYSTEM_PROMPT = (
+    "You route requests for Ziggy, a bilingual (Hebrew/English) smart home assistant. "
+    f"Call {TOOL_NAME} with the user's intent and its params. Params are strings, copied from the "
+    "user's words in their language; omit unknown optional ones (? = optional). "
+    "control_device value is a number or level, e.g. 50 for 'set the lamp to 50 percent'. "
+    "Use chat_with_gpt for open conversation and unknown if nothing fits.\n"
+    "Intents:\n" + "\n".join(_catalogue_line(intent, params) for intent, params in INTENTS.items())
+)
+
+# The catalogue lives in the system prompt only; repeating it as enums in the
+# function schema would double the input tokens. validate() enforces it instead.
+TOOLS = [{
+    "type": "function",
+    "function": {
+        "name": TOOL_NAME,
+        "parameters": {
+            "type": "object",
+            "properties": {"intent": {"type": "string"}, "params": {"type": "object"}},
+            "required": ["intent", "params"],
+        },
+    },
+}]
+
+TOOL_CHOICE = {"type": "function", "function": {"name": TOOL_NAME}}
+
+def build_messages(text):
+    # The system message is the same object every call; only the user turn varies
+    return [{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": text}]
+
+def extract_arguments(message):
+    """Pull the intent JSON out of a chat completion message (tool call or plain content)."""
+    tool_calls = getattr(message, "tool_calls", None)
+    raw = tool_calls[0].function.arguments if tool_calls else (message.content or "")
+    raw = raw.strip()
+    if raw.startswith("```"):
+        # Models sometimes fence JSON even when asked not to
+        raw = raw.strip("`").split("\n", 1)[-1]
+    start, end = raw.find("{"), raw.rfind("}")
+    if start == -1 or end == -1:
+        raise ValueError(f"no JSON object in reply: {raw[:80]!r}")
+    return json.loads(raw[start:end + 1])
+
+def validate(result):
+    """Coerce a model result into {"intent", "params"} with only known, string-valued params.
+
+    A result lacking required params also carries "missing" (their names): it is
+    still dispatched, but intent_parser neither caches nor learns from it.
+    """
+    if not isinstance(result, dict):
+        return {"intent": "unknown", "params": {}}
+    intent = str(result.get("intent") or "unknown").strip().lower()
+    spec = INTENTS.get(intent)
+    if spec is None:
+        return {"intent": "unknown", "params": {}}
+    raw_params = result.get("params")
+    if not isinstance(raw_params, dict):
+        raw_params = {}
+    params = {}
+    for name, param_spec in spec.items():
+        value = raw_params.get(name)
+        if value is None or isinstance(value, (dict, list)):
+            continue
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        value = str(value).strip()
+        if not value:
+            continue
+        if param_spec.get("enum"):
+            value = value.lower().replace(" ", "_")
+            if value not in param_spec["enum"]:
+                continue
+        params[name] = value
+    missing = [name for name, param_spec in spec.items() if param_spec.get("required") and name not in params]
+    if missing:
+        print(f"[INTENT SCHEMA] {intent} missing {', '.join(missing)}")
+        return {"intent": intent, "params": params, "missing": missing}
+    return {"intent": intent, "params": params}
@@ -0,0 +1,191 @@
+import json
+import time
+import threading
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from config.settings import settings
+
+# Shared LLM service: one OpenAI client (so one keep-alive connection pool)
+# for every call site, with per-call deadlines, a hedged second attempt when
+# the first is slow, coalescing of identical in-flight requests, streaming,
+# and per-model latency/token counters.
+
+class LLMError(Exception):
+    pass
+
+class LLMService:
+    def __init__(self, api_key, base_url=None, timeout=15.0, hedge_after=2.5, max_attempts=2,
+                 max_workers=8):
+        self.timeout = timeout
+        self.hedge_after = hedge_after
+        self.max_attempts = max_attempts
+        from openai import OpenAI  # Heavy import (~1 s on a Pi): paid on first use, not at boot
+        # Retries are ours (hedged), so the SDK must not add its own backoff
+        self.client = OpenAI(api_key=api_key, base_url=base_url, timeout=timeout, max_retries=0)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm")
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        self._metrics = defaultdict(lambda: {
+            "calls": 0, "errors": 0, "hedges": 0, "coalesced": 0,
+            "latency_total": 0.0, "prompt_tokens": 0, "completion_tokens": 0,
+        })
+        self._metrics_lock = threading.Lock()
+
+    # ── Public API ───────────────────────────────────────────────
+    def complete(self, messages, model="gpt-3.5-turbo", timeout=None, **kwargs):
+        """Return the full chat completion response object."""
+        key = json.dumps({"model": model, "messages": messages, **kwargs}, sort_keys=True, default=str)
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+        if not owner:
+            # Same request already on the wire: share its answer
+            self._record(model, coalesced=1)
+            return future.result()
+        try:
+            future.set_result(self._hedged(messages, model, timeout or self.timeout, kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+        return future.result()
+
+    def chat(self, messages, model="gpt-3.5-turbo", timeout=None, **kwargs):
+        """Return the reply text of a chat completion."""
+        response = self.complete(messages, model=model, timeout=timeout, **kwargs)
+        return (response.choices[0].message.content or "").strip()
+
+    def stream(self, messages, model="gpt-3.5-turbo", timeout=None, **kwargs):
+        """Yield reply text deltas as they arrive."""
+        start = time.time()
+        first_token = None
+        try:
+            chunks = self.client.chat.completions.create(
+                model=model, messages=messages, stream=True, timeout=timeout or self.timeout, **kwargs
+            )
+            for chunk in chunks:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    if first_token is None:
+                        first_token = time.time() - start
+                        print(f"[LLM] {model} first token after {first_token:.2f}s")
+                    yield delta
+        except Exception:
+            self._record(model, errors=1)
+            raise
+        self._record(model, calls=1, latency=time.time() - start)
+
+    def warm(self):
+        """Open the pooled connection (DNS + TLS) before the first real request."""
+        try:
+            self.client.models.list(timeout=self.timeout)
+            print("[LLM] Connection warmed.")
+        except Exception as e:
+            print(f"[LLM] Warm-up failed: {e}")
+
+    def close(self):
+        """Release the worker threads and connections once in-flight calls are done (blocks)."""
+        deadline = time.time() + self.timeout * self.max_attempts
+        while self._inflight and time.time() < deadline:
+            time.sleep(0.1)
+        self._pool.shutdown(wait=True)
+        self.client.close()
+
+    def stats(self):
+        with self._metrics_lock:
+            result = {}
+            for model, m in self._metrics.items():
+                result[model] = dict(m)
+                result[model]["avg_latency_ms"] = m["latency_total"] / m["calls"] * 1000 if m["calls"] else 0.0
+            return result
+
+    # ── Internals ────────────────────────────────────────────────
+    def _attempt(self, messages, model, timeout, kwargs):
+        return self.client.chat.completions.create(model=model, messages=messages, timeout=timeout, **kwargs)
+
+    def _hedged(self, messages, model, timeout, kwargs):
+        start = time.time()
+        deadline = start + timeout
+        attempts = {self._pool.submit(self._attempt, messages, model, timeout, kwargs)}
+        launched = 1
+        last_error = None
+        while attempts:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            # Until the hedge fires, only wait hedge_after for the first attempt
+            wait_for = min(remaining, self.hedge_after) if launched < self.max_attempts else remaining
+            done, attempts = wait(attempts, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    response = future.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                usage = getattr(response, "usage", None)
+                self._record(
+                    model, calls=1, latency=time.time() - start,
+                    prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+                    completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+                )
+                return response
+            # Slow or failed first attempt: fire one more while time remains
+            if launched < self.max_attempts and deadline - time.time() > 0:
+                attempts.add(self._pool.submit(
+                    self._attempt, messages, model, max(0.1, deadline - time.time()), kwargs
+                ))
+                launched += 1
+                self._record(model, hedges=1)
+        self._record(model, errors=1)
+        raise LLMError(f"{model} request failed: {last_error or 'deadline exceeded'}")
+
+    def _record(self, model, calls=0, errors=0, hedges=0, coalesced=0, latency=0.0,
+                prompt_tokens=0, completion_tokens=0):
+        with self._metrics_lock:
+            m = self._metrics[model]
+            m["calls"] += calls
+            m["errors"] += errors
+            m["hedges"] += hedges
+            m["coalesced"] += coalesced
+            m["latency_total"] += latency
+            m["prompt_tokens"] += prompt_tokens
+            m["completion_tokens"] += completion_tokens
+
+_llm = None
+_llm_lock = threading.Lock()
+
+def get_llm():
+    """The shared LLM service, built from settings on first use."""
+    global _llm
+    with _llm_lock:
+        if _llm is None:
+            llm_settings = settings.get("llm", {})
+            base_url = llm_settings.get("base_url")
+            if llm_settings.get("fake_server"):
+                from core.fake_llm_server import start_fake_server
+                base_url = start_fake_server()
+            _llm = LLMService(
+                api_key=settings["openai"]["api_key"],
+                base_url=base_url,
+                timeout=llm_settings.get("timeout", 15.0),
+                hedge_after=llm_settings.get("hedge_after", 2.5),
+                max_attempts=llm_settings.get("max_attempts", 2),
+            )
+        return _llm
+
+def set_llm(service):
+    """Swap the shared service (e.g. one pointed at the fake server in benchmarks).
+
+    The old service is closed in the background, after its in-flight calls finish.
+    """
+    global _llm
+    with _llm_lock:
+        old, _llm = _llm, service
+    if old is not None and old is not service:
+        threading.Thread(target=old.close, name="llm-close", daemon=True).start()
@@ -0,0 +1,227 @@
+import signal
+import asyncio
+import threading
+import concurrent.futures
+from concurrent.futures import ThreadPoolExecutor
+
+from core.intent_registry import registry, ReplyContext, KIND_INLINE, KIND_CPU, KIND_BLOCKING, FALLBACK_INTENT
+
+# One asyncio core for the whole assistant. The supervisor owns the event
+# loop and starts every frontend on it: the voice loop (capture and STT run on
+# a dedicated worker thread), the Telegram Application (same loop, no second
+# event loop) and MQTT (socket driven by the loop). Nothing blocking runs on
+# the loop itself: parsing and handlers go to executors picked by the
+# handler's declared kind. Crashed services are restarted with backoff, and
+# SIGINT/SIGTERM or the "exit" intent shut everything down in order.
+
+class DaemonWorker:
+    """Single daemon thread executor, for calls that may block forever (mic reads)."""
+
+    def __init__(self, name):
+        self._jobs = []
+        self._ready = threading.Condition()
+        threading.Thread(target=self._run, name=name, daemon=True).start()
+
+    def submit(self, func, *args):
+        future = concurrent.futures.Future()
+        with self._ready:
+            self._jobs.append((future, func, args))
+            self._ready.notify()
+        return future
+
+    def _run(self):
+        while True:
+            with self._ready:
+                self._ready.wait_for(lambda: self._jobs)
+                future, func, args = self._jobs.pop(0)
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(func(*args))
+            except BaseException as e:
+                future.set_exception(e)
+
+def daemon_call(name, func, *args):
+    """Run func once on its own daemon thread; returns a concurrent Future."""
+    future = concurrent.futures.Future()
+
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(func(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name=name, daemon=True).start()
+    return future
+
+class ZiggyRuntime:
+    def __init__(self, voice=None, devices=None, telegram=False, warmups=(), io_workers=4):
+        self.voice = voice
+        self.devices = devices
+        self.telegram = telegram
+        self.warmups = list(warmups)  # Blocking boot jobs (prerender, connection warm-up) run off the loop
+        self.io_pool = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="ziggy-io")
+        # CPU-bound Python gains nothing from more threads under the GIL; one
+        # worker keeps it from starving capture and playback on the Pi
+        self.cpu_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ziggy-cpu")
+        self.voice_worker = DaemonWorker("ziggy-voice")
+        self.loop = None
+        self._stopping = None
+        self._tasks = {}
+        self._telegram_app = None
+
+    # ── Command handling ─────────────────────────────────────────
+    async def handle_text(self, text, lang="en", source="voice", voice=None, user=None):
+        """Parse and dispatch off the loop; returns the ReplyContext."""
+        from core import intent_parser
+        parsed = await self.loop.run_in_executor(self.io_pool, intent_parser.parse, text)
+        intent = parsed.get("intent", FALLBACK_INTENT)
+        params = parsed.get("params", {})
+        print(f"[INTENT] {intent} | Params: {params} ({source})")
+        context = ReplyContext(lang, source, voice, registry.services, user)
+        kind = registry.kind(intent)
+        if kind == KIND_INLINE:
+            registry.dispatch(intent, params, context)
+        elif kind == KIND_BLOCKING:
+            # May never return (restart, shutdown); must not hold a pool worker
+            await asyncio.wrap_future(daemon_call(f"ziggy-{intent}", registry.dispatch, intent, params, context))
+        else:
+            pool = self.cpu_pool if kind == KIND_CPU else self.io_pool
+            await self.loop.run_in_executor(pool, registry.dispatch, intent, params, context)
+        return context
+
+    def send_telegram(self, chat_ids, text):
+        """Thread-safe: send text to Telegram chats through the running bot; False if it isn't running."""
+        app = self._telegram_app
+        if not (app and self.loop and chat_ids):
+            return False
+        for chat_id in chat_ids:
+            asyncio.run_coroutine_threadsafe(self._send_telegram(app, chat_id, text), self.loop)
+        return True
+
+    async def _send_telegram(self, app, chat_id, text):
+        try:
+            await app.bot.send_message(chat_id=chat_id, text=text)
+        except Exception as e:
+            print(f"[RUNTIME] Telegram send to {chat_id} failed: {e}")
+
+    def restart_service(self, name):
+        """Thread-safe: (re)start a service (e.g. "telegram") with current settings, stopping it first if running."""
+        if self.loop:
+            asyncio.run_coroutine_threadsafe(self._restart_service(name), self.loop)
+
+    async def _restart_service(self, name):
+        factories = {"voice": self._voice_service, "telegram": self._telegram_service}
+        task = self._tasks.pop(name, None)
+        if task:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)  # Let it release sockets/mic first
+        if not self._stopping.is_set():
+            self._tasks[name] = asyncio.create_task(self._supervise(name, factories[name]))
+            print(f"[RUNTIME] {'Restarted' if task else 'Started'} {name}")
+
+    def request_shutdown(self):
+        """Thread-safe: begin a graceful shutdown."""
+        if self.loop and self._stopping:
+            self.loop.call_soon_threadsafe(self._stopping.set)
+
+    # ── Services ─────────────────────────────────────────────────
+    async def _voice_service(self):
+        voice = self.voice
+        while True:
+            lang = await asyncio.wrap_future(self.voice_worker.submit(voice.listen_for_wake_word))
+            if not lang:
+                continue
+            voice.acknowledge(lang)
+            command = await asyncio.wrap_future(self.voice_worker.submit(voice.listen_for_command))
+            if command:
+                text, lang = command
+                await self.handle_text(text, lang, source="voice", voice=voice)
+
+    async def _telegram_service(self):
+        from config.settings import settings
+        from integrations.telegram_bot import build_application
+        from integrations.telegram_webhook import start_updates, watch_webhook
+        app = build_application()
+        self._telegram_app = app
+        receiver = None
+        await app.initialize()
+        await app.start()
+        try:
+            receiver = await start_updates(app, settings["telegram"].get("webhook"))
+            if receiver:
+                await watch_webhook(app, receiver)  # Returns only after falling back to polling
+            await asyncio.Event().wait()  # Runs until cancelled
+        finally:
+            if receiver:
+                await receiver.stop()
+            await self._stop_telegram()
+
+    async def _stop_telegram(self):
+        app, self._telegram_app = self._telegram_app, None
+        if not app:
+            return
+        try:
+            if app.updater and app.updater.running:
+                await app.updater.stop()
+            if app.running:
+                await app.stop()
+            await app.shutdown()
+        except Exception as e:
+            print(f"[RUNTIME] Telegram shutdown error: {e}")
+
+    async def _supervise(self, name, factory, max_backoff=60):
+        backoff = 1
+        while True:
+            try:
+                await factory()
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[RUNTIME] {name} crashed: {e}; restarting in {backoff}s")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, max_backoff)
+
+    # ── Lifecycle ────────────────────────────────────────────────
+    async def run(self):
+        self.loop = asyncio.get_running_loop()
+        self.loop.set_default_executor(self.io_pool)
+        self._stopping = asyncio.Event()
+        registry.services["runtime"] = self
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                self.loop.add_signal_handler(sig, self._stopping.set)
+            except (NotImplementedError, RuntimeError):
+                pass  # Not on the main thread / platform without signal support
+
+        for warmup in self.warmups:
+            self.loop.run_in_executor(self.io_pool, warmup)
+        if self.devices:
+            await self.devices.connect_async(self.loop)
+        if self.voice and self.voice.microphone:
+            self._tasks["voice"] = asyncio.create_task(self._supervise("voice", self._voice_service))
+        if self.telegram:
+            self._tasks["telegram"] = asyncio.create_task(self._supervise("telegram", self._telegram_service))
+        print(f"[RUNTIME] Running: {', '.join(self._tasks) or 'no services'}")
+
+        await self._stopping.wait()
+        await self.shutdown()
+
+    async def shutdown(self):
+        print("[RUNTIME] Shutting down…")
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks.clear()
+        if self.devices:
+            self.devices.disconnect()
+        if self.voice:
+            # Let the last reply (e.g. "Goodbye") finish before releasing audio
+            await self.loop.run_in_executor(None, self.voice.wait_until_done, 5)
+            self.voice.close()
+        self.io_pool.shutdown(wait=False, cancel_futures=True)
+        self.cpu_pool.shutdown(wait=False, cancel_futures=True)
+        print("[RUNTIME] Stopped.")
@@ -5,9 +5,9 @@ Ziggy 1.0 – main entry point
 import sys
 import os
 import time
+import asyncio
 import threading
-from datetime import datetime
-import pytz
+from concurrent.futures import ThreadPoolExecutor
 
 import contextlib
 
@@ -43,237 +43,144 @@ time.tzset()
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 sys.path.insert(0, BASE_DIR)
 
-# ✅ Import settings
-from core.intent_parser import settings # Assuming settings is still here
+# ── Boot profiling (`--profile-boot`) ───────────────────────────────────────────
+# Enabled before anything heavy is imported so every module shows up in the tree.
+# restart keeps sys.argv, so a restarted Ziggy profiles its boot again.
+from core.boot_profiler import profiler
+if "--profile-boot" in sys.argv:
+    profiler.enable()
 
 # ── Core Ziggy modules ──────────────────────────────────────────────────────────
-from voice.voice_interface import VoiceAssistant
-from core import intent_parser
-from memory import memory_manager
-from smart_home.device_controller import MqttDeviceController # Modified import
-from integrations import ifttt_handler
-from tasks import task_manager
-from files import file_manager
+# Heavy libraries (openai, gTTS, speech_recognition, numpy) are imported where
+# they are first used, so only what boot needs is loaded here.
+with profiler.stage("imports"):
+    from config.settings import settings
+    from core.llm import get_llm, set_llm
+    from core.intent_registry import registry
+    from core.runtime import ZiggyRuntime
+    from core.handlers import PHRASES
+    from memory import memory_manager
+    from tasks import task_manager
+    from smart_home.device_controller import MqttDeviceController # Modified import
 
 # --- Global variable for MQTT Device Controller ---
 mqtt_device_controller = None
 
-# ── Command router ─────────────────────────────────────────────────────────────
-def handle_command(text: str, lang: str) -> None:
-    parsed = intent_parser.parse(text)
-    intent = parsed.get("intent")
-    params = parsed.get("params", {})
-
-    print(f"[INTENT] {intent} | Params: {params}")
-
-    def say_auto(msg_he, msg_en):
-        voice.say(msg_he if lang == "he" else msg_en)
-
-    if intent == "get_time":
-        say_auto("השעה עכשיו " + datetime.now().strftime("%H:%M"),
-                 "The time is now " + datetime.now().strftime("%H:%M"))
-
-    elif intent == "get_date":
-        say_auto("היום " + datetime.now().strftime("%A, %B %d"),
-                 "Today is " + datetime.now().strftime("%A, %B %d"))
-
-    elif intent == "get_weather":
-        location = params.get("location") or "your location"
-        say_auto(f"מזג האוויר ב־{location} הוא שמשי ונעים",
-                 f"The weather in {location} is sunny and pleasant")
-
-    elif intent == "control_device":
-            device = params.get("device")
-            action = params.get("action")
-            value = params.get("value") # Get the value from params
-
-            if device and action:
-                if mqtt_device_controller: # Check if controller is initialized
-                    # Call the updated control_device with device name, action, and value
-                    mqtt_device_controller.control_device(device, action, value)
-                    # You might want to refine this feedback based on the action and value
-                    say_auto(f"{device} הופעל/כובה", f"{device} command sent: {action} with value {value} (via MQTT)") # Updated feedback
-                else:
-                    say_auto("שליטה על התקנים אינה מופעלת", "Device control is not enabled")
-            else:
-                say_auto("יש לציין שם התקן ופעולה", "Please specify device and action")
-
-    elif intent == "chat_with_gpt":
-        prompt = params.get("text", "")
-        if prompt:
-            from core.chatgpt import get_gpt_reply
-            reply = get_gpt_reply(prompt)
-            voice.say(reply)
-
-    elif intent == "ask_memory":
-        topic = params.get("topic")
-        content = memory_manager.retrieve(topic)
-        if content:
-            voice.say(content)
+# ── Settings hot reload ─────────────────────────────────────────────────────────
+# Sections baked into long-lived objects at boot; everything else is read on use.
+RESTART_SECTIONS = {"mqtt", "conversation", "intent_cache", "intent_classifier"}
+
+def apply_settings(old, new, changed):
+    """Push a reloaded settings.yaml into the running services, keeping audio and MQTT sessions."""
+    voice = registry.services.get("voice")
+    devices = registry.services.get("devices")
+    runtime = registry.services.get("runtime")
+    if changed & {"devices", "scenes"} and devices:
+        devices.update_devices(new.devices, new.scenes, new.state_topics)
+    if "voice" in changed and voice:
+        old_voice, new_voice = old.section("voice"), new.section("voice")
+        if new_voice.get("mic_index") != old_voice.get("mic_index"):
+            voice.set_microphone(new_voice["mic_index"])
+        voice.wake_engine.threshold = new_voice.get("wake_threshold", 0.35)
+        voice.recognition_mode = new_voice.get("recognition_mode", "parallel")
+    if changed & {"openai", "llm"}:
+        set_llm(None)  # Rebuilt from the new settings on next use
+    pending = changed & RESTART_SECTIONS
+    if "telegram" in changed:
+        if runtime and new.section("telegram").get("enabled", True):
+            runtime.restart_service("telegram")
         else:
-            # Fallback to GPT
-            from openai import OpenAI
-            gpt_client = OpenAI(api_key=settings["openai"]["api_key"])
-            try:
-                response = gpt_client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=[{"role": "user", "content": f"Who is {topic}?"}],
-                    temperature=0.5
-                )
-                reply = response.choices[0].message.content.strip()
-                voice.say(reply)
-            except Exception as e:
-                print(f"[GPT Fallback Error] {e}")
-                voice.say("לא הצלחתי למצוא תשובה")
-
-    elif intent == "add_to_list":
-        item = params.get("item")
-        if item:
-            file_manager.add_to_list(item)
-            say_auto(f"{item} נוסף לרשימה", f"{item} added to list")
-
-    elif intent == "remove_from_list":
-        item = params.get("item")
-        if item:
-            file_manager.remove_from_list(item)
-            say_auto(f"{item} הוסר מהרשימה", f"{item} removed from list")
-
-    elif intent == "create_task":
-        desc = params.get("description")
-        when = params.get("when")
-        if desc and when:
-            task_manager.create_task(desc, when)
-            say_auto(f"יצרתי משימה: {desc} ל־{when}", f"Created task: {desc} at {when}")
-
-    elif intent == "cancel_task":
-        desc = params.get("description")
-        if desc:
-            task_manager.cancel_task(desc)
-            say_auto(f"מחקתי את המשימה: {desc}", f"Deleted task: {desc}")
-
-    elif intent == "save_memory":
-        memory_manager.save(params.get("topic"), params.get("content"))
-        say_auto("שמרתי את זה בזיכרון", "Saved to memory")
-
-    elif intent == "read_file":
-        content = file_manager.read(params.get("filename"))
-        say_auto("התוכן הוא: " + content[:200], "The content is: " + content[:200])
-
-    elif intent == "write_file":
-        file_manager.write(params.get("filename"), params.get("content"))
-        say_auto("קובץ עודכן", "File updated")
-
-    elif intent == "tell_joke":
-        say_auto("למה שלדים לא נלחמים אחד בשני? כי אין להם אומץ!",
-                 "Why don’t skeletons fight each other? They don’t have the guts!")
-
-    elif intent == "tell_fact":
-        say_auto("ידעת שלתמנון יש שלושה לבבות?", "Did you know an octopus has three hearts?")
-
-    elif intent == "generate_idea":
-        say_auto("רעיון: לבנות מראה חכמה שמדברת איתך", "Idea: build a smart mirror that talks to you")
-
-    elif intent == "get_status":
-        say_auto("כל המערכות פועלות כראוי", "All systems are operational")
-
-    elif intent == "exit":
-        say_auto("להתראות", "Goodbye")
-        exit(0)
-
-    elif intent == "restart":
-        say_auto("מאתחל...", "Restarting...")
-        os.execv(sys.executable, ['python3'] + sys.argv)
-
-    elif intent in ("run_ifttt", "ifttt_trigger"):
-        ifttt_handler.trigger(params.get("event"), params.get("value1"))
-        say_auto("אירוע IFTTT הופעל", "IFTTT event triggered")
-
-    elif intent == "switch_mode":
-        mode = params.get("mode")
-        say_auto(f"עובר למצב {mode}... (טרם נתמך)", f"Switching to mode {mode}... (not yet supported)")
-
-    elif intent == "ask_buddy":
-        say_auto("אני מקשיב, בוא נדבר על זה", "I'm listening, let's talk about it")
-
-    elif intent == "set_reminder":
-        say_auto(f"תזכורת נקבעה ל־{params.get('when')}: {params.get('message')}",
-                 f"Reminder set for {params.get('when')}: {params.get('message')}")
-
-    elif intent == "play_music":
-        song = params.get("song", "שיר מרגיע")
-        say_auto(f"מנגן {song}... (תמיכה תגיע בהמשך)", f"Playing {song}... (support coming soon)")
-
-    elif intent == "ask_health":
-        say_auto(f"אני לא רופא, אבל הנה מה שמצאתי על {params.get('issue')}...",
-                 f"I'm not a doctor, but here's what I found about {params.get('issue')}...")
-
-    elif intent == "debug_diagnostics":
-        say_auto("מריץ אבחון מערכתי...", "Running diagnostics...")
-
-    elif intent == "translate":
-        say_auto(f"מתרגם '{params.get('text')}' ל־{params.get('target_lang')}...",
-                 f"Translating '{params.get('text')}' to {params.get('target_lang')}...")
-
-    elif intent == "shutdown_system":
-        say_auto("מכבה את המערכת...", "Shutting down the system...")
-        os.system("sudo shutdown now")
-
-    elif intent == "reboot_system":
-        say_auto("מאתחל את המערכת...", "Rebooting the system...")
-        os.system("sudo reboot")
-
-    else:
-        say_auto("לא הבנתי את הבקשה", "I didn't understand the request")
-
-# ── Boot and Threaded Runtime ───────────────────────────────────────────────────
-
-def start_voice_listener():
-    voice.listen_and_process(handle_command)
-
-def start_telegram_bot():
-    from integrations.telegram_bot import run_bot
-    run_bot()
-
-if __name__ == "__main__":
-    print("🚀 Ziggy is booting…")
-
-    suppress_audio_stderr()  # Only suppress during audio startup
-    voice = VoiceAssistant(language="auto", mic_index=settings["voice"]["mic_index"])
+            pending.add("telegram")
+    if pending:
+        print(f"[SETTINGS] {', '.join(sorted(pending))}: takes effect after a restart")
+
+# ── Boot and Runtime ─────────────────────────────────────────────────────────────
+
+def build_voice():
+    with profiler.stage("voice"):
+        from voice.voice_interface import VoiceAssistant
+        from voice.wake_word import WakeWordEngine
+        return VoiceAssistant(
+            language="auto",
+            mic_index=settings["voice"]["mic_index"],
+            recognition_mode=settings["voice"].get("recognition_mode", "parallel"),
+            wake_engine=WakeWordEngine(threshold=settings["voice"].get("wake_threshold", 0.35)),
+            continuous_capture=settings["voice"].get("continuous_capture", True),
+            tts_cache_mb=settings["voice"].get("tts_cache_mb", 50),
+            audio_sink=settings["voice"].get("audio_sink"),
+        )
 
+def build_device_controller():
     # --- MQTT Controller Initialization ---
     # Read MQTT settings and device configurations from settings.yaml
-    mqtt_settings = settings.get("mqtt", {})
-    mqtt_broker_address = mqtt_settings.get("broker_address")
-    mqtt_broker_port = mqtt_settings.get("broker_port", 1883)
-    mqtt_username = mqtt_settings.get("username")
-    mqtt_password = mqtt_settings.get("password")
-    devices_config = settings.get("devices", {}) # Read device configurations
-
-    global mqtt_device_controller
-    if mqtt_broker_address:
-        mqtt_device_controller = MqttDeviceController(
+    with profiler.stage("mqtt controller"):
+        mqtt_settings = settings.get("mqtt", {})
+        mqtt_broker_address = mqtt_settings.get("broker_address")
+        if not mqtt_broker_address:
+            print("[MQTT] MQTT broker address not configured. MQTT device control disabled.")
+            return None
+        controller = MqttDeviceController(
             mqtt_broker_address,
-            mqtt_broker_port,
-            mqtt_username,
-            mqtt_password,
-            devices_config # Pass device configurations
+            mqtt_settings.get("broker_port", 1883),
+            mqtt_settings.get("username"),
+            mqtt_settings.get("password"),
+            settings.get("devices", {}), # Pass device configurations
+            scenes=settings.get("scenes", {}),
         )
-        mqtt_device_controller.connect()
-        print("[MQTT] Attempting to connect to MQTT broker")
-    else:
-        print("[MQTT] MQTT broker address not configured. MQTT device control disabled.")
-    # --- End MQTT Controller Initialization ---
+        print("[MQTT] Will connect to MQTT broker on the runtime loop")
+        return controller
 
+def load_memory():
+    with profiler.stage("memory"):
+        memory_manager.load_memory()
 
-    memory_manager.load_memory()
-    voice.say("זיגי מוכן")
+def warm_intent_parser():
+    # Builds the fuzzy intent classifier before the first command needs it
+    from core.intent_parser import get_classifier
+    get_classifier()
 
-    # The handle_command function uses the global mqtt_device_controller
-    voice_thread = threading.Thread(target=start_voice_listener)
-    telegram_thread = threading.Thread(target=start_telegram_bot)
+# ── Boot and Runtime ─────────────────────────────────────────────────────────────
 
-    voice_thread.start()
-    telegram_thread.start()
+if __name__ == "__main__":
+    print("🚀 Ziggy is booting…")
 
-    voice_thread.join()
-    telegram_thread.join()
+    suppress_audio_stderr()  # Only suppress during audio startup
+    # Voice, MQTT controller and memory don't depend on each other: build them
+    # side by side and speak "ready" as soon as the voice is up.
+    with profiler.stage("subsystems"), ThreadPoolExecutor(max_workers=3, thread_name_prefix="boot") as boot:
+        voice_future = boot.submit(build_voice)
+        devices_future = boot.submit(build_device_controller)
+        memory_future = boot.submit(load_memory)
+        voice = voice_future.result()
+        voice.say(PHRASES["ready"][0])
+        mqtt_device_controller = devices_future.result()
+        memory_future.result()
+    profiler.mark("ready queued")
+    if profiler.enabled:
+        def time_ready():
+            voice.wait_until_done(30)
+            profiler.mark("ready spoken")
+        threading.Thread(target=profiler.track("speak ready", time_ready), daemon=True).start()
+
+    registry.services["voice"] = voice
+    registry.services["devices"] = mqtt_device_controller
+    system_phrases = [(he, "he") for he, _ in PHRASES.values()] + [(en, "en") for _, en in PHRASES.values()]
+
+    warmups = [
+        ("prerender phrases", lambda: voice.prerender(system_phrases)),
+        ("llm warm", get_llm().warm),
+        ("handler prewarm", registry.prewarm),
+        ("scheduler", task_manager.start),  # Replays its journal, catches up missed reminders
+        ("memory index", memory_manager.build_index),
+        ("intent classifier", warm_intent_parser),
+    ]
+    runtime = ZiggyRuntime(
+        voice=voice,
+        devices=mqtt_device_controller,
+        telegram=settings.get("telegram", {}).get("enabled", True),
+        warmups=[profiler.track(name, func) for name, func in warmups],
+    )
+    profiler.report_when_idle()
+    settings.subscribe(apply_settings)
+    settings.watch()
+    asyncio.run(runtime.run())
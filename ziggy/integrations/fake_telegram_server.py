@@ -0,0 +1,185 @@
+import json
+import time
+import threading
+import urllib.request
+from urllib.parse import parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Minimal local stand-in for the Telegram Bot API, for benchmarks and offline
+# runs. It serves getUpdates from an injected message queue and records every
+# sendMessage with a timestamp, so end-to-end reply latency can be measured
+# without the network. Point the bot at it with build_application(base_url=...).
+# Once setWebhook is called, new messages are POSTed to the webhook instead,
+# with the secret token header, like the real service.
+
+class FakeTelegramServer:
+    def __init__(self, port=0):
+        self.updates = []
+        self.replies = []        # {"chat_id", "text", "at", "reply_to"}
+        self.chat_actions = 0
+        self.sent_at = {}        # message_id -> time the user "sent" it
+        self.webhook_url = None
+        self.webhook_secret = None
+        self.webhook_errors = 0
+        self.last_error_date = None
+        self.calls = {}          # Bot API method -> request count
+        self._next_update = 1
+        self._next_message = 1
+        self._changed = threading.Condition()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                self._handle({})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                raw = self.rfile.read(length).decode("utf-8") if length else ""
+                if self.headers.get("Content-Type", "").startswith("application/json"):
+                    params = json.loads(raw or "{}")
+                else:
+                    params = {k: _decode(v[0]) for k, v in parse_qs(raw).items()}
+                self._handle(params)
+
+            def _handle(self, params):
+                method = self.path.rsplit("/", 1)[-1].split("?")[0]
+                result = server.call(method, params)
+                data = json.dumps({"ok": True, "result": result}).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                # One request per connection: http.server's keep-alive handling
+                # races with pooled async clients and drops the odd response
+                self.send_header("Connection", "close")
+                self.end_headers()
+                try:
+                    self.wfile.write(data)
+                except BrokenPipeError:
+                    pass  # Client gave up on a long poll (bot shutting down)
+
+        self._http = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self._http.daemon_threads = True
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self._http.server_address[1]}/bot"
+
+    def start(self):
+        threading.Thread(target=self._http.serve_forever, name="fake-telegram", daemon=True).start()
+        return self.base_url
+
+    def stop(self):
+        self._http.shutdown()
+
+    # ── Test driver API ──────────────────────────────────────────
+    def make_update(self, chat_id, text):
+        """Build (and time-stamp) a text message update."""
+        with self._changed:
+            update_id, message_id = self._next_update, self._next_message
+            self._next_update += 1
+            self._next_message += 1
+            self.sent_at[message_id] = time.time()
+        return {
+            "update_id": update_id,
+            "message": {
+                "message_id": message_id, "date": int(time.time()), "text": text,
+                # Negative ids are groups, where replies quote the message they answer
+                "chat": {"id": chat_id, "type": "group" if chat_id < 0 else "private"},
+                "from": {"id": abs(chat_id), "is_bot": False, "first_name": f"user{abs(chat_id)}"},
+            },
+        }
+
+    def push_message(self, chat_id, text):
+        """Deliver a message: POST it to the webhook if set, else queue it for getUpdates."""
+        update = self.make_update(chat_id, text)
+        if self.webhook_url:
+            threading.Thread(target=self._deliver, args=(update,), daemon=True).start()
+        else:
+            with self._changed:
+                self.updates.append(update)
+                self._changed.notify_all()
+        return update
+
+    def _deliver(self, update):
+        request = urllib.request.Request(
+            self.webhook_url, data=json.dumps(update).encode("utf-8"), method="POST",
+            headers={"Content-Type": "application/json",
+                     "X-Telegram-Bot-Api-Secret-Token": self.webhook_secret or ""},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=10) as response:
+                response.read()
+        except Exception:
+            # Like Telegram: record the error and keep the update for getUpdates
+            with self._changed:
+                self.webhook_errors += 1
+                self.last_error_date = int(time.time())
+                self.updates.append(update)
+                self._changed.notify_all()
+
+    def wait_for_replies(self, count, timeout=30):
+        with self._changed:
+            return self._changed.wait_for(lambda: len(self.replies) >= count, timeout)
+
+    # ── Bot API methods ──────────────────────────────────────────
+    def call(self, method, params):
+        with self._changed:
+            self.calls[method] = self.calls.get(method, 0) + 1
+        if method == "getMe":
+            return {"id": 1, "is_bot": True, "first_name": "Ziggy", "username": "ziggy_test_bot",
+                    "can_join_groups": False, "can_read_all_group_messages": False,
+                    "supports_inline_queries": False}
+        if method == "getUpdates":
+            return self._get_updates(int(params.get("offset") or 0), float(params.get("timeout") or 0))
+        if method == "sendMessage":
+            return self._send_message(params)
+        if method == "sendChatAction":
+            self.chat_actions += 1
+            return True
+        if method == "setWebhook":
+            self.webhook_url = params.get("url")
+            self.webhook_secret = params.get("secret_token")
+            return True
+        if method == "deleteWebhook":
+            self.webhook_url = None
+            return True
+        if method == "getWebhookInfo":
+            info = {"url": self.webhook_url or "", "has_custom_certificate": False,
+                    "pending_update_count": len(self.updates)}
+            if self.last_error_date:
+                info.update(last_error_date=self.last_error_date, last_error_message="Connection refused")
+            return info
+        return True
+
+    def _get_updates(self, offset, timeout):
+        deadline = time.time() + timeout
+        with self._changed:
+            # Confirmed updates are dropped, as on the real server
+            self.updates = [u for u in self.updates if u["update_id"] >= offset]
+            while not self.updates and time.time() < deadline:
+                self._changed.wait(deadline - time.time())
+            return list(self.updates)
+
+    def _send_message(self, params):
+        chat_id = int(params["chat_id"])
+        reply_to = params.get("reply_to_message_id")
+        reply_to = int(reply_to) if reply_to is not None else None
+        with self._changed:
+            message_id = self._next_message
+            self._next_message += 1
+            self.replies.append({"chat_id": chat_id, "text": params.get("text"), "at": time.time(),
+                                 "reply_to": reply_to})
+            self._changed.notify_all()
+        return {"message_id": message_id, "date": int(time.time()), "text": params.get("text"),
+                "chat": {"id": chat_id, "type": "group" if chat_id < 0 else "private"}}
+
+def _decode(value):
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
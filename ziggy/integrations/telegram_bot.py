@@ -1,5 +1,6 @@
 import os
 import time
+import asyncio
 import pytz
 
 # ✅ Set environment timezone
@@ -12,42 +13,165 @@ apscheduler.util.astimezone = lambda tz=None: tz or pytz.timezone("Asia/Jerusale
 
 # ✅ Now import telegram
 from telegram import Update
+from telegram.constants import ChatAction
 from telegram.ext import (
     ApplicationBuilder, CommandHandler, MessageHandler, ContextTypes, filters
 )
-from core.intent_parser import handle_command, load_settings
-from voice.voice_interface import VoiceAssistant
+from config.settings import settings
+from core.intent_registry import registry
+from voice.language import detect_language
 
-va = VoiceAssistant(language="auto")
 AUTHORIZED_USER_IDS = []
 
+BUSY_REPLIES = {
+    "he": "⏳ רגע, אני עדיין עונה על ההודעות הקודמות שלך",
+    "en": "⏳ Still working on your previous messages, one moment",
+}
+
+# ── Per-chat ordered dispatch ────────────────────────────────────
+class ChatDispatcher:
+    """Runs message jobs off the update handler: FIFO within a chat, parallel across chats.
+
+    Each chat gets a bounded queue drained by its own task, and a shared
+    semaphore caps how many jobs run at once. When a chat's queue is full the
+    message is refused (the caller replies "busy") rather than piling up.
+    """
+
+    def __init__(self, max_pending=3, max_workers=4):
+        self.max_pending = max_pending
+        self.max_workers = max_workers
+        self.processed = 0
+        self.rejected = 0
+        self.total_latency = 0.0
+        self._queues = {}
+        self._workers = {}
+        self._semaphore = asyncio.Semaphore(max_workers)
+
+    def submit(self, chat_id, job):
+        """Queue job (an async callable) for chat_id; False when the chat is saturated."""
+        chat_queue = self._queues.get(chat_id)
+        if chat_queue is None:
+            chat_queue = self._queues[chat_id] = asyncio.Queue(maxsize=self.max_pending)
+        try:
+            chat_queue.put_nowait((time.time(), job))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            return False
+        if chat_id not in self._workers:
+            self._workers[chat_id] = asyncio.create_task(self._drain(chat_id, chat_queue))
+        return True
+
+    async def _drain(self, chat_id, chat_queue):
+        try:
+            while not chat_queue.empty():
+                queued_at, job = chat_queue.get_nowait()
+                async with self._semaphore:
+                    try:
+                        await job()
+                    except Exception as e:
+                        print(f"[TELEGRAM ERROR] chat {chat_id}: {e}")
+                self.processed += 1
+                self.total_latency += time.time() - queued_at
+        finally:
+            # No await between the empty() check and here, so nothing can slip in
+            del self._workers[chat_id]
+            if chat_queue.empty():
+                self._queues.pop(chat_id, None)
+
+    def stats(self):
+        return {
+            "active_chats": len(self._workers),
+            "queued": sum(q.qsize() for q in self._queues.values()),
+            "processed": self.processed,
+            "rejected": self.rejected,
+            "avg_latency_ms": self.total_latency / self.processed * 1000 if self.processed else 0.0,
+        }
+
+dispatcher = ChatDispatcher()
+
+async def keep_typing(bot, chat_id, done, interval=4.0):
+    # Telegram shows "typing…" for ~5 s per action, so refresh until done. The
+    # task is never cancelled mid-request, which would drop a pooled connection.
+    while not done.is_set():
+        try:
+            await bot.send_chat_action(chat_id=chat_id, action=ChatAction.TYPING)
+        except Exception as e:
+            print(f"[TELEGRAM] Typing indicator failed: {e}")
+        try:
+            await asyncio.wait_for(done.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+
+async def process_message(message, bot):
+    message_text = message.text.strip()
+    lang = detect_language(message_text)
+    user = f"telegram:{message.chat_id}"  # Each chat keeps its own GPT conversation
+    done = asyncio.Event()
+    typing = asyncio.create_task(keep_typing(bot, message.chat_id, done))
+    try:
+        try:
+            runtime = registry.services.get("runtime")
+            if runtime:
+                reply = await runtime.handle_text(message_text, lang, source="telegram", user=user)
+            else:
+                loop = asyncio.get_running_loop()
+                reply = await loop.run_in_executor(None, registry.handle_text, message_text, lang, "telegram", None, user)
+        finally:
+            done.set()
+        # Same handlers as voice; the reply is collected as text, then also spoken
+        response = reply.text
+        print(f"🤖 Ziggy replies: {response}")
+        if response:
+            await message.reply_text(response)
+            voice = registry.services.get("voice")
+            if voice:
+                from voice.audio_player import PRIORITY_CHATTER
+                voice.say(response, priority=PRIORITY_CHATTER)  # Echo of a chat reply: after local speech and alerts
+    finally:
+        # Stops on its own once done is set; awaited after the reply so an
+        # in-flight typing action never delays it
+        await typing
+
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
-    message_text = update.message.text.strip()
+    message = update.message
     if AUTHORIZED_USER_IDS and user_id not in AUTHORIZED_USER_IDS:
-        await update.message.reply_text("⛔ Unauthorized user.")
+        await message.reply_text("⛔ Unauthorized user.")
         return
-    print(f"📩 Received from Telegram: {message_text}")
-    response = handle_command(message_text)
-    print(f"🤖 Ziggy replies: {response}")
-    if response:
-        await update.message.reply_text(response)
-        va.say(response)
+    print(f"📩 Received from Telegram: {message.text.strip()}")
+    # Return to PTB at once; the work runs in the chat's queue
+    if not dispatcher.submit(message.chat_id, lambda: process_message(message, context.bot)):
+        lang = detect_language(message.text)
+        await message.reply_text(BUSY_REPLIES[lang])
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text("👋 Ziggy is ready!")
-    va.say("זיגי מוכן")
+    voice = registry.services.get("voice")
+    if voice:
+        voice.say("זיגי מוכן")
 
-def run_bot():
-    settings = load_settings()
-    token = settings["telegram"]["bot_token"]
+def build_application(token=None, base_url=None):
+    global dispatcher
+    telegram_settings = settings["telegram"]
+    token = token or telegram_settings["bot_token"]
     if not token:
         raise ValueError("Telegram bot token not set in settings.yaml")
+    dispatcher = ChatDispatcher(
+        max_pending=telegram_settings.get("max_pending_per_chat", 3),
+        max_workers=telegram_settings.get("max_concurrent", 4),
+    )
 
     # ✅ DO NOT manually set scheduler – just let the monkey patch take care of it
-    app = ApplicationBuilder().token(token).build()
+    builder = ApplicationBuilder().token(token)
+    if base_url:
+        builder = builder.base_url(base_url)  # e.g. a local Bot API server
+    app = builder.build()
     app.add_handler(CommandHandler("start", start))
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
+    return app
 
+def run_bot():
+    """Standalone polling; under ZiggyRuntime the Application shares the main loop instead."""
+    app = build_application()
     print("🤖 Telegram bot is running…")
     app.run_polling()
@@ -0,0 +1,187 @@
+import json
+import time
+import asyncio
+import secrets
+
+from telegram import Update
+
+# Opt-in webhook delivery for the Telegram bot. A small asyncio HTTP server
+# (no extra dependencies) receives Telegram's POSTs, checks the secret token
+# header, answers 200 at once and hands updates to the Application in
+# batches. If registering the webhook fails, or Telegram starts reporting
+# delivery errors, the bot drops back to long polling.
+
+SECRET_HEADER = "x-telegram-bot-api-secret-token"
+MAX_BODY = 1024 * 1024
+
+class WebhookReceiver:
+    def __init__(self, app, listen="0.0.0.0", port=8443, path="/telegram", secret_token=None,
+                 batch_size=32, batch_window=0.01):
+        self.app = app
+        self.listen = listen
+        self.port = port
+        self.path = path
+        self.secret_token = secret_token or secrets.token_urlsafe(32)
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.received = 0
+        self.rejected = 0
+        self.duplicates = 0
+        self.last_received = None
+        self._pending = asyncio.Queue()
+        self._seen = {}  # update_id -> time, Telegram re-sends on slow or failed acks
+        self._server = None
+        self._batcher = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._serve, self.listen, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._batcher = asyncio.create_task(self._batch_loop())
+        print(f"[WEBHOOK] Listening on {self.listen}:{self.port}{self.path}")
+
+    async def stop(self):
+        if self._batcher:
+            self._batcher.cancel()
+            self._batcher = None
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    # ── HTTP ─────────────────────────────────────────────────────
+    async def _serve(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY:
+                    await self._respond(writer, 413)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                status = self._accept(method, target, headers, body)
+                await self._respond(writer, status)
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ValueError, ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def _accept(self, method, target, headers, body):
+        if method != "POST" or target.split("?")[0] != self.path:
+            return 404
+        if not secrets.compare_digest(headers.get(SECRET_HEADER, ""), self.secret_token):
+            self.rejected += 1
+            return 403
+        try:
+            data = json.loads(body)
+        except ValueError:
+            return 400
+        update_id = data.get("update_id") if isinstance(data, dict) else None
+        if not isinstance(update_id, int) or isinstance(update_id, bool):
+            return 400  # Not an Update; never let it reach the batch loop
+        self.received += 1
+        self.last_received = time.time()
+        self._pending.put_nowait(data)
+        return 200  # Ack before processing, so Telegram never waits on a slow command
+
+    async def _respond(self, writer, status):
+        reason = {200: "OK", 400: "Bad Request", 403: "Forbidden", 404: "Not Found", 413: "Too Large"}[status]
+        writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Length: 0\r\n\r\n".encode("latin-1"))
+        await writer.drain()
+
+    # ── Batching ─────────────────────────────────────────────────
+    async def _batch_loop(self):
+        while True:
+            batch = [await self._pending.get()]
+            # Gather whatever arrives within the window (bursts after an outage)
+            deadline = time.time() + self.batch_window
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(await asyncio.wait_for(self._pending.get(), max(0, deadline - time.time())))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                self._enqueue(batch)
+            except Exception as e:  # One bad batch must not stop delivery for good
+                print(f"[WEBHOOK] Batch of {len(batch)} failed: {e}")
+
+    def _enqueue(self, batch):
+        now = time.time()
+        if len(self._seen) > 1000:
+            self._seen = {k: t for k, t in self._seen.items() if now - t < 600}
+        for data in sorted(batch, key=lambda d: d["update_id"]):
+            update_id = data["update_id"]
+            if update_id in self._seen:
+                self.duplicates += 1
+                continue
+            self._seen[update_id] = now
+            try:
+                update = Update.de_json(data, self.app.bot)
+            except Exception as e:
+                print(f"[WEBHOOK] Dropped malformed update {update_id}: {e}")
+                continue
+            if update:
+                self.app.update_queue.put_nowait(update)
+
+async def start_updates(app, webhook_settings=None):
+    """Start webhook delivery if configured, else (or on failure) long polling.
+
+    Returns the WebhookReceiver, or None when polling.
+    """
+    webhook_settings = webhook_settings or {}
+    if webhook_settings.get("enabled") and webhook_settings.get("public_url"):
+        receiver = WebhookReceiver(
+            app,
+            listen=webhook_settings.get("listen", "0.0.0.0"),
+            port=webhook_settings.get("port", 8443),
+            path=webhook_settings.get("path", "/telegram"),
+            secret_token=webhook_settings.get("secret_token") or None,
+        )
+        try:
+            await receiver.start()
+            await app.bot.set_webhook(
+                url=webhook_settings["public_url"],
+                secret_token=receiver.secret_token,
+                allowed_updates=Update.ALL_TYPES,
+                max_connections=webhook_settings.get("max_connections", 10),
+            )
+            print(f"🤖 Telegram bot is running (webhook {webhook_settings['public_url']})…")
+            return receiver
+        except Exception as e:
+            print(f"[WEBHOOK] Setup failed ({e}); falling back to polling")
+            await receiver.stop()
+    await start_polling(app)
+    return None
+
+async def start_polling(app):
+    await app.bot.delete_webhook()  # getUpdates is refused while a webhook is set
+    await app.updater.start_polling()
+    print("🤖 Telegram bot is running (polling)…")
+
+async def watch_webhook(app, receiver, interval=60):
+    """Fall back to polling if Telegram reports delivery errors newer than our last update."""
+    started = time.time()
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            info = await app.bot.get_webhook_info()
+        except Exception as e:
+            print(f"[WEBHOOK] Could not check webhook status: {e}")
+            continue
+        error_at = info.last_error_date.timestamp() if info.last_error_date else 0
+        if error_at > max(started, receiver.last_received or 0):
+            print(f"[WEBHOOK] Telegram reports delivery errors ({info.last_error_message}); switching to polling")
+            await receiver.stop()
+            await start_polling(app)
+            return
@@ -1,38 +1,95 @@
 import os
-import json
+import threading
 
-MEMORY_FILE = os.path.join(os.path.dirname(__file__), "ziggy_memory.json")
-_memory_store = {}
+from memory.memory_store import MemoryStore
+from memory.recall_index import RecallIndex
+
+MEMORY_FILE = os.path.join(os.path.dirname(__file__), "ziggy_memory.json")  # Legacy store, migrated once
+MEMORY_DB = os.path.join(os.path.dirname(__file__), "ziggy_memory.db")
+_memory_store = None
+_recall_index = None
+_index_lock = threading.Lock()
 
 # ── Load memory from disk ──────────────────────────────────────
 def load_memory():
     global _memory_store
-    if os.path.exists(MEMORY_FILE):
+    if _memory_store is not None:
+        return _memory_store
+    try:
+        _memory_store = MemoryStore(MEMORY_DB)
+    except Exception as e:
+        print(f"[MEMORY LOAD ERROR] {e}")
+        raise
+    if os.path.exists(MEMORY_FILE) and _memory_store.count() == 0:
         try:
-            with open(MEMORY_FILE, "r", encoding="utf-8") as f:
-                _memory_store = json.load(f)
-            print("🧠 Memory loaded.")
+            imported = _memory_store.import_json(MEMORY_FILE)
+            os.replace(MEMORY_FILE, MEMORY_FILE + ".migrated")
+            print(f"🧠 Migrated {imported} topics from {os.path.basename(MEMORY_FILE)}.")
         except Exception as e:
-            print(f"[MEMORY LOAD ERROR] {e}")
-            _memory_store = {}
-    else:
-        print("🧠 No existing memory file. Starting fresh.")
-        _memory_store = {}
+            # Keep the old file for manual recovery rather than starting over silently
+            print(f"[MEMORY LOAD ERROR] Could not migrate {MEMORY_FILE}: {e}")
+    print(f"🧠 Memory loaded ({_memory_store.count()} topics).")
+    return _memory_store
+
+def _store():
+    return _memory_store if _memory_store is not None else load_memory()
 
 # ── Save memory to disk ────────────────────────────────────────
 def save_memory():
+    # Every save is already committed; this folds the WAL into the main file
     try:
-        with open(MEMORY_FILE, "w", encoding="utf-8") as f:
-            json.dump(_memory_store, f, ensure_ascii=False, indent=2)
+        _store().checkpoint()
         print("💾 Memory saved.")
     except Exception as e:
         print(f"[MEMORY SAVE ERROR] {e}")
 
+# ── Recall index ───────────────────────────────────────────────
+def build_index():
+    """Index every stored topic once (startup warmup); later saves update it in place."""
+    global _recall_index
+    with _index_lock:
+        if _recall_index is None:
+            from config.settings import settings
+            config = settings.get("memory", {}).get("recall", {})
+            index = RecallIndex(vectors=config.get("vectors", True))
+            index.add_many(_store().items())
+            _recall_index = index
+            print(f"🧠 Recall index ready ({len(index)} topics).")
+    return _recall_index
+
+def recall(query, k=5, min_score=None):
+    """Stored topics ranked by similarity to a question: [{"topic", "content", "score", ...}]."""
+    if min_score is None:
+        from config.settings import settings
+        min_score = settings.get("memory", {}).get("recall", {}).get("min_score", 0.3)
+    hits = build_index().search(query, k=k, min_score=min_score)
+    for hit in hits:
+        hit["content"] = _store().get(hit["topic"])
+    return [hit for hit in hits if hit["content"] is not None]
+
 # ── Save a topic to memory ─────────────────────────────────────
 def save(topic, content):
-    _memory_store[topic.lower()] = content
-    save_memory()
+    try:
+        _store().put(topic.lower(), content)
+        with _index_lock:  # A save during build_index() waits and is indexed after it
+            if _recall_index is not None:
+                _recall_index.add(topic.lower(), content)
+    except Exception as e:
+        print(f"[MEMORY SAVE ERROR] {e}")
 
 # ── Retrieve a topic from memory ───────────────────────────────
+def lookup(topic):
+    """(matched topic, content): exact topic first, then a recall hit that covers every
+    word of the question; (None, None) if nothing does."""
+    content = _store().get(topic.lower())
+    if content is not None:
+        return topic.lower(), content
+    for hit in recall(topic, k=3):
+        if hit["covered"]:  # A partial match answers a different question ("bank pin" -> wifi password)
+            print(f"[MEMORY] '{topic}' -> '{hit['topic']}' (score {hit['score']})")
+            return hit["topic"], hit["content"]
+    return None, None
+
 def retrieve(topic):
-    return _memory_store.get(topic.lower())
+    """Content for a topic via lookup() (None if nothing is close enough)."""
+    return lookup(topic)[1]
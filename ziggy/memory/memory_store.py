@@ -0,0 +1,92 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+
+# Storage engine for long-term memory: SQLite in WAL mode. Each save is its
+# own small transaction (atomic: a power cut leaves either the old or the new
+# value, never a truncated file), and synchronous=NORMAL batches the fsyncs
+# into WAL checkpoints instead of paying one per save. Nothing is held in
+# RAM beyond SQLite's bounded page cache, so large stores open instantly.
+
+class MemoryStore:
+    def __init__(self, path, cache_kb=2048):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(f"PRAGMA cache_size=-{int(cache_kb)}")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS memory ("
+            " topic TEXT PRIMARY KEY, content TEXT NOT NULL, updated REAL NOT NULL)"
+        )
+
+    def get(self, topic):
+        with self._lock:
+            row = self._db.execute("SELECT content FROM memory WHERE topic = ?", (topic,)).fetchone()
+        return row[0] if row else None
+
+    def put(self, topic, content):
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO memory (topic, content, updated) VALUES (?, ?, ?)"
+                " ON CONFLICT(topic) DO UPDATE SET content = excluded.content, updated = excluded.updated",
+                (topic, content, time.time()),
+            )
+
+    def put_many(self, items):
+        """Write (topic, content) pairs in one transaction."""
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                self._db.executemany(
+                    "INSERT INTO memory (topic, content, updated) VALUES (?, ?, ?)"
+                    " ON CONFLICT(topic) DO UPDATE SET content = excluded.content, updated = excluded.updated",
+                    ((topic, content, now) for topic, content in items),
+                )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def delete(self, topic):
+        with self._lock:
+            return self._db.execute("DELETE FROM memory WHERE topic = ?", (topic,)).rowcount > 0
+
+    def items(self, batch=1000):
+        """Iterate (topic, content) without loading the whole store."""
+        last = ""
+        while True:
+            with self._lock:
+                rows = self._db.execute(
+                    "SELECT topic, content FROM memory WHERE topic > ? ORDER BY topic LIMIT ?", (last, batch)
+                ).fetchall()
+            if not rows:
+                return
+            yield from rows
+            last = rows[-1][0]
+
+    def count(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM memory").fetchone()[0]
+
+    def checkpoint(self):
+        """Fold the WAL into the main file and fsync (e.g. before shutdown)."""
+        with self._lock:
+            self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def import_json(self, json_path):
+        """One-time migration from the old ziggy_memory.json; returns the number of topics imported."""
+        with open(json_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self.put_many((str(topic).lower(), content if isinstance(content, str) else json.dumps(content, ensure_ascii=False))
+                      for topic, content in data.items())
+        return len(data)
@@ -0,0 +1,323 @@
+import math
+import heapq
+import zlib
+import difflib
+import threading
+from collections import defaultdict
+
+from utils.helpers import normalize_text
+
+try:
+    import numpy as np  # Optional: vector layer (hashed character n-gram embeddings)
+except ImportError:
+    np = None
+
+# In-memory recall index over the memory store, so "my mother's birthday"
+# or "אמא יום הולדת" finds the topic saved as "mom's birthday" without GPT.
+# Text is normalized to canonical tokens (Hebrew and English synonyms share
+# one token, Hebrew prefixes and possessives are dropped), then scored by
+# three layers on the same candidates:
+#   tokens   IDF-weighted overlap from inverted lists (topic + content)
+#   trigram  Dice similarity of the topic's character trigrams (typos, partial words)
+#   vector   cosine of hashed character n-gram embeddings, top-k over one
+#            NumPy matrix (skipped if NumPy is missing)
+# Every layer is updated per topic on save/delete; nothing is rebuilt.
+
+_PHRASES = [
+    ("יום הולדת", "birthday"), ("יום ההולדת", "birthday"), ("יומולדת", "birthday"),
+    ("יום נישואין", "anniversary"), ("יום הנישואין", "anniversary"),
+    ("phone number", "phone"), ("מספר טלפון", "phone"), ("מספר הטלפון", "phone"),
+    ("wi fi", "wifi"), ("בית ספר", "school"), ("בית הספר", "school"),
+    ("רופא שיניים", "dentist"), ("רופא השיניים", "dentist"), ("רופאת שיניים", "dentist"),
+]
+
+_SYNONYMS = {
+    "mom": ["mother", "mum", "mommy", "mama", "אמא", "אימא", "אמי"],
+    "dad": ["father", "daddy", "papa", "אבא", "אבי"],
+    "brother": ["bro", "אח", "אחי"],
+    "sister": ["sis", "אחות", "אחותי"],
+    "wife": ["אישה", "אשתי"],
+    "husband": ["בעל", "בעלי"],
+    "son": ["בן", "בני"],
+    "daughter": ["בת", "בתי"],
+    "grandma": ["grandmother", "granny", "סבתא"],
+    "grandpa": ["grandfather", "סבא"],
+    "birthday": ["bday", "birthdays"],
+    "anniversary": [],
+    "password": ["passcode", "pin", "סיסמה", "סיסמא", "קוד"],
+    "wifi": ["wireless", "וויפי", "ווייפיי", "ויפי", "אינטרנט"],
+    "car": ["vehicle", "אוטו", "רכב", "מכונית"],
+    "parking": ["parked", "park", "חניה", "חנייה", "חונה", "חניון"],
+    "keys": ["key", "מפתח", "מפתחות"],
+    "phone": ["telephone", "mobile", "טלפון", "פלאפון", "נייד"],
+    "address": ["כתובת"],
+    "doctor": ["רופא", "רופאה"],
+    "dentist": [],
+    "medicine": ["pills", "pill", "meds", "medication", "תרופה", "תרופות", "כדורים"],
+    "school": [],
+    "work": ["job", "office", "עבודה", "משרד"],
+    "dog": ["puppy", "כלב", "כלבה"],
+    "cat": ["kitten", "חתול", "חתולה"],
+    "friend": ["חבר", "חברה"],
+    "kids": ["children", "kid", "child", "ילדים", "ילד", "ילדה"],
+    "food": ["אוכל", "מזון"],
+    "name": ["שם"],
+    "where": ["איפה", "היכן"],
+    "when": ["מתי"],
+}
+_CANONICAL = {word: canon for canon, words in _SYNONYMS.items() for word in [canon] + words}
+# Whose it is: a topic naming one of these only answers a question that names it too
+# ("my birthday" is not "mom's birthday")
+_OWNERS = {"mom", "dad", "brother", "sister", "wife", "husband", "son", "daughter", "grandma", "grandpa",
+           "doctor", "dentist", "friend", "kids", "dog", "cat"}
+
+_STOPWORDS = {
+    "the", "a", "an", "my", "our", "your", "his", "her", "their", "of", "s", "is", "are", "was",
+    "what", "who", "whats", "which", "about", "do", "you", "me", "i", "to", "for", "and", "please",
+    "איזה", "איזו", "של", "שלי", "שלנו", "שלך", "שלו", "שלה", "את", "מה", "מי", "זה", "זאת", "על", "הוא", "היא", "ו",
+}
+_HEBREW_PREFIXES = "הושבלמכ"
+
+def _canonical_token(token):
+    if token in _CANONICAL:
+        return _CANONICAL[token]
+    if token.endswith("s") and token[:-1] in _CANONICAL:  # "moms bday" -> mom
+        return _CANONICAL[token[:-1]]
+    # "לאמא" -> "אמא", "והסיסמה" -> "סיסמה": strip up to two prefix letters onto a known word
+    for cut in (1, 2):
+        if len(token) > cut + 1 and all(c in _HEBREW_PREFIXES for c in token[:cut]) and token[cut:] in _CANONICAL:
+            return _CANONICAL[token[cut:]]
+    return token
+
+def normalize_tokens(text):
+    """Canonical tokens for a memory topic, its content or a question."""
+    text = f" {normalize_text(str(text or ''))} "
+    for phrase, canon in _PHRASES:
+        if f" {phrase} " in text:
+            text = text.replace(f" {phrase} ", f" {canon} ")
+    return [_canonical_token(t) for t in text.split() if t not in _STOPWORDS]
+
+def _trigrams(text):
+    padded = f" {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class RecallIndex:
+    def __init__(self, dim=128, ngram_range=(2, 4), weights=(0.5, 0.3, 0.2),
+                 content_weight=0.5, vectors=True):
+        self.dim = dim
+        self.ngram_range = ngram_range
+        self.content_weight = content_weight  # A content match counts for this much of a topic match
+        self.vectors = vectors and np is not None
+        self.weights = weights if self.vectors else (weights[0], weights[1], 0.0)
+        self._lock = threading.Lock()
+        self._ids = {}                       # topic -> doc id
+        self._topics = []                    # doc id -> topic (None once removed)
+        self._free = []                      # Reusable doc ids
+        self._doc_tokens = []                # doc id -> {token: field weight}
+        self._doc_text = []                  # doc id -> canonical topic text (trigram source)
+        self._postings = defaultdict(set)    # token -> doc ids
+        self._gram_postings = defaultdict(set)  # trigram -> doc ids
+        self._matrix = np.zeros((0, dim), dtype=np.float32) if self.vectors else None
+
+    # ── Maintenance ──────────────────────────────────────────────
+    def add(self, topic, content=""):
+        """Index (or re-index) one topic."""
+        topic_tokens = normalize_tokens(topic)
+        tokens = {t: self.content_weight for t in normalize_tokens(content)}
+        tokens.update({t: 1.0 for t in topic_tokens})
+        text = " ".join(topic_tokens) or normalize_text(topic)
+        vector = self._vectorize(topic_tokens) if self.vectors else None
+        with self._lock:
+            if topic in self._ids:
+                self._remove(topic)
+            doc = self._free.pop() if self._free else len(self._topics)
+            if doc == len(self._topics):
+                self._topics.append(None)
+                self._doc_tokens.append(None)
+                self._doc_text.append(None)
+            self._ids[topic] = doc
+            self._topics[doc] = topic
+            self._doc_tokens[doc] = tokens
+            self._doc_text[doc] = text
+            for token in tokens:
+                self._postings[token].add(doc)
+            for gram in _trigrams(text):
+                self._gram_postings[gram].add(doc)
+            if self.vectors:
+                if doc >= len(self._matrix):
+                    grown = np.zeros((max(64, 2 * len(self._matrix)), self.dim), dtype=np.float32)
+                    grown[:len(self._matrix)] = self._matrix
+                    self._matrix = grown
+                self._matrix[doc] = vector
+
+    def add_many(self, items):
+        for topic, content in items:
+            self.add(topic, content)
+
+    def remove(self, topic):
+        with self._lock:
+            if topic in self._ids:
+                self._remove(topic)
+
+    def _remove(self, topic):
+        doc = self._ids.pop(topic)
+        for token in self._doc_tokens[doc]:
+            self._discard(self._postings, token, doc)
+        for gram in _trigrams(self._doc_text[doc]):
+            self._discard(self._gram_postings, gram, doc)
+        self._topics[doc] = None
+        self._doc_tokens[doc] = None
+        self._doc_text[doc] = None
+        if self.vectors:
+            self._matrix[doc] = 0
+        self._free.append(doc)
+
+    @staticmethod
+    def _discard(postings, key, doc):
+        docs = postings.get(key)
+        if docs is not None:
+            docs.discard(doc)
+            if not docs:
+                del postings[key]
+
+    def __len__(self):
+        return len(self._ids)
+
+    # ── Lookup ───────────────────────────────────────────────────
+    def search(self, query, k=5, min_score=0.0):
+        """Ranked hits for a question: [{"topic", "score", "covered", "tokens", "trigram", "vector"}].
+
+        covered is True when the topic accounts for every word of the question
+        (exactly, as a synonym or as a near spelling) and names no one the
+        question doesn't.
+        """
+        tokens = normalize_tokens(query)
+        if not tokens and not normalize_text(str(query or "")):
+            return []
+        w_tokens, w_grams, w_vector = self.weights
+        total = w_tokens + w_grams + w_vector
+        pool = max(4 * k, 32)  # Candidates per layer that get fully scored
+        with self._lock:
+            if not self._ids:
+                return []
+            tokens = [self._known_token(t) for t in tokens]
+            grams = _trigrams(" ".join(tokens) or normalize_text(query))
+            token_scores = self._token_scores(tokens, pool)
+            candidates = set(token_scores) | self._gram_candidates(grams, pool)
+            vector_scores = self._vector_scores(tokens, candidates, pool) if w_vector else {}
+            candidates |= set(vector_scores)
+            gram_scores = {doc: self._dice(grams, doc) for doc in candidates}
+            # Question words a topic lacks are a contradiction, not a typo, whether or not
+            # the index knows them: "dad's birthday" is not "mom's birthday" and "bank pin"
+            # is not "wifi password". Unknown words get the highest IDF.
+            weights = {t: self._idf(t) for t in tokens}
+            query_weight = sum(weights.values()) or 1.0
+            owners = _OWNERS.intersection(tokens)
+            near = {}
+            hits = []
+            for doc in candidates:
+                scores = (token_scores.get(doc, 0.0), gram_scores.get(doc, 0.0), vector_scores.get(doc, 0.0))
+                score = (w_tokens * scores[0] + w_grams * scores[1] + w_vector * scores[2]) / total
+                if score < min_score:  # The penalty only lowers it
+                    continue
+                doc_tokens = self._doc_tokens[doc]
+                missing = [t for t in weights if not self._covers(t, doc_tokens, near)]
+                strangers = [t for t, w in doc_tokens.items() if w == 1.0 and t in _OWNERS and t not in owners]
+                penalty = sum(weights[t] for t in missing) + sum(self._idf(t) for t in strangers)
+                score *= max(0.0, 1 - penalty / query_weight)
+                if score >= min_score:
+                    hits.append({"topic": self._topics[doc], "score": round(score, 3),
+                                 "covered": not missing and not strangers, "tokens": round(scores[0], 3),
+                                 "trigram": round(scores[1], 3), "vector": round(scores[2], 3)})
+        hits.sort(key=lambda hit: hit["score"], reverse=True)
+        return hits[:k]
+
+    def _known_token(self, token):
+        # Unknown words may still carry a Hebrew prefix: "בדירה" matches an indexed "דירה"
+        if token not in self._postings:
+            for cut in (1, 2):
+                if len(token) > cut + 1 and all(c in _HEBREW_PREFIXES for c in token[:cut]) \
+                        and token[cut:] in self._postings:
+                    return token[cut:]
+        return token
+
+    @staticmethod
+    def _covers(token, doc_tokens, near):
+        """The topic has this word, or one spelled almost the same ("danna" -> "dana").
+        near memoizes word pairs across the candidates of one search."""
+        if token in doc_tokens:
+            return True
+        if len(token) < 4:
+            return False
+        for t in doc_tokens:
+            if (token, t) not in near:
+                matcher = difflib.SequenceMatcher(None, token, t)
+                near[token, t] = (matcher.real_quick_ratio() >= 0.8 and matcher.quick_ratio() >= 0.8
+                                  and matcher.ratio() >= 0.8)
+            if near[token, t]:
+                return True
+        return False
+
+    def _idf(self, token):
+        return math.log(1 + len(self._ids) / (1 + len(self._postings.get(token, ()))))
+
+    def _frequent(self):
+        """Posting lists longer than this are only used to score candidates, not to find them."""
+        return max(256, len(self._ids) // 50)
+
+    def _token_scores(self, tokens, pool):
+        """Weighted Dice of the query tokens against the best candidates' topic tokens."""
+        query = {t: self._idf(t) for t in tokens}
+        query_weight = sum(query.values())
+        matched = defaultdict(float)
+        for token in sorted(query, key=query.get, reverse=True):  # Rarest first
+            docs = self._postings.get(token, ())
+            if matched and len(docs) > self._frequent():
+                for doc in list(matched):
+                    if doc in docs:
+                        matched[doc] += query[token] * self._doc_tokens[doc][token]
+            else:
+                for doc in docs:
+                    matched[doc] += query[token] * self._doc_tokens[doc][token]
+        scores = {}
+        for doc in heapq.nlargest(pool, matched, key=matched.get):
+            topic_weight = sum(self._idf(t) for t, w in self._doc_tokens[doc].items() if w == 1.0)
+            scores[doc] = min(1.0, 2 * matched[doc] / (query_weight + topic_weight))
+        return scores
+
+    def _gram_candidates(self, grams, pool):
+        """Topics sharing the most rare trigrams with the query (typos, partial words)."""
+        counts = defaultdict(int)
+        for gram in grams:
+            docs = self._gram_postings.get(gram, ())
+            if len(docs) <= self._frequent():
+                for doc in docs:
+                    counts[doc] += 1
+        return set(heapq.nlargest(pool, counts, key=counts.get))
+
+    def _dice(self, grams, doc):
+        doc_grams = _trigrams(self._doc_text[doc])
+        score = 2 * len(grams & doc_grams) / (len(grams) + len(doc_grams))
+        return score if score >= 0.2 else 0.0  # A few shared grams is noise
+
+    def _vector_scores(self, tokens, candidates, pool):
+        """Cosine for the other layers' candidates plus the matrix-wide top `pool`."""
+        live = len(self._topics)
+        if not tokens or not live:
+            return {}
+        scores = self._matrix[:live] @ self._vectorize(tokens)
+        top = min(pool, live)
+        best = np.argpartition(-scores, top - 1)[:top]
+        docs = candidates.union(int(doc) for doc in best if self._topics[doc] is not None)
+        return {doc: float(scores[doc]) for doc in docs if scores[doc] > 0}
+
+    def _vectorize(self, tokens):
+        """Unit vector of hashed character n-grams of the canonical tokens."""
+        text = f" {' '.join(tokens)} "
+        vec = np.zeros(self.dim, dtype=np.float32)
+        low, high = self.ngram_range
+        for n in range(low, high + 1):
+            for i in range(len(text) - n + 1):
+                vec[zlib.crc32(text[i:i + n].encode("utf-8")) % self.dim] += 1.0
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
@@ -1,17 +1,34 @@
+import time
+import threading
+import concurrent.futures
+
 import paho.mqtt.client as mqtt
 
+from smart_home.device_state import DeviceStateStore, device_key
+from smart_home.device_resolver import DeviceResolver
+
 # Device control logic for Zigbee, IR, etc., now with MQTT capabilities
 
 class MqttDeviceController:
-    def __init__(self, broker_address, broker_port=1883, username=None, password=None, devices_config=None):
+    def __init__(self, broker_address, broker_port=1883, username=None, password=None, devices_config=None,
+                 scenes=None):
         self.broker_address = broker_address
         self.broker_port = broker_port
         self.username = username
         self.password = password
         self.devices_config = devices_config or {} # Store device mapping
+        self.states = DeviceStateStore(self.devices_config)  # Last reported state per device
+        self.resolver = DeviceResolver(self.devices_config)  # Spoken name -> device key
+        self.scenes = {device_key(name): scene for name, scene in (scenes or {}).items()}
+        self.state_topics = state_topics_of(self.devices_config)
         self.client = mqtt.Client()
         self.client.on_connect = self._on_connect
         self.client.on_message = self._on_message
+        self.client.on_publish = self._on_publish
+        self.client.max_inflight_messages_set(64)  # Let a whole scene go out at QoS 1 in one burst
+        self._acks = {}  # mid -> time the broker acknowledged it (QoS 1) or it was written (QoS 0)
+        self._feedback = threading.Condition()  # Notified on acks and state reports, for run_scene
+        self._adapter = None  # Set when driven by an asyncio loop (connect_async)
 
     def connect(self):
         if self.username and self.password:
@@ -23,9 +40,24 @@ class MqttDeviceController:
         except Exception as e:
             print(f"[MQTT ERROR] Failed to connect to broker: {e}")
 
+    async def connect_async(self, loop):
+        """Connect with the client driven by the asyncio loop instead of a loop_start() thread."""
+        from smart_home.mqtt_async import AsyncMqttAdapter
+        if self.username and self.password:
+            self.client.username_pw_set(self.username, self.password)
+        self._adapter = AsyncMqttAdapter(self.client, loop)
+        try:
+            await self._adapter.connect(self.broker_address, self.broker_port, 60)
+            print(f"[MQTT] Connecting to broker at {self.broker_address}:{self.broker_port} (asyncio)")
+        except Exception as e:
+            print(f"[MQTT ERROR] Failed to connect to broker: {e}")
+
     def disconnect(self):
-        self.client.loop_stop() # Stop the MQTT client loop
-        self.client.disconnect()
+        if self._adapter:
+            self._adapter.disconnect()
+        else:
+            self.client.loop_stop() # Stop the MQTT client loop
+            self.client.disconnect()
         print("[MQTT] Disconnected from broker")
 
     def _on_connect(self, client, userdata, flags, rc):
@@ -36,19 +68,82 @@ class MqttDeviceController:
         else:
             print(f"[MQTT ERROR] Connection failed with code {rc}")
 
-    def _subscribe_to_state_topics(self):
-        for device_name, device_info in self.devices_config.items():
-            state_topic = device_info.get("state_topic")
-            if state_topic:
-                self.client.subscribe(state_topic)
-                print(f"[MQTT] Subscribed to state topic: {state_topic}")
+    def _subscribe_to_state_topics(self, topics=None):
+        for state_topic in sorted(self.state_topics if topics is None else topics):
+            self.client.subscribe(state_topic)
+            print(f"[MQTT] Subscribed to state topic: {state_topic}")
+
+    def _unsubscribe(self, topics):
+        for topic in sorted(topics):
+            self.client.unsubscribe(topic)
+            print(f"[MQTT] Unsubscribed from state topic: {topic}")
 
     def _on_message(self, client, userdata, msg):
-        print(f"[MQTT] Received message on topic {msg.topic}: {msg.payload.decode()}")
-        # Process incoming messages (e.g., device state updates)
-        # You can update internal device states or trigger actions here
+        devices = self.states.update_from_message(msg.topic, msg.payload)
+        if not devices:
+            print(f"[MQTT] Received message on unmapped topic {msg.topic}")
+            return
+        with self._feedback:
+            self._feedback.notify_all()
+
+    def _on_publish(self, client, userdata, mid):
+        # Called by paho with its message lock held: never call back into the client here
+        with self._feedback:
+            self._acks[mid] = time.time()
+            if len(self._acks) > 1024:
+                for old_mid in list(self._acks)[:512]:
+                    del self._acks[old_mid]
+            self._feedback.notify_all()
+
+    def update_devices(self, devices_config, scenes=None, state_topics=None):
+        """Apply a changed device configuration without reconnecting.
+
+        Rebuilds the name index and topic maps, swaps the scenes (if given)
+        and changes only the subscriptions whose state topics came or went.
+        state_topics may be passed precomputed (SettingsSnapshot.state_topics).
+        """
+        self.devices_config = devices_config or {}
+        self.resolver.build(self.devices_config)
+        self.states.set_devices(self.devices_config)
+        if scenes is not None:
+            self.scenes = {device_key(name): scene for name, scene in scenes.items()}
+        old_topics = self.state_topics
+        self.state_topics = frozenset(state_topics) if state_topics is not None else state_topics_of(self.devices_config)
+        if self.client.is_connected():
+            self._call_client(self._unsubscribe, old_topics - self.state_topics)
+            self._call_client(self._subscribe_to_state_topics, self.state_topics - old_topics)
+        print(f"[MQTT] Device configuration updated ({len(self.devices_config)} devices, "
+              f"{len(self.scenes)} scenes)")
+
+    def resolve(self, device_name):
+        """Match a spoken device name ("the living room lamp", "סלון"); see DeviceResolver.resolve."""
+        if device_key(device_name) in self.devices_config:
+            return {"devices": [device_key(device_name)], "confidence": 1.0, "method": "key"}
+        return self.resolver.resolve(device_name)
+
+    def get_state(self, device_name):
+        """Last reported state of a device, from memory (None if unknown or it never reported)."""
+        match = self.resolve(device_name)
+        if not match or len(match["devices"]) != 1:
+            return None
+        return self.states.get(match["devices"][0])
+
+    def is_on(self, device_name):
+        snapshot = self.get_state(device_name)
+        state = snapshot["values"].get("state") if snapshot else None
+        return None if state is None else state == "on"
 
     def publish(self, topic, payload, qos=0, retain=False):
+        self._call_client(self._publish, topic, payload, qos, retain)
+
+    def _call_client(self, func, *args):
+        if self._adapter:
+            # Handlers run in worker threads; the socket belongs to the loop
+            self._adapter.call_soon(func, *args)
+        else:
+            func(*args)
+
+    def _publish(self, topic, payload, qos=0, retain=False):
         try:
             self.client.publish(topic, payload, qos, retain)
             print(f"[MQTT] Published message to topic {topic}")
@@ -56,42 +151,169 @@ class MqttDeviceController:
             print(f"[MQTT ERROR] Failed to publish message: {e}")
 
     def control_device(self, device_name, action, value=None):
-        """Controls a device via MQTT based on device name and action."""
-        device_info = self.devices_config.get(device_name.lower())
-
-        if not device_info:
+        """Controls a device (or a room group) via MQTT based on a spoken device name and action."""
+        match = self.resolve(device_name)
+        if not match:
             print(f"[MQTT ERROR] Device '{device_name}' not found in configuration.")
             return
+        if match["method"] not in ("key", "alias"):
+            print(f"[MQTT] Resolved '{device_name}' -> {', '.join(match['devices'])} "
+                  f"({match['method']}, {match['confidence']:.2f})")
+        for device in match["devices"]:
+            self._control_one(device, action, value)
+
+    def _control_one(self, device_name, action, value=None):
+        device_info = self.devices_config[device_name]
 
         command_topic = device_info.get("command_topic")
         if not command_topic:
             print(f"[MQTT ERROR] Command topic not defined for device '{device_name}'.")
             return
 
-        # Determine payload based on action and device component
-        payload = None
-        component = device_info.get("component")
-
-        if component == "light":
-            if action in ["on", "off", "toggle"]:
-                payload = action.upper()
-            # Add handling for brightness, color, etc. here if needed
-            # elif action == "set_brightness" and value is not None:
-            #     payload = json.dumps({"brightness": value})
-
-        elif component == "climate":
-            if action == "set_temperature" and value is not None:
-                payload = str(value) # Temperature usually sent as a string
-            # Add handling for HVAC mode, fan mode, etc.
-
-        # Add handling for other components (switch, cover, etc.)
-
+        payload = build_payload(device_info, action, value)
         if payload is not None:
             self.publish(command_topic, payload)
             print(f"[MQTT] Sent '{payload}' command to '{device_name}'.")
         else:
             print(f"[MQTT ERROR] Unsupported action '{action}' for device '{device_name}'.")
 
+    # ── Scenes ───────────────────────────────────────────────────
+    def run_scene(self, scene_name, qos=None, timeout=None):
+        """Send every action of a scene in one burst and wait for feedback until the deadline.
+
+        Per device, success means a PUBACK (QoS 1) and, for on/off actions on
+        devices with a state topic, a state report with the new value. Returns
+        {device: {"ok", "acked", "confirmed", "latency_ms", "error"}}, or None
+        for an unknown scene. Blocks, so call it from a worker thread.
+        """
+        scene = self.scenes.get(device_key(scene_name))
+        if scene is None:
+            return None
+        qos = scene.get("qos", 1) if qos is None else qos
+        timeout = scene.get("timeout", 3.0) if timeout is None else timeout
+
+        results, messages = {}, []
+        for step in scene.get("actions", []):
+            device = device_key(step["device"])
+            action = normalize_action(step.get("action"))
+            device_info = self.devices_config.get(device)
+            payload = build_payload(device_info, action, step.get("value")) if device_info else None
+            if payload is None or not device_info.get("command_topic"):
+                error = "unknown device" if not device_info else f"unsupported action '{action}'"
+                results[device] = {"ok": False, "acked": None, "confirmed": None, "latency_ms": None, "error": error}
+                continue
+            expected = action if action in ("on", "off") and device_info.get("state_topic") else None
+            messages.append((device, device_info["command_topic"], payload, expected))
+
+        started = time.time()
+        infos = self._publish_burst(messages, qos)
+        print(f"[MQTT] Scene '{scene_name}': published {len(messages)} commands (QoS {qos})")
+
+        pending = {}
+        for (device, topic, payload, expected), info in zip(messages, infos):
+            if isinstance(info, Exception) or info.rc != mqtt.MQTT_ERR_SUCCESS:
+                error = str(info) if isinstance(info, Exception) else mqtt.error_string(info.rc)
+                results[device] = {"ok": False, "acked": None, "confirmed": None, "latency_ms": None, "error": error}
+            else:
+                pending[device] = (info.mid if qos else None, expected)
+
+        deadline = started + timeout
+        with self._feedback:
+            while True:
+                for device, (mid, expected) in list(pending.items()):
+                    done_at = self._scene_progress(device, mid, expected, started)
+                    if done_at:
+                        del pending[device]
+                        results[device] = {"ok": True, "acked": mid is not None or None,
+                                           "confirmed": expected is not None or None,
+                                           "latency_ms": (done_at - started) * 1000, "error": None}
+                remaining = deadline - time.time()
+                if not pending or remaining <= 0:
+                    break
+                self._feedback.wait(remaining)
+
+        for device, (mid, expected) in pending.items():
+            acked = self._acks.get(mid) is not None if mid is not None else None
+            confirmed = False if expected else None
+            missing = "state report" if acked is not False else "PUBACK"
+            results[device] = {"ok": False, "acked": acked, "confirmed": confirmed, "latency_ms": None,
+                               "error": f"no {missing} within {timeout:g}s"}
+        failed = [d for d, r in results.items() if not r["ok"]]
+        print(f"[MQTT] Scene '{scene_name}': {len(results) - len(failed)}/{len(results)} ok"
+              f" in {(time.time() - started) * 1000:.0f} ms" + (f"; failed: {', '.join(failed)}" if failed else ""))
+        return results
+
+    def _scene_progress(self, device, mid, expected, started):
+        """Time the device's step completed, or None while still waiting (call with _feedback held)."""
+        done_at = started
+        if mid is not None:
+            done_at = self._acks.get(mid)
+            if done_at is None:
+                return None
+        if expected:
+            snapshot = self.states.get(device)
+            updated_at = snapshot and snapshot["updated_at"]
+            # A fresh report with the new value; devices re-report even when unchanged
+            if not updated_at or updated_at < started or snapshot["values"].get("state") != expected:
+                return None
+            done_at = max(done_at, updated_at)
+        return done_at
+
+    def _publish_burst(self, messages, qos):
+        """Publish all messages back to back; returns an MQTTMessageInfo (or exception) per message."""
+        if not self._adapter:
+            return self._publish_all(messages, qos)
+        # On the loop the whole burst goes out before any read is processed
+        future = concurrent.futures.Future()
+
+        def burst():
+            try:
+                future.set_result(self._publish_all(messages, qos))
+            except Exception as e:
+                future.set_exception(e)
+        self._adapter.call_soon(burst)
+        return future.result(timeout=10)
+
+    def _publish_all(self, messages, qos):
+        infos = []
+        for device, topic, payload, expected in messages:
+            try:
+                infos.append(self.client.publish(topic, payload, qos))
+            except Exception as e:
+                infos.append(e)
+        return infos
+
+def state_topics_of(devices_config):
+    return frozenset(info["state_topic"] for info in devices_config.values() if info.get("state_topic"))
+
+def normalize_action(action):
+    # YAML reads bare on/off as booleans
+    if action is True:
+        return "on"
+    if action is False:
+        return "off"
+    return str(action).lower() if action is not None else None
+
+def build_payload(device_info, action, value=None):
+    """MQTT command payload for an action on a device, or None if unsupported."""
+    payload = None
+    component = device_info.get("component")
+
+    if component == "light":
+        if action in ["on", "off", "toggle"]:
+            payload = action.upper()
+        # Add handling for brightness, color, etc. here if needed
+        # elif action == "set_brightness" and value is not None:
+        #     payload = json.dumps({"brightness": value})
+
+    elif component == "climate":
+        if action == "set_temperature" and value is not None:
+            payload = str(value) # Temperature usually sent as a string
+        # Add handling for HVAC mode, fan mode, etc.
+
+    # Add handling for other components (switch, cover, etc.)
+    return payload
+
 
 # Example usage (will be integrated into ziggy_main.py)
 # if __name__ == "__main__":
@@ -0,0 +1,174 @@
+import re
+from collections import defaultdict
+
+# Spoken device name -> configured device, without GPT. Built once from
+# devices_config (rebuild on config change): every device gets its key, the
+# optional "name"/"aliases" (Hebrew or English) and its "room". Names are
+# normalized to canonical tokens (Hebrew and English synonyms share one
+# token, e.g. "מנורה"/"lamp" -> "light", "סלון" -> "living_room"), then
+# looked up in order: exact alias, same token set, room group, and finally
+# a character trigram index for typos and partial names, scored 0..1.
+
+# Multi-word phrases first (matched on the normalized text), then single tokens
+_PHRASES = [
+    ("air conditioner", "ac"), ("air conditioning", "ac"), ("living room", "living_room"),
+    ("sitting room", "living_room"), ("dining room", "dining_room"), ("kids room", "kids_room"),
+    ("חדר שינה", "bedroom"), ("חדר השינה", "bedroom"), ("חדר ילדים", "kids_room"), ("חדר הילדים", "kids_room"),
+    ("חדר עבודה", "office"), ("חדר אוכל", "dining_room"), ("פינת אוכל", "dining_room"),
+]
+
+_SYNONYMS = {
+    "light": ["lights", "lamp", "lamps", "bulb", "bulbs", "אור", "אורות", "מנורה", "מנורות", "תאורה", "נורה"],
+    "ac": ["a/c", "aircon", "מזגן", "מיזוג"],
+    "thermostat": ["heating", "heater", "תרמוסטט", "חימום"],
+    "tv": ["television", "טלוויזיה", "טלויזיה"],
+    "fan": ["fans", "מאוורר"],
+    "blinds": ["blind", "shutter", "shutters", "תריס", "תריסים"],
+    "living_room": ["lounge", "סלון"],
+    "bedroom": [],
+    "kitchen": ["מטבח"],
+    "bathroom": ["toilet", "אמבטיה", "שירותים"],
+    "office": ["study", "משרד"],
+    "hallway": ["hall", "corridor", "מסדרון"],
+    "balcony": ["porch", "מרפסת"],
+}
+_CANONICAL = {word: canon for canon, words in _SYNONYMS.items() for word in [canon] + words}
+
+ROOMS = {"living_room", "bedroom", "kitchen", "bathroom", "office", "hallway", "balcony", "dining_room", "kids_room"}
+_STOPWORDS = {"the", "my", "a", "an", "in", "of", "please", "את", "של", "all", "כל"}
+_PUNCT_RE = re.compile(r"[\s_\-.,!?'\"/]+")
+
+def _canonical_token(token):
+    if token in _CANONICAL:
+        return _CANONICAL[token]
+    # Hebrew definite article / "in": "המנורה" -> "מנורה", "בסלון" -> "סלון"
+    if len(token) > 3 and token[0] in "הב" and token[1:] in _CANONICAL:
+        return _CANONICAL[token[1:]]
+    return token
+
+def normalize_tokens(text):
+    """Canonical tokens for a device name or an utterance fragment."""
+    text = " ".join(_PUNCT_RE.sub(" ", str(text).lower()).split())
+    for phrase, canon in _PHRASES:
+        if phrase in text:
+            text = text.replace(phrase, canon)
+    return [_canonical_token(t) for t in text.split() if t not in _STOPWORDS]
+
+def _trigrams(text):
+    padded = f" {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class DeviceResolver:
+    def __init__(self, devices_config=None, min_confidence=0.45, margin=0.08):
+        self.min_confidence = min_confidence
+        self.margin = margin  # Fuzzy matches closer than this to another device are ambiguous
+        self.build(devices_config or {})
+
+    def build(self, devices_config):
+        """(Re)build every index from devices_config."""
+        self._exact = {}                    # normalized alias -> device
+        self._token_sets = {}               # frozenset(tokens) -> [devices]
+        self._rooms = defaultdict(list)     # room -> [devices]
+        self._kinds = {}                    # device -> canonical kind tokens (light, ac, ...)
+        self._aliases = []                  # (alias text, device)
+        self._trigram_index = defaultdict(list)  # trigram -> [alias ids]
+        self._alias_grams = []              # alias id -> trigram count
+
+        for device, info in devices_config.items():
+            info = info or {}
+            names = [device, info.get("name")] + list(info.get("aliases") or [])
+            tokens_seen = set()
+            for name in filter(None, names):
+                tokens = normalize_tokens(name)
+                if not tokens:
+                    continue
+                alias = " ".join(tokens)
+                self._exact.setdefault(alias, device)
+                key = frozenset(tokens)
+                if device not in self._token_sets.setdefault(key, []):
+                    self._token_sets[key].append(device)
+                tokens_seen.update(tokens)
+                self._add_alias(alias, device)
+            room = info.get("room")
+            room = " ".join(normalize_tokens(room)).replace(" ", "_") if room else None
+            if not room:
+                room = next((t for t in tokens_seen if t in ROOMS), None)
+            if room:
+                self._rooms[room].append(device)
+                tokens_seen.discard(room)
+            component = info.get("component")
+            self._kinds[device] = {t for t in tokens_seen if t in _SYNONYMS and t not in ROOMS}
+            if component:
+                self._kinds[device].add(_canonical_token(component))
+
+    def _add_alias(self, alias, device):
+        alias_id = len(self._aliases)
+        self._aliases.append((alias, device))
+        grams = _trigrams(alias.replace("_", " "))  # "living_room" must still share grams with "livng room"
+        self._alias_grams.append(len(grams))
+        for gram in grams:
+            self._trigram_index[gram].append(alias_id)
+
+    # ── Lookup ───────────────────────────────────────────────────
+    def resolve(self, name):
+        """Best match for a spoken name: {"devices", "confidence", "method"}, or None.
+
+        "devices" has several entries only for room groups ("bedroom lights").
+        """
+        tokens = normalize_tokens(name or "")
+        if not tokens:
+            return None
+        alias = " ".join(tokens)
+        device = self._exact.get(alias)
+        if device:
+            return {"devices": [device], "confidence": 1.0, "method": "alias"}
+        devices = self._token_sets.get(frozenset(tokens))
+        if devices and len(devices) == 1:
+            return {"devices": devices, "confidence": 0.95, "method": "tokens"}
+        group = self._room_group(tokens)
+        if group:
+            return {"devices": group, "confidence": 0.9, "method": "room"}
+        return self._fuzzy(alias, tokens)
+
+    def resolve_one(self, name):
+        """(device, confidence) for a single device, or (None, 0.0)."""
+        match = self.resolve(name)
+        if not match or len(match["devices"]) != 1:
+            return None, 0.0
+        return match["devices"][0], match["confidence"]
+
+    def room_devices(self, room):
+        return list(self._rooms.get(room, ()))
+
+    def _room_group(self, tokens):
+        rooms = [t for t in tokens if t in self._rooms]
+        if len(rooms) != 1:
+            return None
+        kinds = set(tokens) - {rooms[0]}
+        if any(k not in _SYNONYMS for k in kinds):
+            return None  # Extra words we can't interpret: leave it to fuzzy matching
+        return [d for d in self._rooms[rooms[0]] if kinds <= self._kinds.get(d, set())] or None
+
+    def _fuzzy(self, alias, tokens=()):
+        # A kind the query names ("tv") rules out devices of another kind, however
+        # close the rest of the name is ("living room tv" vs "living room light")
+        kinds = {t for t in tokens if t in _SYNONYMS and t not in ROOMS}
+        grams = _trigrams(alias.replace("_", " "))
+        hits = defaultdict(int)
+        for gram in grams:
+            for alias_id in self._trigram_index.get(gram, ()):
+                hits[alias_id] += 1
+        scores = {}  # device -> best Dice coefficient over its aliases
+        for alias_id, shared in hits.items():
+            score = 2 * shared / (len(grams) + self._alias_grams[alias_id])
+            device = self._aliases[alias_id][1]
+            if kinds and not kinds <= self._kinds.get(device, set()):
+                continue
+            if score > scores.get(device, 0.0):
+                scores[device] = score
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        if not ranked or ranked[0][1] < self.min_confidence:
+            return None
+        if len(ranked) > 1 and ranked[0][1] - ranked[1][1] < self.margin:
+            return None  # "lamp" with two lamps: better to ask than to guess
+        return {"devices": [ranked[0][0]], "confidence": round(ranked[0][1], 3), "method": "fuzzy"}
@@ -0,0 +1,221 @@
+import json
+import time
+import threading
+
+# Last known state of every configured device, fed by MQTT state messages.
+# Topic -> device lookup is a precomputed dict for exact state topics and a
+# trie for wildcard subscriptions (+ / #), memoized per concrete topic.
+# Payloads are parsed once on arrival (JSON or plain), values are typed
+# (ON/OFF -> "on"/"off", numbers -> int/float) and every key keeps the time it
+# last changed, so status questions are answered from memory.
+
+ON_OFF = {"on": "on", "off": "off", "true": "on", "false": "off", "open": "on", "closed": "off"}
+
+def device_key(name):
+    """Config key for a spoken/typed device name: "Living room light" -> "living_room_light"."""
+    name = " ".join(str(name).lower().split())
+    if name.startswith("the "):
+        name = name[4:]
+    return name.replace(" ", "_")
+
+def coerce_value(value):
+    if isinstance(value, str):
+        text = value.strip()
+        lowered = text.lower()
+        if lowered in ON_OFF:
+            return ON_OFF[lowered]
+        try:
+            return int(text)
+        except ValueError:
+            pass
+        try:
+            return float(text)
+        except ValueError:
+            return text
+    if isinstance(value, bool):
+        return "on" if value else "off"
+    return value
+
+def parse_payload(payload):
+    """bytes/str payload -> dict of typed values ({"state": ...} for plain payloads)."""
+    if isinstance(payload, bytes):
+        payload = payload.decode("utf-8", errors="replace")
+    try:
+        data = json.loads(payload)
+    except ValueError:
+        data = payload
+    if isinstance(data, dict):
+        return {str(k).lower(): coerce_value(v) for k, v in data.items()}
+    return {"state": coerce_value(data)}
+
+# ── Wildcard topic matching ──────────────────────────────────────
+class TopicTrie:
+    """MQTT topic filters by level; match() returns the values of every filter a topic satisfies."""
+
+    def __init__(self):
+        self.root = {}
+
+    def add(self, topic_filter, value):
+        node = self.root
+        for level in topic_filter.split("/"):
+            node = node.setdefault(level, {})
+        node.setdefault(None, []).append(value)  # None key holds the values ending here
+
+    def match(self, topic):
+        found = []
+        self._match(self.root, topic.split("/"), 0, found)
+        return found
+
+    def _match(self, node, levels, i, found):
+        if "#" in node:
+            found.extend(node["#"].get(None, ()))  # "#" also matches the parent level itself
+        if i == len(levels):
+            found.extend(node.get(None, ()))
+            return
+        child = node.get(levels[i])
+        if child:
+            self._match(child, levels, i + 1, found)
+        child = node.get("+")
+        if child:
+            self._match(child, levels, i + 1, found)
+
+# ── State table ──────────────────────────────────────────────────
+class DeviceState:
+    def __init__(self, name, component=None):
+        self.name = name
+        self.component = component
+        self.values = {}        # key -> typed value
+        self.changed_at = {}    # key -> time the value last changed
+        self.updated_at = None  # time of the last message, changed or not
+
+    def get(self, key="state", default=None):
+        return self.values.get(key, default)
+
+    def snapshot(self):
+        return {"name": self.name, "component": self.component, "values": dict(self.values),
+                "changed_at": dict(self.changed_at), "updated_at": self.updated_at}
+
+class DeviceStateStore:
+    """Thread-safe: written from the MQTT callback, read from handler threads."""
+
+    def __init__(self, devices_config=None, memo_size=1024):
+        self._lock = threading.Lock()
+        self._states = {}
+        self._exact = {}           # state topic -> [device]
+        self._wildcards = TopicTrie()
+        self._memo = {}            # concrete topic -> [device], for wildcard hits
+        self._memo_size = memo_size
+        self._subscribers = []     # (device or None, callback)
+        for name, info in (devices_config or {}).items():
+            self.add_device(name, info)
+
+    def set_devices(self, devices_config):
+        """Rebuild the topic maps for a changed configuration; known states are kept."""
+        with self._lock:
+            self._exact, self._wildcards, self._memo = {}, TopicTrie(), {}
+        for name, info in (devices_config or {}).items():
+            self.add_device(name, info)
+
+    def add_device(self, name, info):
+        with self._lock:
+            if name in self._states:
+                self._states[name].component = info.get("component")
+            else:
+                self._states[name] = DeviceState(name, info.get("component"))
+            topic = info.get("state_topic")
+            if topic:
+                if "+" in topic or "#" in topic:
+                    self._wildcards.add(topic, name)
+                    self._memo.clear()
+                else:
+                    self._exact.setdefault(topic, []).append(name)
+
+    def devices_for_topic(self, topic):
+        devices = self._exact.get(topic)
+        if devices is not None:
+            return devices
+        devices = self._memo.get(topic)
+        if devices is None:
+            devices = self._wildcards.match(topic)
+            if len(self._memo) >= self._memo_size:
+                self._memo.clear()
+            self._memo[topic] = devices
+        return devices
+
+    # ── Updates ──────────────────────────────────────────────────
+    def update_from_message(self, topic, payload):
+        """Apply an MQTT state message; returns the devices it touched."""
+        devices = self.devices_for_topic(topic)
+        if not devices:
+            return []
+        values = parse_payload(payload)
+        wildcard = topic not in self._exact
+        if wildcard and list(values) == ["state"]:
+            # Per-attribute topics (".../thermostat/current_temperature") name the key
+            last = topic.rsplit("/", 1)[-1]
+            if last != "state":
+                values = {last.lower(): values["state"]}
+        for device in devices:
+            self.update(device, values)
+        return devices
+
+    def update(self, device, values):
+        now = time.time()
+        with self._lock:
+            state = self._states.get(device)
+            if state is None:
+                state = self._states[device] = DeviceState(device)
+            changes = {}
+            for key, value in values.items():
+                if state.values.get(key) != value or key not in state.values:
+                    state.values[key] = value
+                    state.changed_at[key] = now
+                    changes[key] = value
+            state.updated_at = now
+            subscribers = [cb for name, cb in self._subscribers if name in (None, device)] if changes else ()
+        for callback in subscribers:
+            try:
+                callback(device, changes)
+            except Exception as e:
+                print(f"[DEVICE STATE] Subscriber error for {device}: {e}")
+
+    # ── Queries ──────────────────────────────────────────────────
+    def get(self, device):
+        """Snapshot of one device (or None if unknown)."""
+        with self._lock:
+            state = self._states.get(device_key(device))
+            return state.snapshot() if state else None
+
+    def value(self, device, key="state", default=None):
+        with self._lock:
+            state = self._states.get(device_key(device))
+            return state.values.get(key, default) if state else default
+
+    def is_on(self, device):
+        """True/False from the last reported state, None when nothing has been reported."""
+        state = self.value(device)
+        return None if state is None else state == "on"
+
+    def known(self):
+        """Snapshots of every device that has reported a state."""
+        with self._lock:
+            return {name: s.snapshot() for name, s in self._states.items() if s.updated_at}
+
+    def find(self, **conditions):
+        """Devices whose current values match all conditions, e.g. find(state="on")."""
+        with self._lock:
+            return [name for name, s in self._states.items()
+                    if s.updated_at and all(s.values.get(k) == v for k, v in conditions.items())]
+
+    # ── Change subscriptions ─────────────────────────────────────
+    def subscribe(self, callback, device=None):
+        """callback(device, changes) on every change (of one device, or all); returns an unsubscribe function."""
+        entry = (device_key(device) if device else None, callback)
+        with self._lock:
+            self._subscribers.append(entry)
+
+        def unsubscribe():
+            with self._lock:
+                if entry in self._subscribers:
+                    self._subscribers.remove(entry)
+        return unsubscribe
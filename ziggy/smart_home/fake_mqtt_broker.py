@@ -0,0 +1,203 @@
+import time
+import struct
+import socket
+import threading
+import socketserver
+
+# Minimal in-process MQTT 3.1.1 broker, for benchmarks and offline runs. It
+# speaks just enough of the protocol for paho-mqtt: CONNECT, SUBSCRIBE (with
+# + / # wildcards and retained messages), PUBLISH at QoS 0/1 with PUBACK,
+# PINGREQ and DISCONNECT. Deliveries to subscribers are QoS 0. Simulated
+# devices answer commands by publishing their new state, so scene runs can
+# be confirmed end to end without hardware.
+
+CONNECT, CONNACK, PUBLISH, PUBACK = 1, 2, 3, 4
+SUBSCRIBE, SUBACK, UNSUBSCRIBE, UNSUBACK = 8, 9, 10, 11
+PINGREQ, PINGRESP, DISCONNECT = 12, 13, 14
+
+def topic_matches(topic_filter, topic):
+    filter_levels = topic_filter.split("/")
+    levels = topic.split("/")
+    for i, level in enumerate(filter_levels):
+        if level == "#":
+            return True
+        if i >= len(levels) or (level != "+" and level != levels[i]):
+            return False
+    return len(filter_levels) == len(levels)
+
+def encode_length(length):
+    out = bytearray()
+    while True:
+        byte, length = length % 128, length // 128
+        out.append(byte | (0x80 if length else 0))
+        if not length:
+            return bytes(out)
+
+def encode_string(text):
+    data = text.encode("utf-8")
+    return struct.pack("!H", len(data)) + data
+
+def publish_packet(topic, payload, retain=False):
+    body = encode_string(topic) + payload
+    return bytes([PUBLISH << 4 | (1 if retain else 0)]) + encode_length(len(body)) + body
+
+class FakeMqttBroker:
+    def __init__(self, port=0):
+        self.received = []     # (time, topic, payload, qos) for every PUBLISH from a client
+        self.retained = {}
+        self.devices = {}      # command_topic -> {"state_topic", "delay", "silent"}
+        self.puback_delay = 0.0
+        self._sessions = set()
+        self._lock = threading.Lock()
+        broker = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                session = _Session(self.request)
+                with broker._lock:
+                    broker._sessions.add(session)
+                try:
+                    broker._serve(session)
+                except (ConnectionError, OSError):
+                    pass
+                finally:
+                    with broker._lock:
+                        broker._sessions.discard(session)
+
+        self._server = socketserver.ThreadingTCPServer(("127.0.0.1", port), Handler, bind_and_activate=False)
+        self._server.allow_reuse_address = True
+        self._server.daemon_threads = True
+        self._server.server_bind()
+        self._server.server_activate()
+
+    @property
+    def port(self):
+        return self._server.server_address[1]
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, name="fake-mqtt", daemon=True).start()
+        return "127.0.0.1", self.port
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        with self._lock:
+            sessions = list(self._sessions)
+        for session in sessions:
+            session.close()
+
+    # ── Test driver API ──────────────────────────────────────────
+    def simulate_device(self, command_topic, state_topic, delay=0.0, silent=False):
+        """Answer commands on command_topic by publishing the payload to state_topic after delay.
+
+        silent=True models a device that is offline: commands are accepted but never confirmed.
+        """
+        self.devices[command_topic] = {"state_topic": state_topic, "delay": delay, "silent": silent}
+
+    def publish(self, topic, payload, retain=False):
+        """Publish as the broker (e.g. a device reporting state on its own)."""
+        if isinstance(payload, str):
+            payload = payload.encode("utf-8")
+        if retain:
+            self.retained[topic] = payload
+        packet = publish_packet(topic, payload)
+        with self._lock:
+            sessions = list(self._sessions)
+        for session in sessions:
+            if any(topic_matches(f, topic) for f in list(session.filters)):
+                session.send(packet)
+
+    # ── Protocol ─────────────────────────────────────────────────
+    def _serve(self, session):
+        while True:
+            header, body = session.read_packet()
+            kind = header >> 4
+            if kind == CONNECT:
+                session.send(bytes([CONNACK << 4, 2, 0, 0]))
+            elif kind == PUBLISH:
+                self._on_publish(session, header, body)
+            elif kind == SUBSCRIBE:
+                self._on_subscribe(session, body)
+            elif kind == UNSUBSCRIBE:
+                (packet_id,) = struct.unpack("!H", body[:2])
+                session.send(bytes([UNSUBACK << 4, 2]) + struct.pack("!H", packet_id))
+            elif kind == PINGREQ:
+                session.send(bytes([PINGRESP << 4, 0]))
+            elif kind == DISCONNECT:
+                return
+
+    def _on_publish(self, session, header, body):
+        qos = (header >> 1) & 0x03
+        (topic_length,) = struct.unpack("!H", body[:2])
+        topic = body[2:2 + topic_length].decode("utf-8")
+        offset = 2 + topic_length
+        packet_id = None
+        if qos:
+            (packet_id,) = struct.unpack("!H", body[offset:offset + 2])
+            offset += 2
+        payload = body[offset:]
+        self.received.append((time.time(), topic, payload, qos))
+        if qos:
+            ack = bytes([PUBACK << 4, 2]) + struct.pack("!H", packet_id)
+            if self.puback_delay:
+                threading.Timer(self.puback_delay, session.send, (ack,)).start()
+            else:
+                session.send(ack)
+        self.publish(topic, payload, retain=bool(header & 0x01))
+        device = self.devices.get(topic)
+        if device and not device["silent"]:
+            args = (device["state_topic"], payload, True)
+            if device["delay"]:
+                threading.Timer(device["delay"], self.publish, args).start()
+            else:
+                self.publish(*args)
+
+    def _on_subscribe(self, session, body):
+        (packet_id,) = struct.unpack("!H", body[:2])
+        offset, granted, filters = 2, [], []
+        while offset < len(body):
+            (length,) = struct.unpack("!H", body[offset:offset + 2])
+            filters.append(body[offset + 2:offset + 2 + length].decode("utf-8"))
+            offset += 2 + length + 1  # Requested QoS byte; deliveries are QoS 0
+            granted.append(0)
+        session.filters.update(filters)
+        session.send(bytes([SUBACK << 4]) + encode_length(2 + len(granted)) + struct.pack("!H", packet_id) + bytes(granted))
+        for topic, payload in list(self.retained.items()):
+            if any(topic_matches(f, topic) for f in filters):
+                session.send(publish_packet(topic, payload, retain=True))
+
+class _Session:
+    def __init__(self, sock):
+        self.sock = sock
+        self.filters = set()
+        self._reader = sock.makefile("rb")
+        self._send_lock = threading.Lock()
+
+    def read_packet(self):
+        first = self._reader.read(1)
+        if not first:
+            raise ConnectionError("client closed")
+        length, multiplier = 0, 1
+        while True:
+            byte = self._reader.read(1)
+            if not byte:
+                raise ConnectionError("client closed")
+            length += (byte[0] & 0x7F) * multiplier
+            if not byte[0] & 0x80:
+                break
+            multiplier *= 128
+        return first[0], self._reader.read(length)
+
+    def send(self, data):
+        try:
+            with self._send_lock:
+                self.sock.sendall(data)
+        except OSError:
+            pass  # Client went away; its handler thread cleans up
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
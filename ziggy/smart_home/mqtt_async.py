@@ -0,0 +1,78 @@
+import asyncio
+
+# Drives a paho-mqtt client from an asyncio event loop instead of its own
+# loop_start() thread: the client's socket is watched with add_reader /
+# add_writer, keepalives run from a periodic task, and calls from other
+# threads are marshalled onto the loop so the socket is only touched there.
+
+class AsyncMqttAdapter:
+    def __init__(self, client, loop):
+        self.client = client
+        self.loop = loop
+        self._misc_task = None
+        client.on_socket_open = self._on_socket_open
+        client.on_socket_close = self._on_socket_close
+        client.on_socket_register_write = self._on_socket_register_write
+        client.on_socket_unregister_write = self._on_socket_unregister_write
+
+    def call_soon(self, func, *args):
+        """Run func on the loop; safe from any thread."""
+        self.loop.call_soon_threadsafe(func, *args)
+
+    async def connect(self, host, port=1883, keepalive=60):
+        # The TCP connect itself blocks, so it runs in an executor
+        await self.loop.run_in_executor(None, self.client.connect, host, port, keepalive)
+
+    def disconnect(self):
+        self.client.disconnect()
+        if self._misc_task:
+            self._misc_task.cancel()
+            self._misc_task = None
+
+    # ── paho socket callbacks ────────────────────────────────────
+    def _on_loop(self, func, *args):
+        # Callbacks fire on the loop (reads/writes) or a worker (connect); socket
+        # close must be handled immediately, before paho closes the descriptor
+        try:
+            on_loop = asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            func(*args)
+        else:
+            self.loop.call_soon_threadsafe(func, *args)
+
+    def _on_socket_open(self, client, userdata, sock):
+        self._on_loop(self._watch, sock)
+
+    def _watch(self, sock):
+        self.loop.add_reader(sock, client_loop_read, self.client)
+        if self._misc_task is None:
+            self._misc_task = self.loop.create_task(self._misc_loop())
+
+    def _on_socket_close(self, client, userdata, sock):
+        self._on_loop(self.loop.remove_reader, sock)
+
+    def _on_socket_register_write(self, client, userdata, sock):
+        self._on_loop(self.loop.add_writer, sock, client_loop_write, client)
+
+    def _on_socket_unregister_write(self, client, userdata, sock):
+        self._on_loop(self.loop.remove_writer, sock)
+
+    async def _misc_loop(self):
+        # Keepalive pings and reconnect bookkeeping (what loop_forever does between reads)
+        while True:
+            if self.client.loop_misc() != 0:
+                # Connection lost: reconnect in the background without blocking the loop
+                try:
+                    await self.loop.run_in_executor(None, self.client.reconnect)
+                except Exception as e:
+                    print(f"[MQTT ERROR] Reconnect failed: {e}")
+                    await asyncio.sleep(5)
+            await asyncio.sleep(1)
+
+def client_loop_read(client):
+    client.loop_read()
+
+def client_loop_write(client):
+    client.loop_write()
@@ -0,0 +1,218 @@
+import os
+import json
+import time
+import heapq
+import itertools
+import threading
+from datetime import datetime
+
+from tasks.time_parser import next_occurrence, local_timezone
+
+# Timer queue for reminders and tasks. One daemon thread sleeps on a
+# condition until the earliest job is due (no polling): jobs sit in a
+# min-heap keyed by due time, inserts are O(log n) and cancels mark the job
+# dead so its heap entry is skipped when it surfaces. Every change is
+# appended to a JSON-lines journal (fsync'd) that is replayed and compacted
+# at start, so nothing is lost on a crash or power cut; jobs that fell due
+# while Ziggy was off are delivered on start (marked late) if still recent.
+
+class Scheduler:
+    def __init__(self, path, deliver, missed_grace=12 * 3600, fsync=True, tz=None):
+        self.path = path
+        self.deliver = deliver            # deliver(job, late) from the timer thread
+        self.missed_grace = missed_grace  # Older missed one-off jobs are dropped, not announced
+        self.fsync = fsync
+        self.tz = tz or local_timezone()  # Wall clock for recurrence rules ("daily:08:00")
+        self.fired = 0
+        self.wakeups = 0
+        self._jobs = {}                   # id -> job dict (live jobs only)
+        self._heap = []                   # (due, seq, id); stale entries skipped lazily
+        self._by_text = {}                # normalized text -> set of ids
+        self._seq = itertools.count()
+        self._changed = threading.Condition()
+        self._journal = None
+        self._journal_lines = 0
+        self._thread = None
+        self._running = False
+
+    # ── Lifecycle ────────────────────────────────────────────────
+    def start(self):
+        with self._changed:
+            if self._running:
+                return
+            self._load()
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="ziggy-scheduler", daemon=True)
+        self._thread.start()
+        print(f"[SCHEDULER] {len(self._jobs)} pending job(s)")
+
+    def stop(self):
+        with self._changed:
+            self._running = False
+            self._changed.notify_all()
+        if self._thread:
+            self._thread.join(timeout=2)
+        with self._changed:
+            if self._journal:
+                self._journal.close()
+                self._journal = None
+
+    # ── Jobs ─────────────────────────────────────────────────────
+    def add(self, text, due, rule=None, kind="reminder", lang="en"):
+        """Schedule text for `due` (datetime or timestamp); returns the job dict."""
+        due = due.timestamp() if isinstance(due, datetime) else float(due)
+        job = {"id": f"{int(time.time() * 1000):x}-{next(self._seq)}", "kind": kind, "text": text,
+               "due": due, "rule": rule, "lang": lang, "created": time.time()}
+        with self._changed:
+            self._insert(job)
+            self._append({"op": "add", "job": job})
+            if self._heap[0][2] == job["id"]:
+                self._changed.notify()  # New earliest job: re-arm the timer
+        return dict(job)
+
+    def cancel(self, description):
+        """Cancel the jobs matching a description (exact text first, then substring); returns them."""
+        key = _normalize(description)
+        with self._changed:
+            ids = set(self._by_text.get(key, ()))
+            if not ids and key:
+                ids = {job_id for job_id, job in self._jobs.items() if key in _normalize(job["text"])}
+            cancelled = [self._remove(job_id) for job_id in ids]
+            for job in cancelled:
+                self._append({"op": "remove", "id": job["id"]})
+        return cancelled
+
+    def cancel_id(self, job_id):
+        with self._changed:
+            if job_id not in self._jobs:
+                return None
+            job = self._remove(job_id)
+            self._append({"op": "remove", "id": job_id})
+            return job
+
+    def find(self, description):
+        key = _normalize(description)
+        with self._changed:
+            return [dict(self._jobs[job_id]) for job_id in self._by_text.get(key, ())]
+
+    def pending(self, limit=None):
+        """Live jobs, soonest first."""
+        with self._changed:
+            jobs = sorted(self._jobs.values(), key=lambda job: job["due"])
+        return [dict(job) for job in jobs[:limit]]
+
+    def stats(self):
+        with self._changed:
+            return {"pending": len(self._jobs), "heap": len(self._heap), "fired": self.fired,
+                    "wakeups": self.wakeups, "journal_lines": self._journal_lines}
+
+    # ── Index (call with _changed held) ──────────────────────────
+    def _insert(self, job):
+        self._jobs[job["id"]] = job
+        self._by_text.setdefault(_normalize(job["text"]), set()).add(job["id"])
+        heapq.heappush(self._heap, (job["due"], next(self._seq), job["id"]))
+
+    def _remove(self, job_id):
+        job = self._jobs.pop(job_id)
+        key = _normalize(job["text"])
+        ids = self._by_text.get(key)
+        if ids:
+            ids.discard(job_id)
+            if not ids:
+                del self._by_text[key]
+        if len(self._heap) > 64 and len(self._heap) > 2 * len(self._jobs):
+            # Mostly dead entries: rebuild instead of popping them one by one
+            self._heap = [entry for entry in self._heap if self._is_live(entry)]
+            heapq.heapify(self._heap)
+        return job
+
+    def _is_live(self, entry):
+        job = self._jobs.get(entry[2])
+        return job is not None and job["due"] == entry[0]
+
+    # ── Timer thread ─────────────────────────────────────────────
+    def _run(self):
+        while True:
+            with self._changed:
+                while self._running:
+                    while self._heap and not self._is_live(self._heap[0]):
+                        heapq.heappop(self._heap)
+                    if not self._heap:
+                        self._changed.wait()
+                    else:
+                        delay = self._heap[0][0] - time.time()
+                        if delay <= 0:
+                            break
+                        self._changed.wait(delay)
+                    self.wakeups += 1
+                if not self._running:
+                    return
+                due, _, job_id = heapq.heappop(self._heap)
+                job = dict(self._jobs[job_id])
+                late = time.time() - due
+                if job["rule"]:
+                    # Next occurrence after now: occurrences missed while off collapse into one
+                    nxt = next_occurrence(job["rule"], datetime.fromtimestamp(max(time.time(), due), self.tz)).timestamp()
+                    self._jobs[job_id]["due"] = nxt
+                    heapq.heappush(self._heap, (nxt, next(self._seq), job_id))
+                    self._append({"op": "due", "id": job_id, "due": nxt})
+                else:
+                    self._remove(job_id)
+                    self._append({"op": "remove", "id": job_id})
+                self.fired += 1
+            if late > self.missed_grace and not job["rule"]:
+                print(f"[SCHEDULER] Dropped '{job['text']}' (missed by {late / 3600:.0f} h)")
+                continue
+            try:
+                self.deliver(job, late > 60)
+            except Exception as e:
+                print(f"[SCHEDULER ERROR] Delivery failed for '{job['text']}': {e}")
+
+    # ── Journal ──────────────────────────────────────────────────
+    def _append(self, record):
+        if self._journal is None:
+            return
+        self._journal.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._journal.flush()
+        if self.fsync:
+            os.fsync(self._journal.fileno())
+        self._journal_lines += 1
+        if self._journal_lines > 1000 and self._journal_lines > 4 * len(self._jobs):
+            self._compact()
+
+    def _load(self):
+        jobs = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # Torn last line after a crash
+                    if record["op"] == "add":
+                        jobs[record["job"]["id"]] = record["job"]
+                    elif record["op"] == "remove":
+                        jobs.pop(record["id"], None)
+                    elif record["op"] == "due" and record["id"] in jobs:
+                        jobs[record["id"]]["due"] = record["due"]
+        for job in jobs.values():
+            self._insert(job)
+        self._compact()
+
+    def _compact(self):
+        """Rewrite the journal as one "add" per live job (atomic replace)."""
+        if self._journal:
+            self._journal.close()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for job in self._jobs.values():
+                f.write(json.dumps({"op": "add", "job": job}, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self._journal = open(self.path, "a", encoding="utf-8")
+        self._journal_lines = len(self._jobs)
+
+def _normalize(text):
+    return " ".join(str(text or "").lower().split())
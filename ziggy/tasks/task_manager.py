@@ -1,4 +1,72 @@
-# Task manager
+import os
 
-def add_task(task):
-    print(f"Task added: {task}")
+from tasks.scheduler import Scheduler
+from tasks.time_parser import parse_when, describe, local_timezone
+
+# Task manager: reminders and tasks on top of the scheduler. Due jobs are
+# spoken by the voice assistant and sent to the Telegram users in settings.
+
+_scheduler = None
+
+def get_scheduler():
+    """The shared Scheduler, started on first use (replays the journal, catches up missed jobs)."""
+    global _scheduler
+    if _scheduler is None:
+        from config.settings import settings
+        config = settings.get("scheduler", {})
+        path = config.get("store", "tasks/schedule.jsonl")
+        if not os.path.isabs(path):
+            path = os.path.join(os.path.dirname(os.path.dirname(__file__)), path)
+        _scheduler = Scheduler(path, deliver, missed_grace=config.get("missed_grace_hours", 12) * 3600,
+                               tz=local_timezone())
+        _scheduler.start()
+    return _scheduler
+
+def start():
+    get_scheduler()
+
+def _schedule(kind, text, when, lang):
+    parsed = parse_when(when)
+    if not parsed:
+        print(f"[TASKS] Could not understand the time '{when}'")
+        return None
+    job = get_scheduler().add(text, parsed["due"], rule=parsed["rule"], kind=kind, lang=lang)
+    job["when"] = describe(parsed["due"], parsed["rule"], lang)
+    print(f"[TASKS] {kind.capitalize()} '{text}' {job['when']}")
+    return job
+
+def create_task(description, when, lang="en"):
+    """Schedule a task; returns the job (with a spoken "when") or None if the time isn't understood."""
+    return _schedule("task", description, when, lang)
+
+def set_reminder(message, when, lang="en"):
+    return _schedule("reminder", message, when, lang)
+
+def cancel_task(description):
+    """Cancel tasks/reminders matching the description; returns the cancelled jobs."""
+    cancelled = get_scheduler().cancel(description)
+    print(f"[TASKS] Cancelled {len(cancelled)} job(s) matching '{description}'")
+    return cancelled
+
+def list_tasks(limit=10):
+    return get_scheduler().pending(limit)
+
+# ── Delivery ─────────────────────────────────────────────────────
+def deliver(job, late):
+    from config.settings import settings
+    from core.intent_registry import registry
+    he = job.get("lang") == "he"
+    label = ("תזכורת" if job["kind"] == "reminder" else "משימה") if he else job["kind"].capitalize()
+    message = f"{label}: {job['text']}"
+    if late:
+        message += " (פספסתי את זה כשהייתי כבוי)" if he else " (missed while I was off)"
+    text = f"⏰ {message}"
+    print(f"[TASKS] Due: {message}")
+    voice = registry.services.get("voice")
+    if voice:
+        from voice.audio_player import PRIORITY_ALERT
+        voice.say(message, priority=PRIORITY_ALERT)  # Ahead of any queued replies
+    runtime = registry.services.get("runtime")
+    if runtime:
+        chat_ids = settings.get("scheduler", {}).get("telegram_chat_ids") or settings["telegram"].get("allowed_users", [])
+        runtime.send_telegram(chat_ids, text)
@@ -0,0 +1,262 @@
+import re
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+# Bilingual (English/Hebrew) "when" phrases -> first due time and an optional
+# recurrence rule. Covers what people actually say to a speaker: relative
+# times ("in 10 minutes", "בעוד חצי שעה"), a day and/or a clock time
+# ("tomorrow at 8", "מחר בשמונה בערב"), and repeats ("every monday at 9",
+# "כל בוקר"). Rules are plain strings so they persist as-is:
+#   "interval:<seconds>"  "daily:HH:MM"  "weekdays:HH:MM"  "weekly:<weekday>:HH:MM" (Monday = 0)
+
+MIN_INTERVAL = 60  # Seconds; "every 10 seconds" repeats once a minute, "every 0 minutes" is rejected
+
+# "at 8" and "tomorrow" mean the household's wall clock (scheduler.timezone in
+# settings), never the process TZ, which ziggy_main sets to UTC
+DEFAULT_TIMEZONE = "Asia/Jerusalem"
+
+def local_timezone():
+    """The configured zone for parsing, scheduling and describing due times."""
+    from config.settings import settings
+    name = settings.get("scheduler", {}).get("timezone") or DEFAULT_TIMEZONE
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        print(f"[TASKS] Unknown timezone '{name}', using {DEFAULT_TIMEZONE}")
+        return ZoneInfo(DEFAULT_TIMEZONE)
+
+def local_now():
+    return datetime.now(local_timezone())
+
+_NUMBERS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+    "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "fifteen": 15, "twenty": 20,
+    "thirty": 30, "forty five": 45,
+    "אחת": 1, "אחד": 1, "שתיים": 2, "שתים": 2, "שניים": 2, "שלוש": 3, "שלושה": 3,
+    "ארבע": 4, "ארבעה": 4, "חמש": 5, "חמישה": 5, "שש": 6, "שישה": 6, "שבע": 7, "שבעה": 7,
+    "שמונה": 8, "תשע": 9, "תשעה": 9, "עשר": 10, "עשרה": 10, "אחת עשרה": 11, "שתים עשרה": 12,
+    "חמש עשרה": 15, "עשרים": 20, "שלושים": 30,
+}
+_NUMBER_RE = "|".join(sorted((re.escape(k) for k in _NUMBERS), key=len, reverse=True))
+_HOUR_WORD_RE = "|".join(sorted((re.escape(k) for k, v in _NUMBERS.items() if v <= 12 and k not in ("a", "an")),
+                                key=len, reverse=True))
+
+_UNITS = {
+    "second": 1, "seconds": 1, "sec": 1, "secs": 1, "שניה": 1, "שנייה": 1, "שניות": 1,
+    "minute": 60, "minutes": 60, "min": 60, "mins": 60, "דקה": 60, "דקות": 60,
+    "hour": 3600, "hours": 3600, "hr": 3600, "hrs": 3600, "שעה": 3600, "שעות": 3600,
+    "day": 86400, "days": 86400, "יום": 86400, "ימים": 86400,
+    "week": 604800, "weeks": 604800, "שבוע": 604800, "שבועות": 604800,
+}
+# Hebrew duals and fixed amounts: "שעתיים" = two hours, "חצי שעה" = half an hour
+_AMOUNTS = {
+    "half an hour": 1800, "half hour": 1800, "חצי שעה": 1800, "רבע שעה": 900, "שלושת רבעי שעה": 2700,
+    "דקותיים": 120, "שעתיים": 7200, "יומיים": 172800, "שבועיים": 1209600,
+}
+_UNIT_RE = "|".join(sorted(_UNITS, key=len, reverse=True))
+_AMOUNT_RE = "|".join(sorted((re.escape(k) for k in _AMOUNTS), key=len, reverse=True))
+
+_WEEKDAYS = {
+    "monday": 0, "tuesday": 1, "wednesday": 2, "thursday": 3, "friday": 4, "saturday": 5, "sunday": 6,
+    "שני": 0, "שלישי": 1, "רביעי": 2, "חמישי": 3, "שישי": 4, "שבת": 5, "ראשון": 6,
+}
+_WEEKDAY_RE = "|".join(sorted(_WEEKDAYS, key=len, reverse=True))
+_WEEKDAY_NAMES_HE = ["שני", "שלישי", "רביעי", "חמישי", "שישי", "שבת", "ראשון"]  # By weekday(), Monday = 0
+
+# Part of day: default clock time, and whether a bare hour means pm
+_PARTS = {
+    "morning": (8, False), "בבוקר": (8, False), "בוקר": (8, False),
+    "noon": (12, True), "afternoon": (15, True), "בצהריים": (12, True), "צהריים": (12, True), "אחר הצהריים": (15, True),
+    "evening": (20, True), "tonight": (20, True), "night": (21, True),
+    "בערב": (20, True), "ערב": (20, True), "הערב": (20, True), "בלילה": (21, True), "לילה": (21, True),
+}
+_PART_RE = "|".join(sorted((re.escape(k) for k in _PARTS), key=len, reverse=True))
+
+_RELATIVE_RE = re.compile(rf"\b(?:in|בעוד) (?:(?P<amount>{_AMOUNT_RE})|(?P<n>\d+|{_NUMBER_RE}) ?(?P<unit>{_UNIT_RE})|(?P<unit_only>{_UNIT_RE}))\b")
+_EVERY_RE = re.compile(rf"\b(?:every|כל) (?:(?:יום )?(?P<weekday>{_WEEKDAY_RE})|(?P<weekdays>weekday)|(?P<part>{_PART_RE})"
+                       rf"|(?P<amount>{_AMOUNT_RE})|(?:(?P<n>\d+|{_NUMBER_RE}) )?(?P<unit>{_UNIT_RE}))\b")
+_CLOCK_RE = re.compile(rf"(?:\b(?:at|by|בשעה)\s*|(?<![\w])ב-?\s*)(?P<h>\d{{1,2}})(?::(?P<m>\d{{2}}))?\s*(?P<ampm>am|pm)?"
+                       rf"|\b(?P<h2>\d{{1,2}})(?::(?P<m2>\d{{2}}))?\s*(?P<ampm2>am|pm)\b"
+                       rf"|(?:\b(?:at)\s+|(?<![\w])ב-?)(?P<word>{_HOUR_WORD_RE})(?:\s+(?P<half>וחצי|ורבע))?\b")
+_WEEKDAY_ON_RE = re.compile(rf"(?:\b(?:on|next|this)\s+|ביום\s+|(?<![\w])ב)(?P<weekday>{_WEEKDAY_RE})\b")
+_PART_ON_RE = re.compile(rf"(?<![\w])(?P<part>{_PART_RE})(?![\w])")
+
+def _number(text):
+    return int(text) if text.isdigit() else _NUMBERS[text]
+
+def _amount(m):
+    if m.group("amount"):
+        return _AMOUNTS[m.group("amount")]
+    count = _number(m.group("n")) if m.group("n") else 1
+    return count * _UNITS[m.group("unit") or m.group("unit_only")]
+
+def _clock(text):
+    """(hour, minute, is_pm or None) from the first clock time in text, or None."""
+    m = _CLOCK_RE.search(text)
+    if not m:
+        return None
+    if m.group("word"):
+        minute = {"וחצי": 30, "ורבע": 15}.get(m.group("half"), 0)
+        return _NUMBERS[m.group("word")], minute, None
+    hour = int(m.group("h") or m.group("h2"))
+    minute = int(m.group("m") or m.group("m2") or 0)
+    ampm = m.group("ampm") or m.group("ampm2")
+    if hour > 23 or minute > 59:
+        return None
+    return hour, minute, (ampm == "pm") if ampm else None
+
+def _apply_clock(day, clock, pm_hint, now, flexible):
+    """Datetime on `day` at clock. A bare hour (1-12) takes am/pm from the hint;
+    otherwise the next one still ahead (flexible) or the usual reading (7-11 am, 12-6 pm)."""
+    hour, minute, is_pm = clock
+    if is_pm is None and pm_hint is not None and 1 <= hour <= 12:
+        is_pm = pm_hint
+    if is_pm is not None and 1 <= hour <= 12:
+        hour = hour % 12 + (12 if is_pm else 0)
+    elif 1 <= hour <= 12:
+        morning = day.replace(hour=hour % 12 or 12, minute=minute, second=0, microsecond=0)
+        evening = morning + timedelta(hours=12) if hour < 12 else morning
+        if flexible:
+            return morning if morning > now else evening
+        return morning if hour >= 7 else evening
+    return day.replace(hour=hour, minute=minute, second=0, microsecond=0)
+
+def _later(now, seconds):
+    """now + seconds of real time; aware datetimes step through UTC so a DST change
+    doesn't stretch "in 30 minutes". Whole days keep the wall clock instead."""
+    if now.tzinfo is None or seconds % 86400 == 0:
+        return now + timedelta(seconds=seconds)
+    return (now.astimezone(timezone.utc) + timedelta(seconds=seconds)).astimezone(now.tzinfo)
+
+def _next_weekday(now, weekday, at):
+    days = (weekday - now.weekday()) % 7
+    due = (now + timedelta(days=days)).replace(hour=at[0], minute=at[1], second=0, microsecond=0)
+    return due if due > now else due + timedelta(days=7)
+
+def next_occurrence(rule, after):
+    """Next due datetime of a recurrence rule strictly after `after`."""
+    kind, _, spec = rule.partition(":")
+    if kind == "interval":
+        return _later(after, max(int(spec), MIN_INTERVAL))  # Also guards old journal entries
+    if kind == "daily":
+        hour, minute = map(int, spec.split(":"))
+        due = after.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        return due if due > after else due + timedelta(days=1)
+    if kind == "weekly":
+        weekday, hour, minute = map(int, spec.split(":"))
+        return _next_weekday(after, weekday, (hour, minute))
+    if kind == "weekdays":
+        hour, minute = map(int, spec.split(":"))
+        due = after
+        while True:
+            due = next_occurrence(f"daily:{hour:02d}:{minute:02d}", due)
+            if due.weekday() < 5:
+                return due
+    raise ValueError(f"Unknown recurrence rule: {rule}")
+
+def parse_when(text, now=None):
+    """"tomorrow at 8" -> {"due": datetime, "rule": None}; None if no time is recognised.
+
+    now defaults to local_now(), so due times are aware datetimes in the configured zone.
+    """
+    now = now or local_now()
+    text = " ".join(str(text or "").lower().split())
+    if not text:
+        return None
+
+    part = _PART_ON_RE.search(text)
+    part_time, pm_hint = _PARTS[part.group("part")] if part else (None, None)
+    clock = _clock(text)
+
+    every = _EVERY_RE.search(text)
+    if every:
+        if every.group("amount") or (every.group("unit") and (every.group("n") or _UNITS[every.group("unit")] < 86400)):
+            seconds = _amount(every)
+            if seconds <= 0:
+                return None
+            seconds = max(seconds, MIN_INTERVAL)
+            return {"due": _later(now, seconds), "rule": f"interval:{seconds}"}
+        if clock:
+            at = _apply_clock(now, clock, pm_hint, now, flexible=False)
+            at = f"{at.hour:02d}:{at.minute:02d}"
+        else:
+            at = f"{part_time if part_time is not None else 9:02d}:00"
+        if every.group("weekday"):
+            rule = f"weekly:{_WEEKDAYS[every.group('weekday')]}:{at}"
+        elif every.group("weekdays"):
+            rule = f"weekdays:{at}"
+        elif every.group("unit") and _UNITS[every.group("unit")] > 86400:
+            rule = f"weekly:{now.weekday()}:{at}"  # "every week": same weekday as today
+        else:
+            rule = f"daily:{at}"  # "every day", "every morning", "כל ערב"
+        return {"due": next_occurrence(rule, now), "rule": rule}
+
+    relative = _RELATIVE_RE.search(text)
+    if relative:
+        seconds = _amount(relative)
+        if seconds <= 0:
+            return None
+        due = _later(now, seconds)
+        if seconds % 86400 == 0 and (clock or part_time is not None):
+            # "in 2 days at 9", "בעוד שבוע בבוקר": the offset picks the day, the clock the time
+            if clock:
+                due = _apply_clock(due, clock, pm_hint, now, flexible=False)
+            else:
+                due = due.replace(hour=part_time, minute=0, second=0, microsecond=0)
+        return {"due": due, "rule": None}
+
+    weekday = _WEEKDAY_ON_RE.search(text)
+    if re.search(r"\b(?:day after tomorrow)\b|מחרתיים", text):
+        day = now + timedelta(days=2)
+    elif re.search(r"\btomorrow\b|(?<![\w])מחר(?![\w])", text):
+        day = now + timedelta(days=1)
+    elif weekday:
+        days = (_WEEKDAYS[weekday.group("weekday")] - now.weekday()) % 7 or 7
+        day = now + timedelta(days=days)
+    elif re.search(r"\b(?:today|tonight|this (?:morning|afternoon|evening))\b|(?<![\w])(?:היום|הערב)(?![\w])", text):
+        day = now
+    else:
+        day = None
+
+    if clock:
+        due = _apply_clock(day or now, clock, pm_hint, now, flexible=day is None)
+        if day is None and due <= now:
+            due += timedelta(days=1)  # "at 7" when 7 has passed today means tomorrow
+        return {"due": due, "rule": None}
+    if day is not None or part_time is not None:
+        base = day or now
+        due = base.replace(hour=part_time if part_time is not None else 9, minute=0, second=0, microsecond=0)
+        if due <= now:
+            due += timedelta(days=1)
+        return {"due": due, "rule": None}
+    return None
+
+def describe(due, rule=None, lang="en", now=None):
+    """Short spoken form of a due time: "tomorrow at 08:00", "מחר ב־08:00", "every day at 08:00"."""
+    now = now or local_now()
+    if due.tzinfo is not None:
+        due = due.astimezone(now.tzinfo)
+    clock = due.strftime("%H:%M")
+    he = lang == "he"
+    if rule:
+        kind = rule.split(":", 1)[0]
+        if kind == "interval":
+            seconds = int(rule.split(":")[1])
+            if seconds % 3600 == 0:
+                return f"כל {seconds // 3600} שעות" if he else f"every {seconds // 3600} hours"
+            return f"כל {seconds // 60} דקות" if he else f"every {seconds // 60} minutes"
+        if kind == "weekly":
+            if he:
+                return f"כל יום {_WEEKDAY_NAMES_HE[due.weekday()]} ב־{clock}"
+            return f"every {due.strftime('%A')} at {clock}"
+        if kind == "weekdays":
+            return f"בימי חול ב־{clock}" if he else f"on weekdays at {clock}"
+        return f"כל יום ב־{clock}" if he else f"every day at {clock}"
+    days = (due.date() - now.date()).days
+    if days == 0:
+        return f"היום ב־{clock}" if he else f"today at {clock}"
+    if days == 1:
+        return f"מחר ב־{clock}" if he else f"tomorrow at {clock}"
+    if he:
+        return f"יום {_WEEKDAY_NAMES_HE[due.weekday()]} {due.strftime('%d/%m')} ב־{clock}"
+    return f"{due.strftime('%A %d/%m')} at {clock}"
@@ -1 +1,14 @@
 # Utility functions
+import re
+import unicodedata
+
+_NIQQUD_RE = re.compile(r"[\u0591-\u05C7]")
+_PUNCT_RE = re.compile(r"[^\w\s]", re.UNICODE)
+_SPACE_RE = re.compile(r"\s+")
+
+def normalize_text(text):
+    """Fold case, Hebrew niqqud/cantillation, punctuation and whitespace."""
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = _NIQQUD_RE.sub("", text)
+    text = _PUNCT_RE.sub(" ", text)
+    return _SPACE_RE.sub(" ", text).strip()
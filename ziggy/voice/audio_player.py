@@ -0,0 +1,202 @@
+import time
+import queue
+import itertools
+import threading
+import subprocess
+from collections import OrderedDict
+import numpy as np
+
+try:
+    import miniaudio  # In-process MP3 decoding, no subprocess per phrase
+except ImportError:
+    miniaudio = None
+
+# One long-lived playback worker for the whole process. Every frontend
+# (voice loop, Telegram, reminders) queues audio here, so output is serialized
+# and nothing talks over anything else. Decoded PCM is written to a single
+# persistent sink process (aplay by default), so there is no player spawn per
+# phrase, and the writes are paced in real time so interrupt and ducking
+# take effect within one block.
+
+SAMPLE_RATE = 24000  # gTTS output rate
+BLOCK_MS = 20
+MAX_LEAD_S = 0.12    # How far ahead of the speaker we let the pipe run
+
+PRIORITY_ALERT = 0
+PRIORITY_SPEECH = 1
+PRIORITY_CHATTER = 2
+
+DEFAULT_SINK = ["aplay", "-q", "-t", "raw", "-f", "S16_LE", "-r", str(SAMPLE_RATE), "-c", "1"]
+
+class PlaybackRequest:
+    def __init__(self, path, priority):
+        self.path = path
+        self.priority = priority
+        self.queued_at = time.time()
+        self.started_at = None
+        self.finished_at = None  # When the last sample reached the speaker (or it was cut)
+        self.done = threading.Event()
+        self.interrupted = False
+
+class AudioPlayer:
+    def __init__(self, sink_command=None, pcm_cache_items=64):
+        self.sink_command = sink_command or DEFAULT_SINK
+        self.pcm_cache_items = pcm_cache_items
+        self.gain = 1.0
+        self.played = 0
+        self.total_latency = 0.0
+        self.last_latency = None
+        self._queue = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._current = None
+        self._interrupt = threading.Event()
+        self._pcm_cache = OrderedDict()
+        self._sink = None
+        self._lock = threading.Lock()
+        threading.Thread(target=self._worker, name="audio-player", daemon=True).start()
+
+    # ── Public API ───────────────────────────────────────────────
+    def play(self, path, priority=PRIORITY_SPEECH):
+        """Queue a file; returns a request whose .done event fires when it ends."""
+        request = PlaybackRequest(path, priority)
+        self._queue.put((priority, next(self._seq), request))
+        return request
+
+    def play_blocking(self, path, cancel_event=None, priority=PRIORITY_SPEECH):
+        request = self.play(path, priority)
+        while not request.done.wait(0.05):
+            if cancel_event is not None and cancel_event.is_set():
+                self.cancel(request)
+                request.done.wait(1)
+                break
+        return request
+
+    def cancel(self, request):
+        """Stop a request whether it is queued or already playing."""
+        request.interrupted = True
+        if self._current is request:
+            self._interrupt.set()
+
+    def interrupt(self, clear_queue=False):
+        if clear_queue:
+            while True:
+                try:
+                    _, _, request = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                request.interrupted = True
+                request.done.set()
+        self._interrupt.set()
+
+    def duck(self, gain=0.25):
+        self.gain = gain
+
+    def unduck(self):
+        self.gain = 1.0
+
+    def prepare(self, path):
+        """Decode ahead of time so the first block of a phrase is ready at once."""
+        self._decode(path)
+
+    def stats(self):
+        return {
+            "queue_depth": self._queue.qsize(),
+            "playing": self._current.path if self._current else None,
+            "played": self.played,
+            "avg_latency_ms": self.total_latency / self.played * 1000 if self.played else 0.0,
+            "last_latency_ms": self.last_latency * 1000 if self.last_latency is not None else None,
+        }
+
+    # ── Decoding ─────────────────────────────────────────────────
+    def _decode(self, path):
+        with self._lock:
+            pcm = self._pcm_cache.get(path)
+            if pcm is not None:
+                self._pcm_cache.move_to_end(path)
+                return pcm
+        if miniaudio:
+            decoded = miniaudio.decode_file(
+                path, output_format=miniaudio.SampleFormat.SIGNED16, nchannels=1, sample_rate=SAMPLE_RATE
+            )
+            pcm = np.frombuffer(decoded.samples, dtype=np.int16)
+        else:
+            raw = subprocess.run(
+                ["ffmpeg", "-loglevel", "quiet", "-i", path, "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), "-"],
+                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True,
+            ).stdout
+            pcm = np.frombuffer(raw, dtype=np.int16)
+        with self._lock:
+            self._pcm_cache[path] = pcm
+            while len(self._pcm_cache) > self.pcm_cache_items:
+                self._pcm_cache.popitem(last=False)
+        return pcm
+
+    # ── Output ───────────────────────────────────────────────────
+    def _ensure_sink(self):
+        if self._sink is None or self._sink.poll() is not None:
+            self._sink = subprocess.Popen(
+                self.sink_command, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+        return self._sink
+
+    def _write_pcm(self, pcm, request):
+        block = SAMPLE_RATE * BLOCK_MS // 1000
+        start = time.time()
+        written = 0.0
+        for offset in range(0, len(pcm), block):
+            if self._interrupt.is_set() or request.interrupted:
+                return False
+            samples = pcm[offset:offset + block]
+            if self.gain != 1.0:
+                samples = (samples * self.gain).astype(np.int16)
+            sink = self._ensure_sink()
+            try:
+                sink.stdin.write(samples.tobytes())
+                sink.stdin.flush()
+            except (BrokenPipeError, OSError):
+                self._sink = None  # Restarted on the next block
+                continue
+            if request.started_at is None:
+                request.started_at = time.time()
+            written += len(samples) / SAMPLE_RATE
+            ahead = written - (time.time() - start)
+            if ahead > MAX_LEAD_S:
+                time.sleep(ahead - MAX_LEAD_S)
+        # Let the tail drain before reporting the phrase finished
+        remaining = written - (time.time() - start)
+        if remaining > 0:
+            self._interrupt.wait(remaining)
+        return True
+
+    def _worker(self):
+        while True:
+            _, _, request = self._queue.get()
+            if request.interrupted:
+                request.done.set()
+                continue
+            self._interrupt.clear()
+            self._current = request
+            try:
+                pcm = self._decode(request.path)
+                self._write_pcm(pcm, request)
+            except Exception as e:
+                print(f"[PLAYER ERROR] {e}")
+            finally:
+                self._current = None
+                if request.started_at is not None:
+                    self.last_latency = request.started_at - request.queued_at
+                    self.total_latency += self.last_latency
+                    self.played += 1
+                request.finished_at = time.time()
+                request.done.set()
+
+_player = None
+_player_lock = threading.Lock()
+
+def get_player(sink_command=None):
+    """The process-wide player shared by every VoiceAssistant."""
+    global _player
+    with _player_lock:
+        if _player is None:
+            _player = AudioPlayer(sink_command)
+        return _player
@@ -0,0 +1,206 @@
+import time
+import queue
+import threading
+import numpy as np
+import speech_recognition as sr
+
+# Continuous capture: one thread keeps the microphone open, writes every chunk
+# into a preallocated ring buffer and cuts utterances with an energy VAD that
+# tracks the noise floor as it goes. Consumers pull finished segments from a
+# queue, so nothing said between two listen calls is lost and there is no
+# per-turn ambient calibration.
+
+class Segment:
+    """A finished utterance: absolute byte offsets into the stream's ring buffer."""
+
+    def __init__(self, stream, start, end, ended_at):
+        self.stream = stream
+        self.start = start
+        self.end = end
+        self.ended_at = ended_at
+
+    @property
+    def duration(self):
+        return (self.end - self.start) / (self.stream.sample_rate * self.stream.sample_width)
+
+    @property
+    def started_at(self):
+        return self.ended_at - self.duration
+
+    def views(self):
+        """Zero-copy memoryview slices (two when the segment wraps the ring)."""
+        return self.stream.views(self.start, self.end)
+
+    def to_audio_data(self):
+        # The recognizers need one contiguous buffer, so this is the single copy
+        return sr.AudioData(b"".join(self.views()), self.stream.sample_rate, self.stream.sample_width)
+
+class MicrophoneStream:
+    def __init__(self, microphone, buffer_seconds=30, pre_roll_ms=300, hangover_ms=700,
+                 min_speech_ms=200, max_utterance_s=10, vad_ratio=2.5, calibration_s=0.5,
+                 max_segments=8):
+        self.microphone = microphone
+        self.buffer_seconds = buffer_seconds
+        self.pre_roll_ms = pre_roll_ms
+        self.hangover_ms = hangover_ms
+        self.min_speech_ms = min_speech_ms
+        self.max_utterance_s = max_utterance_s
+        self.vad_ratio = vad_ratio
+        self.calibration_s = calibration_s
+        self.segments = queue.Queue(maxsize=max_segments)
+        self.noise_floor = None
+        self.sample_rate = None
+        self.sample_width = None
+        self._ring = None
+        self._view = None
+        self._written = 0  # Total bytes ever written; ring position is _written % capacity
+        self._echo = None  # (PlaybackRequest, tail seconds) whose echo get_segment drops
+        self._running = threading.Event()
+        self._thread = None
+
+    # ── Lifecycle ────────────────────────────────────────────────
+    def start(self):
+        if self._thread:
+            return
+        source = self.microphone.__enter__()
+        self.sample_rate = source.SAMPLE_RATE
+        self.sample_width = source.SAMPLE_WIDTH
+        capacity = self.buffer_seconds * self.sample_rate * self.sample_width
+        self._ring = bytearray(capacity)
+        self._view = memoryview(self._ring)
+        self._running.set()
+        self._thread = threading.Thread(target=self._run, args=(source,), name="mic-stream", daemon=True)
+        self._thread.start()
+        print(f"[AUDIO] Continuous capture started ({self.sample_rate} Hz).")
+
+    def stop(self):
+        self._running.clear()
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+            self.microphone.__exit__(None, None, None)
+
+    # ── Consumer API ─────────────────────────────────────────────
+    def get_segment(self, timeout=None):
+        """Next utterance, skipping ones that ended while output was muted."""
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            remaining = None if deadline is None else max(0, deadline - time.time())
+            try:
+                segment = self.segments.get(timeout=remaining)
+            except queue.Empty:
+                return None
+            if self._is_echo(segment):
+                continue
+            if self._written - segment.start > len(self._ring):
+                print("[AUDIO] Dropping segment overwritten in ring buffer.")
+                continue
+            return segment
+
+    def ignore_echo(self, request, tail):
+        """Drop utterances that are only Ziggy hearing a playback request: they start
+        while it plays and end within tail seconds of its real end."""
+        self._echo = (request, tail)
+
+    def _is_echo(self, segment):
+        if self._echo is None:
+            return False
+        request, tail = self._echo
+        if request.started_at is None:
+            return False  # Not audible yet, so nothing to echo
+        finished_at = request.finished_at or time.time()
+        speech_start = segment.started_at + self.pre_roll_ms / 1000
+        return request.started_at <= speech_start <= finished_at and segment.ended_at <= finished_at + tail
+
+    def clear(self):
+        while True:
+            try:
+                self.segments.get_nowait()
+            except queue.Empty:
+                return
+
+    def views(self, start, end):
+        capacity = len(self._ring)
+        lo, hi = start % capacity, end % capacity
+        if end - start >= capacity:
+            raise ValueError("segment longer than ring buffer")
+        if lo <= hi:
+            return [self._view[lo:hi]]
+        return [self._view[lo:], self._view[:hi]]
+
+    # ── Capture thread ───────────────────────────────────────────
+    def _write(self, data):
+        capacity = len(self._ring)
+        pos = self._written % capacity
+        first = min(len(data), capacity - pos)
+        self._view[pos:pos + first] = data[:first]
+        if first < len(data):
+            self._view[:len(data) - first] = data[first:]
+        self._written += len(data)
+
+    def _ms_to_bytes(self, ms):
+        frame = self.sample_width
+        return int(self.sample_rate * ms / 1000) * frame
+
+    def _run(self, source):
+        chunk = source.CHUNK  # Frames per read
+        chunk_bytes = chunk * self.sample_width
+        chunk_ms = 1000 * chunk / self.sample_rate
+        calibration_chunks = max(1, int(self.calibration_s * 1000 / chunk_ms))
+        hangover_chunks = max(1, int(self.hangover_ms / chunk_ms))
+        min_speech_chunks = max(1, int(self.min_speech_ms / chunk_ms))
+        max_bytes = self._ms_to_bytes(self.max_utterance_s * 1000)
+        pre_roll = self._ms_to_bytes(self.pre_roll_ms)
+        dtype = np.int16 if self.sample_width == 2 else np.int32
+
+        seen = 0
+        speech_start = None
+        speech_chunks = silent_chunks = 0
+        while self._running.is_set():
+            try:
+                data = source.stream.read(chunk)
+            except Exception as e:
+                print(f"[AUDIO ERROR] {e}")
+                time.sleep(0.1)
+                continue
+            chunk_start = self._written
+            self._write(data)
+            samples = np.frombuffer(data, dtype=dtype).astype(np.float32)
+            rms = float(np.sqrt(np.mean(samples ** 2))) if len(samples) else 0.0
+
+            seen += 1
+            if self.noise_floor is None or seen <= calibration_chunks:
+                self.noise_floor = rms if self.noise_floor is None else 0.8 * self.noise_floor + 0.2 * rms
+                continue
+
+            is_speech = rms > self.noise_floor * self.vad_ratio
+            if speech_start is None:
+                if is_speech:
+                    speech_start = max(0, chunk_start - pre_roll, self._written - len(self._ring) + chunk_bytes)
+                    speech_chunks, silent_chunks = 1, 0
+                else:
+                    # Only adapt the floor on background audio, never on speech
+                    self.noise_floor = 0.95 * self.noise_floor + 0.05 * max(rms, 1.0)
+                continue
+
+            if is_speech:
+                speech_chunks += 1
+                silent_chunks = 0
+            else:
+                silent_chunks += 1
+            too_long = self._written - speech_start >= max_bytes
+            if silent_chunks >= hangover_chunks or too_long:
+                if speech_chunks >= min_speech_chunks:
+                    self._emit(Segment(self, speech_start, self._written, time.time()))
+                speech_start = None
+
+    def _emit(self, segment):
+        try:
+            self.segments.put_nowait(segment)
+        except queue.Full:
+            # Consumers fell behind: keep the newest speech
+            try:
+                self.segments.get_nowait()
+            except queue.Empty:
+                pass
+            self.segments.put_nowait(segment)
@@ -0,0 +1,70 @@
+import re
+from functools import lru_cache
+
+# Hebrew or English, decided by counting letters per Unicode script. It is
+# deterministic (the same text always gets the same answer), needs no
+# profiles at startup and costs microseconds, and results are memoized
+# because replies and system phrases repeat. Mixed sentences ("הדלקתי את
+# the living room light") are split into per-language spans so each part is
+# synthesized in its own voice; a single foreign word (a brand, "TV") stays
+# inside the surrounding span instead of breaking the sentence up.
+
+_HEBREW_RE = re.compile(r"[֐-׿יִ-ﭏ]")
+_LATIN_RE = re.compile(r"[A-Za-zÀ-ɏ]")
+_WORD_RE = re.compile(r"\S+\s*")
+
+def script_counts(text):
+    """(hebrew letters, latin letters) in text."""
+    return len(_HEBREW_RE.findall(text)), len(_LATIN_RE.findall(text))
+
+@lru_cache(maxsize=4096)
+def detect_language(text, default="en"):
+    """'he' or 'en' by majority script (ties go to Hebrew); default when there are no letters."""
+    hebrew, latin = script_counts(text)
+    if not hebrew and not latin:
+        return default
+    return "he" if hebrew >= latin else "en"
+
+def _word_language(word):
+    hebrew, latin = script_counts(word)
+    if not hebrew and not latin:
+        return None  # Digits, punctuation, emoji: join whatever surrounds them
+    return "he" if hebrew >= latin else "en"
+
+@lru_cache(maxsize=1024)
+def language_spans(text, min_words=2):
+    """Split text into [(span, lang)] runs; runs shorter than min_words join a neighbour."""
+    runs = []  # [lang, words, lettered word count]
+    for match in _WORD_RE.finditer(text.strip()):
+        word = match.group()
+        lang = _word_language(word)
+        if runs and (lang is None or lang == runs[-1][0] or runs[-1][0] is None):
+            run = runs[-1]
+            run[0] = run[0] or lang  # A neutral opening ("12:30") takes the first script after it
+            run[1].append(word)
+            run[2] += lang is not None
+        else:
+            runs.append([lang, [word], int(lang is not None)])
+    while len(runs) > 1:
+        short = min(range(len(runs)), key=lambda i: runs[i][2])
+        if runs[short][2] >= min_words:
+            break
+        # Fold the shortest run into its longer neighbour, then rejoin same-language runs
+        if short == 0 or (short + 1 < len(runs) and runs[short + 1][2] > runs[short - 1][2]):
+            into = runs[short + 1]
+            into[1][:0] = runs[short][1]
+        else:
+            into = runs[short - 1]
+            into[1].extend(runs[short][1])
+        into[2] += runs[short][2]
+        del runs[short]
+        i = 1
+        while i < len(runs):
+            if runs[i][0] == runs[i - 1][0]:
+                runs[i - 1][1].extend(runs[i][1])
+                runs[i - 1][2] += runs[i][2]
+                del runs[i]
+            else:
+                i += 1
+    default = detect_language(text)
+    return [("".join(words).strip(), lang or default) for lang, words, _ in runs]
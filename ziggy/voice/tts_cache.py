@@ -0,0 +1,152 @@
+import os
+import json
+import time
+import atexit
+import hashlib
+import threading
+
+# Content-addressed cache of synthesized speech. Files are named by the hash
+# of (voice, lang, text), so a phrase is synthesized once and then played from
+# disk. The index tracks size and last use for LRU eviction under a byte
+# budget. It is written in batches rather than on every hit, and audio files
+# are never rewritten in place, which keeps SD-card wear low.
+
+CACHE_DIR = os.path.join(os.path.dirname(__file__), "tts_cache")
+
+class TTSCache:
+    def __init__(self, synthesize, cache_dir=CACHE_DIR, max_bytes=50 * 1024 * 1024,
+                 flush_every=20):
+        """synthesize(text, lang, path) must write the audio for text to path."""
+        self.synthesize = synthesize
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.flush_every = flush_every
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}  # key -> {"size": int, "last_used": float, "pinned": bool}
+        self._dirty = 0
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+        atexit.register(self.flush)
+
+    @staticmethod
+    def key(text, lang, voice="gtts"):
+        return hashlib.sha256(f"{voice}\0{lang}\0{text}".encode("utf-8")).hexdigest()
+
+    def path_for(self, key):
+        return os.path.join(self.cache_dir, f"{key}.mp3")
+
+    def get(self, text, lang, voice="gtts", pin=False):
+        """Return the path of the cached audio, synthesizing it on a miss."""
+        key = self.key(text, lang, voice)
+        path = self.path_for(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and os.path.exists(path):
+                self.hits += 1
+                entry["last_used"] = time.time()
+                entry["pinned"] = entry["pinned"] or pin
+                self._touch()
+                return path
+            self.misses += 1
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Synthesize outside the index lock; the per-key lock stops two callers
+        # from fetching the same phrase twice.
+        with key_lock:
+            if not os.path.exists(path):
+                tmp_path = path + ".part"
+                self.synthesize(text, lang, tmp_path)
+                os.replace(tmp_path, path)
+        with self._lock:
+            self._entries[key] = {"size": os.path.getsize(path), "last_used": time.time(), "pinned": pin}
+            self._key_locks.pop(key, None)
+            self._evict(keep=key)
+            self._touch()
+        return path
+
+    def prerender(self, phrases):
+        """Synthesize and pin (text, lang) pairs so they never hit the network at runtime."""
+        with self._lock:
+            for entry in self._entries.values():
+                entry["pinned"] = False  # Phrases dropped from the list become evictable again
+        rendered = 0
+        for text, lang in phrases:
+            try:
+                self.get(text, lang, pin=True)
+                rendered += 1
+            except Exception as e:
+                print(f"[TTS CACHE] Could not prerender '{text}': {e}")
+        self.flush()
+        print(f"[TTS CACHE] Prerendered {rendered}/{len(phrases)} phrases.")
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": sum(e["size"] for e in self._entries.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+    # ── Internals (call with self._lock held) ────────────────────
+    def _evict(self, keep=None):
+        total = sum(e["size"] for e in self._entries.values())
+        if total <= self.max_bytes:
+            return
+        candidates = sorted(
+            (e["last_used"], key) for key, e in self._entries.items() if not e["pinned"] and key != keep
+        )
+        for _, key in candidates:
+            if total <= self.max_bytes:
+                break
+            total -= self._entries.pop(key)["size"]
+            try:
+                os.remove(self.path_for(key))
+            except FileNotFoundError:
+                pass
+
+    def _touch(self):
+        self._dirty += 1
+        if self._dirty >= self.flush_every:
+            self._write_index()
+
+    def _write_index(self):
+        tmp_path = self.index_path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_path, self.index_path)
+            self._dirty = 0
+        except Exception as e:
+            print(f"[TTS CACHE SAVE ERROR] {e}")
+
+    def flush(self):
+        with self._lock:
+            if self._dirty:
+                self._write_index()
+
+    def _load_index(self):
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, "r", encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except Exception as e:
+                print(f"[TTS CACHE LOAD ERROR] {e}")
+                self._entries = {}
+        # Drop index rows whose files vanished and adopt files the index missed
+        # (e.g. after a power cut between a synthesis and the next flush).
+        for key in list(self._entries):
+            if not os.path.exists(self.path_for(key)):
+                del self._entries[key]
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".mp3") and name[:-4] not in self._entries:
+                path = os.path.join(self.cache_dir, name)
+                self._entries[name[:-4]] = {
+                    "size": os.path.getsize(path), "last_used": os.path.getmtime(path), "pinned": False,
+                }
@@ -1,11 +1,17 @@
 import speech_recognition as sr
-from gtts import gTTS
-from langdetect import detect
-import playsound
-import tempfile
 import os
+import re
 import time
+import queue
+import itertools
 import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from voice.wake_word import WakeWordEngine, TEMPLATES_DIR, SAMPLE_RATE, write_wav
+from voice.audio_stream import MicrophoneStream
+from voice.tts_cache import TTSCache
+from voice.language import language_spans
+from voice.audio_player import get_player, PRIORITY_ALERT, PRIORITY_SPEECH
 
 import ctypes
 import sys
@@ -29,59 +35,281 @@ def suppress_alsa_errors():
     except Exception as e:
         print(f"[WARN] Failed to suppress ALSA errors: {e}", file=sys.stderr)
 
+# ── Speech recognition backends ──────────────────────────────────
+# A backend is a callable (audio, language_code) -> (transcript, confidence)
+# that raises sr.UnknownValueError when nothing was understood. Confidence may
+# be None when the engine does not report one.
+RECOGNITION_LANGUAGES = (("he-IL", "he"), ("en-US", "en"))
+_HEBREW_RE = re.compile(r"[\u0590-\u05FF]")
+_LATIN_RE = re.compile(r"[A-Za-z]")
+
+def google_backend(recognizer):
+    def recognize(audio, language):
+        result = recognizer.recognize_google(audio, language=language, show_all=True)
+        alternatives = result.get("alternative") if isinstance(result, dict) else None
+        if not alternatives:
+            raise sr.UnknownValueError()
+        best = alternatives[0]
+        return best["transcript"], best.get("confidence")
+    return recognize
+
+def _script_matches(text, lang):
+    if lang == "he":
+        return bool(_HEBREW_RE.search(text))
+    return bool(_LATIN_RE.search(text)) and not _HEBREW_RE.search(text)
+
+def _score_transcript(text, confidence, lang):
+    # he-IL happily returns Latin words for English speech and vice versa, so a
+    # transcript in the "wrong" script is strong evidence for the other language.
+    score = confidence if confidence is not None else 0.5
+    return score + (0.5 if _script_matches(text, lang) else -0.5)
+
+# ── Sentence-chunked speech output ───────────────────────────────
+# Sentence ends: . ! ? … and the Hebrew sof pasuq, followed by whitespace (so
+# "3.5" stays whole), plus line breaks. Common abbreviations are not ends.
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?…׃])\s+|\n+")
+_ABBREVIATION_RE = re.compile(r"(?:\b(?:mr|mrs|ms|dr|st|vs|etc|e\.g|i\.e)|\b\w)\.$", re.IGNORECASE)
+MIN_CHUNK_CHARS = 12
+MAX_CHUNK_CHARS = 220
+
+def split_sentences(text):
+    chunks = []
+    for piece in _SENTENCE_END_RE.split(text.strip()):
+        piece = piece.strip()
+        if not piece:
+            continue
+        same_script = chunks and bool(_HEBREW_RE.search(chunks[-1])) == bool(_HEBREW_RE.search(piece))
+        if same_script and (_ABBREVIATION_RE.search(chunks[-1]) or len(chunks[-1]) < MIN_CHUNK_CHARS):
+            chunks[-1] = f"{chunks[-1]} {piece}"
+        else:
+            chunks.append(piece)
+    # Very long sentences still get split at commas so synthesis stays quick
+    result = []
+    for chunk in chunks:
+        while len(chunk) > MAX_CHUNK_CHARS:
+            cut = chunk.rfind(", ", 0, MAX_CHUNK_CHARS)
+            if cut <= 0:
+                cut = chunk.rfind(" ", 0, MAX_CHUNK_CHARS)
+            if cut <= 0:
+                break
+            result.append(chunk[:cut + 1].strip())
+            chunk = chunk[cut + 1:].strip()
+        result.append(chunk)
+    return result
+
+class SpeechPipeline:
+    """Synthesizes chunk N+1 while chunk N plays, one utterance after another.
+
+    Each utterance gets a producer thread that synthesizes into a bounded
+    queue. A single player thread drains utterances by priority, FIFO within
+    a priority: an alert (a due reminder) goes before queued speech and
+    chatter, but never cuts into the utterance already playing. Chunks never
+    reorder and replies never talk over each other. cancel() stops the
+    current and all pending utterances (barge-in).
+    """
+
+    def __init__(self, synthesize, play, max_ahead=2):
+        self.synthesize = synthesize  # (text, lang) -> audio path
+        self.play = play              # (path, cancel_event, priority) -> None, blocks until done
+        self.max_ahead = max_ahead
+        self._utterances = queue.PriorityQueue()
+        self._seq = itertools.count()
+        # One event per generation: cancel() sets the current one and starts a
+        # new one, so a barge-in can never be cleared by the player thread
+        self._cancel = threading.Event()
+        self._pending = 0
+        self._pending_changed = threading.Condition()
+        threading.Thread(target=self._player, name="speech-player", daemon=True).start()
+
+    def speak(self, chunks, on_error=None, priority=PRIORITY_SPEECH):
+        """Queue an utterance; safe to call from any thread (voice, Telegram, timers)."""
+        chunks_queue = queue.Queue(maxsize=self.max_ahead)
+        with self._pending_changed:
+            # Held while enqueueing so concurrent callers play in call order
+            cancel_event = self._cancel
+            self._pending += 1
+            self._utterances.put((priority, next(self._seq), cancel_event, chunks_queue))
+        threading.Thread(
+            target=self._producer, args=(chunks, chunks_queue, cancel_event, on_error),
+            name="speech-synth", daemon=True,
+        ).start()
+
+    def cancel(self):
+        with self._pending_changed:
+            self._cancel.set()
+            self._cancel = threading.Event()
+
+    def wait_until_idle(self, timeout=None):
+        with self._pending_changed:
+            return self._pending_changed.wait_for(lambda: self._pending == 0, timeout)
+
+    def _producer(self, chunks, chunks_queue, cancel_event, on_error):
+        try:
+            for text, lang in chunks:
+                if cancel_event.is_set():
+                    break
+                try:
+                    chunks_queue.put((text, self.synthesize(text, lang)))
+                except Exception as e:
+                    print(f"[TTS ERROR] {e}")
+                    if on_error:
+                        on_error(lang)
+                    break
+        except Exception as e:
+            # Chunks may be a live generator (streamed replies) that can fail midway
+            print(f"[SPEECH ERROR] {e}")
+        finally:
+            chunks_queue.put(None)
+
+    def _player(self):
+        while True:
+            priority, _, cancel_event, chunks_queue = self._utterances.get()
+            while True:
+                item = chunks_queue.get()
+                if item is None:
+                    break
+                if cancel_event.is_set():
+                    continue  # Cancelled: drain so the producer can finish
+                self.play(item[1], cancel_event, priority)
+            with self._pending_changed:
+                self._pending -= 1
+                self._pending_changed.notify_all()
+
+ACK_PHRASES = {"he": "כן?", "en": "Yes?"}
+
+# How long after the "Yes?" prompt finishes its echo can still end a segment
+ACK_ECHO_SECONDS = 1.5
+
 class VoiceAssistant:
-    def __init__(self, language="auto", mic_index=1):
+    def __init__(self, language="auto", mic_index=1, recognition_mode="parallel",
+                 recognizer_backend=None, early_accept=0.85, recognition_timeout=8,
+                 wake_engine=None, continuous_capture=False, tts_cache_mb=50,
+                 audio_sink=None):
         suppress_alsa_errors()  # 🔊 Suppress ALSA logs before initializing audio
         self.language = language
         self.recognizer = sr.Recognizer()
         self.recognizer.energy_threshold = 300  # Optional: tweak this too
         self.recognizer.dynamic_energy_threshold = True
         self.recognizer.dynamic_energy_adjustment_ratio = 1.5
+        self.recognition_mode = recognition_mode
+        self.recognizer_backend = recognizer_backend or google_backend(self.recognizer)
+        self.early_accept = early_accept
+        self.recognition_timeout = recognition_timeout
+        self._stt_pool = ThreadPoolExecutor(max_workers=len(RECOGNITION_LANGUAGES), thread_name_prefix="stt")
+        self.wake_engine = wake_engine if wake_engine is not None else WakeWordEngine()
+        self.tts_cache = TTSCache(self._synthesize, max_bytes=tts_cache_mb * 1024 * 1024)
+        self.player = get_player(audio_sink)
+        self.speech = SpeechPipeline(self.tts_cache.get, self._play)
         self.listening_config = {
             "wake_word": {"ambient_duration": 0.5, "timeout": 4, "phrase_time_limit": 4},
             "command": {"ambient_duration": 1, "timeout": 10, "phrase_time_limit": 10}
         }
 
+        self.continuous_capture = continuous_capture
+        self.microphone, self.stream = self._open_microphone(mic_index)
+
+    def _open_microphone(self, mic_index):
         try:
-            self.microphone = sr.Microphone(device_index=mic_index)
+            microphone = sr.Microphone(device_index=mic_index)
         except Exception as e:
             print(f"[MIC INIT ERROR] {e}")
-            self.microphone = None
+            return None, None
+        # Opened lazily on first capture so a VoiceAssistant used only for output never holds the mic
+        return microphone, MicrophoneStream(microphone) if self.continuous_capture else None
 
-    def _detect_language(self, text):
-        try:
-            lang = detect(text)
-            return "he" if lang.startswith("he") else "en"
-        except:
-            return "en"
+    def set_microphone(self, mic_index):
+        """Switch input device (e.g. mic_index changed in settings) without restarting Ziggy.
 
-    def say(self, text, force_lang=None):
-        lang = force_lang or (self._detect_language(text) if self.language == "auto" else self.language)
-        try:
-            if lang == "he":
-                lang = "iw"
-            tts = gTTS(text=text, lang=lang)
-            with tempfile.NamedTemporaryFile(delete=True, suffix=".mp3") as fp:
-                tts.save(fp.name)
-                print(f"🟢 Ziggy says: {text}")
-                def _play_audio_silently(filepath):
-                    import subprocess
-                    subprocess.Popen(
-                        ["ffplay", "-nodisp", "-autoexit", "-loglevel", "quiet", filepath],
-                        stdout=subprocess.DEVNULL,
-                        stderr=subprocess.DEVNULL
-                    )
-
-                    # Then use this:
-                    threading.Thread(target=_play_audio_silently, args=(fp.name,), daemon=True).start()
+        A capture already waiting on the old stream ends at its timeout; the
+        next one opens the new device. Keeps the old mic if the new one fails.
+        """
+        microphone, stream = self._open_microphone(mic_index)
+        if microphone is None:
+            return False
+        old_stream = self.stream
+        self.microphone, self.stream = microphone, stream
+        if old_stream:
+            old_stream.stop()
+        print(f"[AUDIO] Microphone switched to device {mic_index}.")
+        return True
 
-        except Exception as e:
-            print(f"[TTS ERROR] {e}")
-            fallback = "לא הצלחתי לדבר" if lang == "he" else "I couldn't speak"
-            os.system(f'espeak "{fallback}"')
+    def _synthesize(self, text, lang, path):
+        from gtts import gTTS  # Only needed on a TTS cache miss
+        gTTS(text=text, lang="iw" if lang == "he" else lang).save(path)
+
+    def _play(self, path, cancel_event, priority=PRIORITY_SPEECH):
+        self.player.play_blocking(path, cancel_event, priority)
+
+    def _speak_fallback(self, lang):
+        fallback = "לא הצלחתי לדבר" if lang == "he" else "I couldn't speak"
+        os.system(f'espeak "{fallback}"')
+
+    def say(self, text, force_lang=None, priority=PRIORITY_SPEECH):
+        """Queue text for speech and return; long replies play sentence by sentence.
+
+        priority is an audio_player PRIORITY_* level: PRIORITY_ALERT jumps
+        ahead of queued replies, PRIORITY_CHATTER waits behind them.
+        """
+        chunks = []
+        for sentence in split_sentences(text):
+            chunks.extend(self._language_chunks(sentence, force_lang))
+        if not chunks:
+            return
+        print(f"🟢 Ziggy says: {text}")
+        self.speech.speak(chunks, on_error=self._speak_fallback, priority=priority)
+
+    def say_stream(self, deltas, force_lang=None, priority=PRIORITY_SPEECH):
+        """Speak text that is still being generated (e.g. LLM token deltas).
+
+        Complete sentences are handed to synthesis as soon as the next one
+        starts, so the first sentence plays while the rest is still arriving.
+        """
+        def chunks():
+            buffer = ""
+            spoken = []
+            for delta in deltas:
+                buffer += delta
+                # Text up to the last sentence break is final; the rest may still grow
+                last_break = None
+                for last_break in _SENTENCE_END_RE.finditer(buffer):
+                    pass
+                if last_break is None or last_break.end() == len(buffer):
+                    continue
+                for sentence in split_sentences(buffer[:last_break.start()]):
+                    spoken.append(sentence)
+                    yield from self._language_chunks(sentence, force_lang)
+                buffer = buffer[last_break.end():]
+            for sentence in split_sentences(buffer):
+                spoken.append(sentence)
+                yield from self._language_chunks(sentence, force_lang)
+            print(f"🟢 Ziggy said: {' '.join(spoken)}")
+        self.speech.speak(chunks(), on_error=self._speak_fallback, priority=priority)
+
+    def _language_chunks(self, sentence, force_lang=None):
+        """(text, lang) pieces to synthesize; in auto mode mixed sentences split by script."""
+        if force_lang or self.language != "auto":
+            return [(sentence, force_lang or self.language)]
+        return language_spans(sentence)
+
+    def stop_speaking(self):
+        """Barge-in: cut the current reply and drop anything queued behind it."""
+        self.speech.cancel()
+
+    def wait_until_done(self, timeout=None):
+        return self.speech.wait_until_idle(timeout)
+
+    def prerender(self, phrases):
+        """Warm the TTS cache with fixed (text, lang) phrases, e.g. at boot."""
+        acks = [(text, lang) for lang, text in ACK_PHRASES.items()]
+        self.tts_cache.prerender(acks + list(phrases))
+        for text, lang in acks:
+            # Keep the acknowledgements decoded so they start playing immediately
+            self.player.prepare(self.tts_cache.get(text, lang))
 
     def _capture_audio(self, mode="command"):
         config = self.listening_config.get(mode, self.listening_config["command"])
+        if self.stream:
+            return self._next_segment(mode, config)
         self.recognizer.pause_threshold = 0.8 if mode == "wake_word" else 0.5
         with self.microphone as source:
             self.recognizer.adjust_for_ambient_noise(source, duration=config["ambient_duration"])
@@ -100,19 +328,67 @@ class VoiceAssistant:
                 print("⏰ Timeout: No speech detected.")
                 return None
 
-    def _recognize(self, audio):
+    def _next_segment(self, mode, config):
+        stream = self.stream  # set_microphone may swap it while we wait
+        stream.start()
+        print(f"🟢 Listening ({mode})...")
+        segment = stream.get_segment(timeout=config["timeout"])
+        if not segment:
+            print("⏰ Timeout: No speech detected.")
+            return None
+        print(f"[AUDIO] Segment duration: {segment.duration:.2f}s")
+        return segment.to_audio_data()
+
+    def _recognize_one(self, audio, language):
         try:
-            result = self.recognizer.recognize_google(audio, language="he-IL")
-            return result, "he"
+            return self.recognizer_backend(audio, language)
         except sr.UnknownValueError:
-            try:
-                result = self.recognizer.recognize_google(audio, language="en-US")
-                return result, "en"
-            except sr.UnknownValueError:
-                return None, None
+            return None
         except sr.RequestError as e:
-            print(f"⚠️ Recognition error: {e}")
+            print(f"⚠️ Recognition error ({language}): {e}")
+            return None
+
+    def _recognize_sequential(self, audio):
+        for code, lang in RECOGNITION_LANGUAGES:
+            result = self._recognize_one(audio, code)
+            if result:
+                return result[0], lang
+        return None, None
+
+    def _recognize_parallel(self, audio):
+        start = time.time()
+        futures = {self._stt_pool.submit(self._recognize_one, audio, code): lang
+                   for code, lang in RECOGNITION_LANGUAGES}
+        pending = set(futures)
+        candidates = []
+        deadline = start + self.recognition_timeout
+        while pending:
+            done, pending = wait(pending, timeout=max(0, deadline - time.time()), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                result = future.result()
+                if not result:
+                    continue
+                text, confidence = result
+                lang = futures[future]
+                if (confidence or 0) >= self.early_accept and _script_matches(text, lang):
+                    # Confident and in the right script: don't wait for the loser
+                    print(f"[STT] {lang} accepted early after {time.time() - start:.2f}s")
+                    return text, lang
+                candidates.append((_score_transcript(text, confidence, lang), text, lang))
+        if pending:
+            print("⏰ Recognition timed out for one language.")
+        if not candidates:
             return None, None
+        _, text, lang = max(candidates)
+        print(f"[STT] {lang} chosen after {time.time() - start:.2f}s")
+        return text, lang
+
+    def _recognize(self, audio):
+        if self.recognition_mode == "parallel":
+            return self._recognize_parallel(audio)
+        return self._recognize_sequential(audio)
 
     def _matches_wake_word(self, text):
         lowered = text.lower()
@@ -130,21 +406,42 @@ class VoiceAssistant:
         if not audio:
             return None
 
+        if self.wake_engine.ready:
+            match = self.wake_engine.detect(audio.get_raw_data(convert_rate=SAMPLE_RATE, convert_width=2))
+            if match:
+                lang, distance = match
+                print(f"✅ Wake word detected locally ({lang}, distance {distance:.2f}).")
+                self.stop_speaking()
+                return lang
+            print("🔇 Wake word not detected.")
+            return None
+
+        # No templates recorded yet: fall back to cloud STT on the window
         result, lang = self._recognize(audio)
         print(f"[DEBUG] Wake word recognition result: {result}")
 
         if result and self._matches_wake_word(result):
             print("✅ Wake word detected.")
-            return lang
-
-        # Fallback: accept partial short phrases like just "Ziggy" or "היי"
-        if result and len(result.split()) <= 2:
-            print("🟡 Partial wake word match, accepting anyway.")
+            self.stop_speaking()
             return lang
 
         print("🔇 Wake word not detected.")
         return None
 
+    def record_wake_template(self, lang, name=None):
+        """Record one utterance of the wake word into the template set for lang."""
+        print(f"🎙️ Say the wake word ({lang})...")
+        audio = self._capture_audio(mode="wake_word")
+        if not audio:
+            return None
+        pcm = audio.get_raw_data(convert_rate=SAMPLE_RATE, convert_width=2)
+        name = name or f"wake_{int(time.time())}.wav"
+        path = os.path.join(TEMPLATES_DIR, lang, name)
+        write_wav(path, pcm)
+        self.wake_engine.add_template(pcm, lang, name)
+        print(f"[WAKE WORD] Saved template {path}")
+        return path
+
     def listen_for_command(self):
         if not self.microphone:
             print("[MIC ERROR] Microphone not initialized")
@@ -163,13 +460,35 @@ class VoiceAssistant:
         print("❌ Didn’t catch that.")
         return None
 
+    def acknowledge(self, lang):
+        """Answer the wake word ("Yes?") and ignore our own echo of it."""
+        text = ACK_PHRASES.get(lang, ACK_PHRASES["en"])
+        try:
+            path = self.tts_cache.get(text, lang)
+        except Exception as e:
+            print(f"[TTS ERROR] {e}")
+            self._speak_fallback(lang)
+            return
+        print(f"🟢 Ziggy says: {text}")
+        # Played directly so the echo window follows the real playback, not the queue time;
+        # speech that starts before it or runs past its echo still comes through
+        request = self.player.play(path, PRIORITY_ALERT)
+        if self.stream:
+            self.stream.ignore_echo(request, ACK_ECHO_SECONDS)
+
+    def close(self):
+        """Release the microphone and cut any speech in progress."""
+        self.stop_speaking()
+        if self.stream:
+            self.stream.stop()
+
     def listen_and_process(self, command_callback):
         while True:
             try:
                 lang = self.listen_for_wake_word()
                 if not lang:
                     continue
-                self.say("כן?" if lang == "he" else "Yes?", force_lang=lang)
+                self.acknowledge(lang)
                 command = self.listen_for_command()
                 if command:
                     text, lang = command
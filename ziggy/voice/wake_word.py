@@ -0,0 +1,170 @@
+import os
+import glob
+import wave
+import numpy as np
+
+# Local wake-word spotting: an energy VAD rejects silence and noise bursts
+# cheaply, then MFCC sequences of the voiced audio are compared against
+# recorded templates with subsequence DTW. No network involved.
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(__file__), "wake_templates")
+SAMPLE_RATE = 16000
+
+FRAME_MS = 25
+HOP_MS = 10
+N_FFT = 512
+N_MELS = 26
+N_MFCC = 13
+
+def read_wav(path, sample_rate=SAMPLE_RATE):
+    """Read a 16-bit PCM WAV as mono int16 bytes; resample naively if needed."""
+    with wave.open(path, "rb") as wf:
+        channels, width, rate = wf.getnchannels(), wf.getsampwidth(), wf.getframerate()
+        frames = wf.readframes(wf.getnframes())
+    if width != 2:
+        raise ValueError(f"{path}: expected 16-bit PCM, got {8 * width}-bit")
+    samples = np.frombuffer(frames, dtype=np.int16)
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1).astype(np.int16)
+    if rate != sample_rate:
+        positions = np.linspace(0, len(samples) - 1, int(len(samples) * sample_rate / rate))
+        samples = np.interp(positions, np.arange(len(samples)), samples).astype(np.int16)
+    return samples.tobytes()
+
+def write_wav(path, pcm, sample_rate=SAMPLE_RATE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        wf.writeframes(pcm)
+
+def _mel_filterbank(sample_rate, n_fft=N_FFT, n_mels=N_MELS):
+    def hz_to_mel(hz):
+        return 2595 * np.log10(1 + hz / 700)
+
+    def mel_to_hz(mel):
+        return 700 * (10 ** (mel / 2595) - 1)
+
+    mel_points = np.linspace(hz_to_mel(0), hz_to_mel(sample_rate / 2), n_mels + 2)
+    bins = np.floor((n_fft + 1) * mel_to_hz(mel_points) / sample_rate).astype(int)
+    bank = np.zeros((n_mels, n_fft // 2 + 1), dtype=np.float32)
+    for m in range(1, n_mels + 1):
+        left, center, right = bins[m - 1], bins[m], bins[m + 1]
+        if center > left:
+            bank[m - 1, left:center] = (np.arange(left, center) - left) / (center - left)
+        if right > center:
+            bank[m - 1, center:right] = (right - np.arange(center, right)) / (right - center)
+    return bank
+
+def _dct_matrix(n_in=N_MELS, n_out=N_MFCC):
+    n = np.arange(n_in)
+    k = np.arange(n_out)[:, None]
+    return np.cos(np.pi * k * (2 * n + 1) / (2 * n_in)).astype(np.float32)
+
+class WakeWordEngine:
+    def __init__(self, templates_dir=TEMPLATES_DIR, sample_rate=SAMPLE_RATE,
+                 threshold=0.35, vad_ratio=3.0, min_speech_ms=250):
+        self.sample_rate = sample_rate
+        self.threshold = threshold
+        self.vad_ratio = vad_ratio
+        self.min_speech_frames = min_speech_ms // HOP_MS
+        self.frame_len = sample_rate * FRAME_MS // 1000
+        self.hop_len = sample_rate * HOP_MS // 1000
+        self._window = np.hamming(self.frame_len).astype(np.float32)
+        self._mel = _mel_filterbank(sample_rate)
+        self._dct = _dct_matrix()
+        self.templates = []  # (lang, name, mfcc)
+        self.load_templates(templates_dir)
+
+    @property
+    def ready(self):
+        return bool(self.templates)
+
+    def load_templates(self, templates_dir):
+        """Templates live in <dir>/<lang>/*.wav, e.g. wake_templates/he/hey_ziggy_1.wav."""
+        for path in sorted(glob.glob(os.path.join(templates_dir, "*", "*.wav"))):
+            lang = os.path.basename(os.path.dirname(path))
+            try:
+                self.add_template(read_wav(path, self.sample_rate), lang, os.path.basename(path))
+            except Exception as e:
+                print(f"[WAKE WORD] Skipping template {path}: {e}")
+        if self.templates:
+            print(f"[WAKE WORD] Loaded {len(self.templates)} templates.")
+
+    def add_template(self, pcm, lang, name="template"):
+        samples = self._voiced(self._to_float(pcm))
+        if samples is None:
+            raise ValueError("no speech found in template")
+        self.templates.append((lang, name, self.mfcc(samples)))
+
+    # ── Features ─────────────────────────────────────────────────
+    def _to_float(self, pcm):
+        return np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+
+    def _frames(self, samples):
+        if len(samples) < self.frame_len:
+            samples = np.pad(samples, (0, self.frame_len - len(samples)))
+        count = 1 + (len(samples) - self.frame_len) // self.hop_len
+        return np.lib.stride_tricks.as_strided(
+            samples,
+            shape=(count, self.frame_len),
+            strides=(samples.strides[0] * self.hop_len, samples.strides[0]),
+        )
+
+    def mfcc(self, samples):
+        emphasized = np.append(samples[0], samples[1:] - 0.97 * samples[:-1]).astype(np.float32)
+        frames = self._frames(emphasized) * self._window
+        power = np.abs(np.fft.rfft(frames, N_FFT)) ** 2 / N_FFT
+        log_mel = np.log(power @ self._mel.T + 1e-10)
+        coeffs = log_mel @ self._dct.T
+        coeffs -= coeffs.mean(axis=0)  # Cepstral mean normalization: mic/room invariance
+        return coeffs
+
+    # ── Energy VAD ───────────────────────────────────────────────
+    def _voiced(self, samples):
+        """Trim to the span of frames well above the noise floor, or None."""
+        energy = (self._frames(samples) ** 2).mean(axis=1)
+        floor = max(np.percentile(energy, 10), 1e-7)
+        voiced = np.flatnonzero(energy > floor * self.vad_ratio)
+        if len(voiced) < self.min_speech_frames:
+            return None
+        start = voiced[0] * self.hop_len
+        end = voiced[-1] * self.hop_len + self.frame_len
+        return samples[start:end]
+
+    # ── Matching ─────────────────────────────────────────────────
+    @staticmethod
+    def _subsequence_dtw(template, query):
+        """Best normalized cost of the template aligned to any span of the query.
+
+        Steps (1,0), (1,1) and (1,2) bound the warp to half/double speed and
+        make every row a vectorized update instead of a per-cell loop.
+        """
+        t_norm = template / (np.linalg.norm(template, axis=1, keepdims=True) + 1e-9)
+        q_norm = query / (np.linalg.norm(query, axis=1, keepdims=True) + 1e-9)
+        dist = 1.0 - t_norm @ q_norm.T  # Cosine distance, shape (len(template), len(query))
+        cost = dist[0].copy()  # Free start anywhere in the query
+        for i in range(1, dist.shape[0]):
+            best = cost.copy()
+            best[1:] = np.minimum(best[1:], cost[:-1])
+            best[2:] = np.minimum(best[2:], cost[:-2])
+            cost = dist[i] + best
+        return float(cost.min()) / dist.shape[0]  # Free end as well
+
+    def detect(self, pcm):
+        """Return (lang, distance) when the wake word is present in 16 kHz int16 PCM."""
+        if not self.templates:
+            return None
+        samples = self._voiced(self._to_float(pcm))
+        if samples is None:
+            return None
+        features = self.mfcc(samples)
+        best = None
+        for lang, name, template in self.templates:
+            distance = self._subsequence_dtw(template, features)
+            if best is None or distance < best[1]:
+                best = (lang, distance)
+        if best and best[1] <= self.threshold:
+            return best
+        return None